@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""End-to-end worker benchmark with local stand-ins for RabbitMQ, GitHub and Ollama.
+
+Runs the real ``process_task`` pipeline for N synthetic tasks against:
+
+- local bare git repositories, reached through ``url.<path>.insteadOf`` so the
+  worker still clones and pushes ``https://github.com/bench/...`` URLs,
+- a fake GitHub REST API (repositories, issues, pull requests, comments, labels,
+  reactions) with configurable latency,
+- a fake Ollama/OpenAI endpoint streaming SEARCH/REPLACE edits with a configurable
+  time to first token and per-token latency,
+- FastStream's in-memory ``TestRabbitBroker``, with each lane limited to its
+  prefetch count like the real queues.
+
+The result is printed as JSON: throughput, p50/p95/p99 latency of tasks and of
+every pipeline stage, and peak RSS and workspace disk usage. Pass ``--baseline``
+with an earlier result to compare two versions of the worker.
+
+Example:
+    python scripts/benchmark.py --tasks 50 --concurrency 4 --output bench.json
+    python scripts/benchmark.py --tasks 50 --concurrency 4 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_HOST = "https://github.com/bench/"
+BENCH_TOKEN = "bench-token"
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize samples with linear-interpolated percentiles."""
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        rank = (len(ordered) - 1) * p / 100
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": round(pct(50), 4),
+        "p95": round(pct(95), 4),
+        "p99": round(pct(99), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def git(*args: str, cwd: Optional[Path] = None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+# ---------------------------------------------------------------------------
+# Local git remotes
+# ---------------------------------------------------------------------------
+
+
+def create_remote(remotes_dir: Path, name: str, files: int, pr_branches: List[str]) -> Path:
+    """Create a bare repository with ``files`` Python modules spread over packages."""
+    work = remotes_dir / f"{name}-work"
+    bare = remotes_dir / f"{name}.git"
+    git("init", "--quiet", "--initial-branch", "main", str(work))
+
+    for i in range(files):
+        package = work / "src" / f"pkg{i % 10}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"module_{i}.py").write_text(
+            f'"""Module {i}."""\n\n\n'
+            f"class Service{i}:\n"
+            f'    """Service number {i}."""\n\n'
+            f"    def handle_{i}(self, value):\n"
+            f"        return value * {i}\n\n\n"
+            f"def helper_{i}(items):\n"
+            f"    return [item for item in items if item % {i + 2}]\n"
+        )
+    (work / "README.md").write_text(f"# {name}\n\nBenchmark repository.\n")
+
+    git("add", "-A", cwd=work)
+    git("commit", "--quiet", "-m", "Initial commit", cwd=work)
+    git("clone", "--quiet", "--bare", str(work), str(bare))
+    # Allow blobless clones for the sparse checkout mode
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=bare)
+    for branch in pr_branches:
+        git("branch", branch, "main", cwd=bare)
+    shutil.rmtree(work)
+    return bare
+
+
+def write_git_config(path: Path, remotes_dir: Path) -> None:
+    """Route the fake GitHub URLs to the local remotes, without touching ~/.gitconfig."""
+    path.write_text(
+        f'[url "file://{remotes_dir}/"]\n'
+        f"\tinsteadOf = {BENCH_HOST}\n"
+        # The worker embeds the token in the clone URL
+        f"\tinsteadOf = {BENCH_HOST.replace('https://', f'https://{BENCH_TOKEN}@')}\n"
+        "[user]\n"
+        "\tname = Benchmark\n"
+        "\temail = bench@example.com\n"
+        '[protocol "file"]\n'
+        "\tallow = always\n"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Fake GitHub and LLM servers
+# ---------------------------------------------------------------------------
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _json(self, status: int, data: Any) -> None:
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeGitHubHandler(_Handler):
+    """The subset of the GitHub REST API used by the worker."""
+
+    def _handle(self, method: str) -> None:
+        server: "FakeServer" = self.server
+        server.count(method)
+        time.sleep(server.latency)
+        api = server.url
+        body = self._body() if method == "POST" else {}
+
+        match = re.fullmatch(r"/repos/([^/]+)/([^/]+)(/.*)?", self.path)
+        if not match:
+            self._json(404, {"message": "Not Found"})
+            return
+        full_name = f"{match.group(1)}/{match.group(2)}"
+        rest = match.group(3) or ""
+        repo_api = f"{api}/repos/{full_name}"
+
+        if method == "GET" and rest == "":
+            self._json(200, {"full_name": full_name, "url": repo_api, "default_branch": "main"})
+        elif method == "GET" and (issue := re.fullmatch(r"/issues/(\d+)", rest)):
+            number = int(issue.group(1))
+            self._json(
+                200,
+                {
+                    "number": number,
+                    "title": f"Handle negative values in module_{number % 50}",
+                    "body": f"helper_{number % 50} and Service{number % 50} misbehave for "
+                    f"negative input. See src/pkg{number % 10}/module_{number % 50}.py",
+                    "state": "open",
+                    "labels": [{"name": "bug"}],
+                    "user": {"login": "bench"},
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "updated_at": "2024-01-01T00:00:00Z",
+                    "comments": 0,
+                    "html_url": f"https://github.com/{full_name}/issues/{number}",
+                    "url": f"{repo_api}/issues/{number}",
+                    "comments_url": f"{repo_api}/issues/{number}/comments",
+                    "repository_url": repo_api,
+                },
+            )
+        elif method == "POST" and rest == "/pulls":
+            number = server.next_number()
+            self._json(
+                201,
+                {
+                    "number": number,
+                    "html_url": f"https://github.com/{full_name}/pull/{number}",
+                    "head": {"ref": body.get("head")},
+                },
+            )
+        elif method == "POST":
+            # Comments, labels and reactions
+            self._json(201, {"id": server.next_number()})
+        else:
+            self._json(404, {"message": "Not Found"})
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+
+class FakeLLMHandler(_Handler):
+    """Ollama's root, ``/api/ps`` and ``/api/generate`` endpoints plus an OpenAI-compatible
+    chat completion. A model pays ``load_time`` on its first request."""
+
+    def do_GET(self) -> None:
+        server: "FakeServer" = self.server
+        server.count("GET")
+        if self.path == "/api/ps":
+            # Models stay loaded once they have served a completion
+            self._json(200, {"models": [{"name": model} for model in sorted(server.models)]})
+            return
+        payload = b"Ollama is running"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:
+        server: "FakeServer" = self.server
+        server.count("POST")
+        request = self._body()
+        load_duration = server.load(request.get("model"))
+        if self.path == "/api/generate":
+            # A request without a prompt only loads the model
+            self._json(
+                200, {"model": request.get("model"), "done": True, "load_duration": load_duration}
+            )
+            return
+        if not request.get("stream"):
+            message = {"role": "assistant", "content": "pong"}
+            self._json(200, {"choices": [{"index": 0, "message": message}]})
+            return
+
+        prompt = request["messages"][-1]["content"]
+        number = re.search(r"(?:issue|PR) #(\d+)", prompt)
+        name = number.group(1) if number else str(server.next_number())
+
+        # Filler tokens stand in for the model's reasoning before the edit
+        filler = " ".join(f"tok{i}" for i in range(max(0, server.tokens - 20)))
+        completion = (
+            f"{filler}\n\nbench_changes/change_{name}.py\n```python\n<<<<<<< SEARCH\n"
+            f"=======\ndef change_{name}():\n    return {name}\n>>>>>>> REPLACE\n```\n"
+        )
+        chunks = re.findall(r"\S+\s*|\s+", completion)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data: str) -> None:
+            raw = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+
+        time.sleep(server.ttft)
+        for chunk in chunks:
+            send(json.dumps({"choices": [{"index": 0, "delta": {"content": chunk}}]}))
+            time.sleep(server.latency)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(chunks)}
+        send(json.dumps({"choices": [], "usage": usage}))
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Threaded HTTP server counting requests, one thread per connection."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        handler: type,
+        latency: float = 0.0,
+        ttft: float = 0.0,
+        tokens: int = 0,
+        load_time: float = 0.0,
+    ):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.ttft = ttft
+        self.tokens = tokens
+        self.load_time = load_time
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.models: Set[str] = set()
+        self._counter = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, method: str) -> None:
+        with self._lock:
+            self.requests[method] += 1
+
+    def load(self, model: str) -> int:
+        """Load a model on first use; return the load time in nanoseconds, like Ollama."""
+        with self._lock:
+            if model in self.models:
+                return 0
+            time.sleep(self.load_time)
+            self.models.add(model)
+            return int(self.load_time * 1e9)
+
+    def next_number(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return 10000 + self._counter
+
+
+# ---------------------------------------------------------------------------
+# Benchmark run
+# ---------------------------------------------------------------------------
+
+
+class EventRecorder:
+    """structlog processor collecting task and stage events, optionally writing logs."""
+
+    def __init__(self, log_file: Optional[Path]):
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.events: Dict[str, int] = defaultdict(int)
+        self.log_file = open(log_file, "a") if log_file else None
+
+    def __call__(self, logger: Any, method: str, event_dict: Dict[str, Any]) -> Any:
+        import structlog
+
+        event = event_dict.get("event")
+        self.events[event] += 1
+        if event == "step_completed":
+            stage = f"{event_dict.get('pipeline')}.{event_dict.get('step')}"
+            self.stages[stage].append(event_dict["duration_seconds"])
+        if self.log_file is None:
+            raise structlog.DropEvent
+        return event_dict
+
+
+async def sample_resources(workspace: Path, peak: Dict[str, int], interval: float) -> None:
+    """Track the peak workspace disk usage."""
+    from worker.git.repo_cache import dir_size
+
+    while True:
+        size = await asyncio.to_thread(dir_size, workspace)
+        peak["disk"] = max(peak["disk"], size)
+        await asyncio.sleep(interval)
+
+
+async def run_benchmark(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    import structlog
+    from faststream.rabbit import TestRabbitBroker
+
+    from worker import main
+    from worker.config import settings
+    from worker.git.repo_cache import dir_size
+    from worker.models import TaskMessage, TaskMode
+
+    recorder = EventRecorder(args.log_file)
+    processors = [structlog.contextvars.merge_contextvars, recorder]
+    if args.log_file:
+        processors += [
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.add_log_level,
+            structlog.processors.JSONRenderer(),
+        ]
+    # FastStream's access log would interleave with the JSON result on stdout
+    for name in logging.root.manager.loggerDict:
+        if name.startswith("faststream"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+    structlog.configure(
+        processors=processors,
+        logger_factory=structlog.PrintLoggerFactory(recorder.log_file or sys.stderr),
+    )
+
+    refine_tasks = round(args.tasks * args.refine_ratio)
+    tasks: List[TaskMessage] = []
+    for i in range(args.tasks):
+        repo_url = f"{BENCH_HOST}repo{i % args.repos}"
+        if i < refine_tasks:
+            tasks.append(
+                TaskMessage(
+                    repo_url=repo_url,
+                    mode=TaskMode.REFINE,
+                    pr_number=i + 1,
+                    pr_branch=f"bench/pr-{i + 1}",
+                    comment_id=i + 1,
+                    refine_request=f"PR #{i + 1}: also handle negative values in helper_{i % 50}",
+                    trigger_user="bench",
+                )
+            )
+        else:
+            tasks.append(
+                TaskMessage(
+                    repo_url=repo_url, mode=TaskMode.QUICKFIX, issue_id=i + 1, trigger_user="bench"
+                )
+            )
+
+    lanes = {
+        TaskMode.QUICKFIX: (
+            settings.rabbitmq_queue,
+            asyncio.Semaphore(settings.max_concurrent_tasks),
+        ),
+        TaskMode.REFINE: (
+            settings.rabbitmq_refine_queue,
+            asyncio.Semaphore(settings.max_concurrent_refine_tasks),
+        ),
+    }
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failures: List[str] = []
+    peak = {"disk": 0}
+
+    async def publish(broker: Any, index: int, task: TaskMessage) -> None:
+        queue, lane = lanes[task.mode]
+        # The prefetch count bounds each lane, as with the real broker
+        async with lane:
+            started = time.monotonic()
+            try:
+                await broker.publish(
+                    task.model_dump(mode="json"), queue=queue, message_id=f"bench-{index}"
+                )
+            except Exception as e:
+                failures.append(f"{task.mode.value} #{index}: {e!r}")
+                return
+            latencies[task.mode.value].append(time.monotonic() - started)
+
+    async with TestRabbitBroker(main.broker) as broker:
+        startup_started = time.monotonic()
+        await main.on_startup()
+        startup_seconds = time.monotonic() - startup_started
+        sampler = asyncio.create_task(
+            sample_resources(Path(settings.workspace_dir), peak, args.sample_interval)
+        )
+        started = time.monotonic()
+        try:
+            await asyncio.gather(*(publish(broker, i, task) for i, task in enumerate(tasks)))
+            elapsed = time.monotonic() - started
+        finally:
+            sampler.cancel()
+            await main.after_shutdown()
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    succeeded = sum(len(values) for values in latencies.values())
+
+    return {
+        "tasks": {
+            "total": len(tasks),
+            "succeeded": succeeded,
+            "failed": len(failures),
+            "errors": failures[:20],
+        },
+        "duration_seconds": round(elapsed, 3),
+        # Worker startup, including the model warm-up
+        "startup_seconds": round(startup_seconds, 3),
+        "throughput": {
+            "tasks_per_second": round(succeeded / elapsed, 4) if elapsed else None,
+            "tasks_per_minute": round(succeeded * 60 / elapsed, 2) if elapsed else None,
+        },
+        "latency_seconds": {
+            "task": percentiles([v for values in latencies.values() for v in values]),
+            "by_mode": {mode: percentiles(values) for mode, values in sorted(latencies.items())},
+            "stages": {
+                stage: percentiles(values) for stage, values in sorted(recorder.stages.items())
+            },
+        },
+        "resources": {
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": round(self_usage.ru_maxrss / 1024, 1),
+            "peak_child_rss_mb": round(child_usage.ru_maxrss / 1024, 1),
+            "cpu_seconds": round(self_usage.ru_utime + self_usage.ru_stime, 2),
+            "child_cpu_seconds": round(child_usage.ru_utime + child_usage.ru_stime, 2),
+            "peak_workspace_disk_mb": round(peak["disk"] / 2**20, 1),
+            "final_workspace_disk_mb": round(dir_size(Path(settings.workspace_dir)) / 2**20, 1),
+        },
+        "events": {
+            name: recorder.events.get(name, 0)
+            for name in ("task_coalesced", "step_failed", "result_cache_hit", "pipeline_resumed")
+        },
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change of the headline numbers against a baseline result."""
+
+    def change(new: Optional[float], old: Optional[float]) -> Optional[float]:
+        if new is None or not old:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    def get(data: Dict[str, Any], *path: str) -> Optional[float]:
+        for key in path:
+            data = data.get(key) if isinstance(data, dict) else None
+        return data
+
+    metrics = {
+        "tasks_per_second": ("throughput", "tasks_per_second"),
+        "task_p50": ("latency_seconds", "task", "p50"),
+        "task_p95": ("latency_seconds", "task", "p95"),
+        "task_p99": ("latency_seconds", "task", "p99"),
+        "peak_rss_mb": ("resources", "peak_rss_mb"),
+        "peak_workspace_disk_mb": ("resources", "peak_workspace_disk_mb"),
+    }
+    return {
+        "baseline_version": baseline.get("version"),
+        "change_percent": {
+            name: change(get(result, *path), get(baseline, *path)) for name, path in metrics.items()
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the worker end to end")
+    parser.add_argument("--tasks", type=int, default=20, help="Number of synthetic tasks")
+    parser.add_argument("--refine-ratio", type=float, default=0.0, help="Share of refine tasks")
+    parser.add_argument("--repos", type=int, default=1, help="Distinct repositories")
+    parser.add_argument("--repo-files", type=int, default=200, help="Files per repository")
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="MAX_CONCURRENT_TASKS and LLM calls"
+    )
+    parser.add_argument(
+        "--github-latency", type=float, default=0.02, help="Seconds per GitHub request"
+    )
+    parser.add_argument("--llm-ttft", type=float, default=0.2, help="Seconds to first token")
+    parser.add_argument(
+        "--llm-token-latency", type=float, default=0.005, help="Seconds per streamed token"
+    )
+    parser.add_argument("--llm-tokens", type=int, default=200, help="Tokens per completion")
+    parser.add_argument(
+        "--llm-load-time", type=float, default=0.0, help="Seconds to load a model on first use"
+    )
+    parser.add_argument(
+        "--llm-backends", type=int, default=1, help="Fake LLM servers to route requests across"
+    )
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Disk sampling period")
+    parser.add_argument("--output", type=Path, help="Write the JSON result to this file")
+    parser.add_argument("--baseline", type=Path, help="Earlier result to compare against")
+    parser.add_argument("--log-file", type=Path, help="Write the worker's JSON logs here")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directory")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="ai-agent-bench-"))
+    remotes = workdir / "remotes"
+    remotes.mkdir()
+
+    git_config = workdir / "gitconfig"
+    write_git_config(git_config, remotes)
+    os.environ["GIT_CONFIG_GLOBAL"] = str(git_config)
+    os.environ["GIT_CONFIG_NOSYSTEM"] = "1"
+
+    refine_tasks = round(args.tasks * args.refine_ratio)
+    for r in range(args.repos):
+        branches = [f"bench/pr-{i + 1}" for i in range(refine_tasks) if i % args.repos == r]
+        create_remote(remotes, f"repo{r}", args.repo_files, branches)
+
+    github = FakeServer(FakeGitHubHandler, latency=args.github_latency)
+    llms = [
+        FakeServer(
+            FakeLLMHandler,
+            latency=args.llm_token_latency,
+            ttft=args.llm_ttft,
+            tokens=args.llm_tokens,
+            load_time=args.llm_load_time,
+        )
+        for _ in range(max(1, args.llm_backends))
+    ]
+
+    # Settings are read when the worker is imported. The endpoints are forced, the
+    # remaining settings can be overridden from the environment.
+    os.environ["WORKSPACE_DIR"] = str(workdir / "workspace")
+    os.environ["GITHUB_API_URL"] = github.url
+    os.environ["GITHUB_TOKEN"] = BENCH_TOKEN
+    os.environ["OLLAMA_BASE_URL"] = llms[0].url
+    os.environ["LLM_BACKENDS"] = ",".join(llm.url for llm in llms)
+    os.environ.setdefault("LLM_PROVIDER", "native")
+    os.environ.setdefault("LLM_NATIVE_FALLBACK_TO_AIDER", "false")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    os.environ.setdefault("TRACING_EXPORTER", "none")
+    if args.concurrency:
+        os.environ["MAX_CONCURRENT_TASKS"] = str(args.concurrency)
+        os.environ["MAX_CONCURRENT_REFINE_TASKS"] = str(args.concurrency)
+        os.environ["MAX_CONCURRENT_LLM_CALLS"] = str(args.concurrency)
+
+    sys.path.insert(0, str(ROOT / "src"))
+    try:
+        result = asyncio.run(run_benchmark(args, workdir))
+    finally:
+        github.shutdown()
+        for llm in llms:
+            llm.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    from worker.config import settings
+
+    try:
+        commit = git("rev-parse", "--short", "HEAD", cwd=ROOT).strip()
+        dirty = bool(git("status", "--porcelain", "--untracked-files=no", cwd=ROOT).strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    report = {
+        "version": {"commit": commit, "dirty": dirty},
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "parameters": {
+            key: (str(value) if isinstance(value, Path) else value)
+            for key, value in vars(args).items()
+        },
+        "settings": {
+            key: getattr(settings, key)
+            for key in (
+                "llm_provider",
+                "max_concurrent_tasks",
+                "max_concurrent_refine_tasks",
+                "max_concurrent_llm_calls",
+                "llm_backend_urls",
+                "llm_warmup_enabled",
+                "max_concurrent_git_network_ops",
+                "git_mirror_cache_enabled",
+                "git_sparse_checkout_enabled",
+                "repo_index_enabled",
+                "context_retrieval_enabled",
+                "llm_result_cache_enabled",
+                "checkpoints_enabled",
+                "task_coalescing_enabled",
+            )
+        },
+        "requests": {
+            "github": dict(github.requests),
+            "llm": [dict(llm.requests) for llm in llms],
+        },
+        **result,
+    }
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text()))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)
+    return 1 if result["tasks"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
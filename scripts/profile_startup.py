@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Profile the worker's startup: interpreter, imports per package and startup hooks.
+
+Every measurement runs in a fresh interpreter, several times, and the medians
+are reported:
+
+- ``interpreter``: wall time of ``python -c pass``,
+- ``imports``: wall time of ``python -c "import worker.main"``, and the time
+  ``python -X importtime`` attributes to each top-level package and to each
+  worker module (self time, so the rows add up to the total),
+- ``ready`` (with ``--ready``): the startup phases recorded by ``worker.startup``
+  when the startup hooks run, without a broker connection. LLM warm-up and the
+  metrics server are disabled unless set in the environment.
+
+Example:
+    python scripts/profile_startup.py --runs 10
+    python scripts/profile_startup.py --ready --json > startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+READY_SCRIPT = """
+import asyncio, json
+import worker.main as main
+
+async def run():
+    await main.on_startup()
+    main.startup.ready()
+    await main.after_shutdown()
+
+asyncio.run(run())
+print(json.dumps(main.startup.phases))
+"""
+
+
+def run_python(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    """Run the current interpreter with the worker sources on the path."""
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def timed(args: List[str], env: Dict[str, str]) -> float:
+    started = time.perf_counter()
+    run_python(args, env)
+    return time.perf_counter() - started
+
+
+def import_breakdown(module: str, env: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    """
+    Import a module under ``-X importtime``.
+
+    Returns:
+        Self time in seconds per top-level package and per worker module
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"], env).stderr
+    packages: Dict[str, float] = defaultdict(float)
+    worker: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, name = int(match.group(1)), match.group(4)
+        packages[name.split(".")[0]] += self_us / 1e6
+        if name.startswith("worker"):
+            worker[name] = self_us / 1e6
+    return {"packages": dict(packages), "worker": worker}
+
+
+def medians(samples: List[Dict[str, float]], top: int) -> Dict[str, float]:
+    """Median of each key across runs, largest first."""
+    keys = {key for sample in samples for key in sample}
+    result = {key: statistics.median(s.get(key, 0.0) for s in samples) for key in keys}
+    ordered = sorted(result.items(), key=lambda item: item[1], reverse=True)
+    return {key: round(value, 4) for key, value in ordered[:top]}
+
+
+def profile(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    env = {
+        "METRICS_ENABLED": "false",
+        "LLM_WARMUP_ENABLED": "false",
+        "WORKSPACE_DIR": str(workdir / "workspace"),
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(ROOT / "src"), os.environ.get("PYTHONPATH")])
+        ),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    # The first run fills the OS page cache; it is not measured
+    run_python(["-c", f"import {args.module}"], env)
+
+    interpreter = [timed(["-c", "pass"], env) for _ in range(args.runs)]
+    imports = [timed(["-c", f"import {args.module}"], env) for _ in range(args.runs)]
+    breakdowns = [import_breakdown(args.module, env) for _ in range(args.runs)]
+    package_totals = [sum(b["packages"].values()) for b in breakdowns]
+
+    result: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "module": args.module,
+        "interpreter_seconds": round(statistics.median(interpreter), 4),
+        "import_seconds": round(statistics.median(imports), 4),
+        "importtime_total_seconds": round(statistics.median(package_totals), 4),
+        "packages": medians([b["packages"] for b in breakdowns], args.top),
+        "worker_modules": medians([b["worker"] for b in breakdowns], args.top),
+    }
+
+    if args.ready:
+        phases = [
+            json.loads(run_python(["-c", READY_SCRIPT], env).stdout.splitlines()[-1])
+            for _ in range(args.runs)
+        ]
+        result["phases"] = {
+            phase: round(statistics.median(p[phase] for p in phases), 4) for phase in phases[0]
+        }
+    return result
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"Python {result['python']}, median of {result['runs']} runs\n")
+    print(f"  interpreter start       {result['interpreter_seconds'] * 1000:8.1f} ms")
+    print(f"  import {result['module']:<16} {result['import_seconds'] * 1000:8.1f} ms (wall)")
+    print(f"  -X importtime total     {result['importtime_total_seconds'] * 1000:8.1f} ms")
+    for title, key in (("Top-level packages", "packages"), ("Worker modules", "worker_modules")):
+        print(f"\n{title} (self time)")
+        for name, seconds in result[key].items():
+            print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+    if "phases" in result:
+        print("\nStartup phases (seconds since process start, no broker connection)")
+        for phase, seconds in result["phases"].items():
+            print(f"  {phase:<40} {seconds * 1000:8.1f} ms")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Profile the worker's startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreter runs per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Rows per breakdown")
+    parser.add_argument("--module", default="worker.main", help="Module to import")
+    parser.add_argument("--ready", action="store_true", help="Also run the startup hooks")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="worker-startup-") as workdir:
+        result = profile(args, Path(workdir))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Streaming capture and parsing of Aider output.
+
+Aider reports its progress as plain text: the streamed model reply, one
+``Tokens: ... sent, ... received. Cost: ...`` line per LLM call,
+``Applied edit to <file>`` for each edited file and ``Commit <sha> <message>``
+for each commit. ``AiderOutputParser`` turns those lines into structured log
+events and metrics, keeps a bounded tail of the output for error reports and
+remembers when the last line arrived so stalled runs can be killed.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+import structlog
+
+from worker.config import settings
+from worker.metrics import AIDER_STALLS, LLM_COST, LLM_TOKENS
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+_TOKENS_SENT_RE = re.compile(r"([\d.,]+)\s*([kKmM]?)\s+sent")
+_TOKENS_RECEIVED_RE = re.compile(r"([\d.,]+)\s*([kKmM]?)\s+received")
+_COST_RE = re.compile(r"Cost:\s*\$([\d.]+)\s+message")
+_EDIT_RE = re.compile(r"^Applied edit to (.+?)\s*$")
+_COMMIT_RE = re.compile(r"^Commit ([0-9a-f]{7,40}) (.*)$")
+
+_SUFFIXES = {"": 1, "k": 1_000, "m": 1_000_000}
+
+
+class AiderStalled(Exception):
+    """Raised when Aider produces no output for longer than the stall timeout."""
+
+
+def _parse_count(number: str, suffix: str) -> int:
+    """Convert Aider's abbreviated counts (``2.3k``) to integers."""
+    return int(float(number.replace(",", "")) * _SUFFIXES[suffix.lower()])
+
+
+class AiderOutputParser:
+    """Parse Aider output lines into progress events, token counts and edited files."""
+
+    def __init__(self, log: Optional[Any] = None, tail_lines: Optional[int] = None):
+        """
+        Initialize parser.
+
+        Args:
+            log: Bound logger for progress events. Uses the module logger if not provided.
+            tail_lines: Number of output lines kept for error reports. Uses settings
+                default if not provided.
+        """
+        self.log = log or logger
+        self.tail: Deque[str] = deque(maxlen=tail_lines or settings.aider_output_tail_lines)
+        self.last_output = time.monotonic()
+        self.lines = 0
+        self.tokens_sent = 0
+        self.tokens_received = 0
+        self.cost = 0.0
+        self.edited_files: List[str] = []
+        self.commits: List[str] = []
+
+    def touch(self) -> None:
+        """Record that the run produced output."""
+        self.last_output = time.monotonic()
+
+    def feed(self, line: str) -> None:
+        """
+        Process one line of Aider output.
+
+        Args:
+            line: Output line without its trailing newline
+        """
+        self.last_output = time.monotonic()
+        self.lines += 1
+        self.tail.append(line)
+        self.log.debug("aider_output", line=line)
+
+        if line.startswith("Tokens:"):
+            self._on_tokens(line)
+            return
+
+        match = _EDIT_RE.match(line)
+        if match:
+            path = match.group(1)
+            if path not in self.edited_files:
+                self.edited_files.append(path)
+            self.log.info("aider_file_edited", msg="Aider edited a file", path=path)
+            return
+
+        match = _COMMIT_RE.match(line)
+        if match:
+            self.commits.append(match.group(1))
+            self.log.info(
+                "aider_commit",
+                msg="Aider created a commit",
+                sha=match.group(1),
+                title=match.group(2),
+            )
+
+    def _on_tokens(self, line: str) -> None:
+        """Record a token usage report."""
+        sent = _TOKENS_SENT_RE.search(line)
+        received = _TOKENS_RECEIVED_RE.search(line)
+        cost = _COST_RE.search(line)
+
+        sent_count = _parse_count(*sent.groups()) if sent else 0
+        received_count = _parse_count(*received.groups()) if received else 0
+        message_cost = float(cost.group(1)) if cost else 0.0
+
+        self.tokens_sent += sent_count
+        self.tokens_received += received_count
+        self.cost += message_cost
+        LLM_TOKENS.labels("aider", "sent").inc(sent_count)
+        LLM_TOKENS.labels("aider", "received").inc(received_count)
+        LLM_COST.inc(message_cost)
+
+        self.log.info(
+            "aider_tokens",
+            msg="Aider LLM call finished",
+            tokens_sent=sent_count,
+            tokens_received=received_count,
+            cost=message_cost,
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the totals of the run."""
+        return {
+            "lines": self.lines,
+            "tokens_sent": self.tokens_sent,
+            "tokens_received": self.tokens_received,
+            "cost": round(self.cost, 6),
+            "edited_files": self.edited_files,
+            "commits": self.commits,
+        }
+
+
+async def iter_lines(
+    stream: asyncio.StreamReader, on_data: Callable[[], None]
+) -> AsyncIterator[str]:
+    """
+    Yield the lines of a stream, calling ``on_data`` whenever any bytes arrive.
+
+    Aider streams the model reply in partial lines, so activity is tracked per chunk
+    rather than per line.
+
+    Args:
+        stream: Process output stream
+        on_data: Called for every chunk read
+
+    Yields:
+        Lines without their trailing newline
+    """
+    pending = b""
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        on_data()
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode(errors="replace").rstrip()
+    if pending:
+        yield pending.decode(errors="replace").rstrip()
+
+
+async def consume_output(stream: asyncio.StreamReader, parser: AiderOutputParser) -> None:
+    """
+    Feed every line of a stream to the parser until EOF.
+
+    Args:
+        stream: Process output stream
+        parser: Parser receiving the lines
+    """
+    async for line in iter_lines(stream, parser.touch):
+        parser.feed(line)
+
+
+async def watch_for_stall(
+    awaitable: Awaitable[T],
+    parser: AiderOutputParser,
+    stall_timeout: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> T:
+    """
+    Await an Aider run, giving up if its output stalls or the run takes too long.
+
+    Args:
+        awaitable: The Aider run
+        parser: Parser fed with the run's output
+        stall_timeout: Seconds without output before the run is abandoned. Uses settings
+            default if not provided.
+        timeout: Overall timeout in seconds. Uses settings default if not provided.
+
+    Returns:
+        Result of the run
+
+    Raises:
+        AiderStalled: If no output arrived for ``stall_timeout`` seconds
+        asyncio.TimeoutError: If the run exceeded ``timeout``
+    """
+    stall_timeout = stall_timeout or settings.aider_stall_timeout
+    timeout = timeout or settings.aider_timeout
+    deadline = time.monotonic() + timeout
+    # Time spent waiting for the LLM slot or a pool session is not silence of the run
+    parser.touch()
+    task = asyncio.ensure_future(awaitable)
+
+    try:
+        while True:
+            now = time.monotonic()
+            idle = now - parser.last_output
+            if idle >= stall_timeout:
+                AIDER_STALLS.inc()
+                raise AiderStalled(
+                    f"Aider produced no output for {int(idle)}s; last output: "
+                    + " | ".join(list(parser.tail)[-5:])
+                )
+            if now >= deadline:
+                raise asyncio.TimeoutError(f"Aider did not finish within {timeout}s")
+
+            await asyncio.wait({task}, timeout=min(stall_timeout - idle, deadline - now))
+            if task.done():
+                return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,329 @@
+"""Pool of warm Aider session processes.
+
+Starting ``aider`` for every task costs seconds of imports before the first
+request reaches the model. The pool keeps up to ``aider_pool_size`` session
+processes (see ``worker.aider_session``) alive and hands one to each task,
+recycling a process after ``aider_pool_max_tasks_per_process`` tasks or as
+soon as it crashes.
+
+Only the imports are saved. Each request gets a new ``Coder`` on a fresh
+checkout, so Aider still builds its repo map and tags cache for every task:
+the tags cache lives in the checkout and is keyed by absolute file path and
+mtime, which differ between checkouts.
+"""
+
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+import structlog
+
+from worker.aider_output import AiderOutputParser, AiderStalled, iter_lines, watch_for_stall
+from worker.config import settings
+from worker.tracing import tracer
+
+logger = structlog.get_logger()
+
+
+class AiderSessionError(Exception):
+    """Raised when an Aider session fails to process a request."""
+
+
+class AiderSessionCrashed(AiderSessionError):
+    """Raised when an Aider session process exits unexpectedly."""
+
+
+class AiderSession:
+    """A single warm Aider process speaking the JSON-lines protocol."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        """
+        Wrap a started session process.
+
+        Args:
+            process: Process running ``python -m worker.aider_session``
+        """
+        self.process = process
+        self.tasks_done = 0
+        self.log = logger.bind(service="aider_pool", pid=process.pid)
+
+        # Aider's own output goes to the session's stderr; the parser is replaced per request
+        self.output = AiderOutputParser(self.log)
+        self._output_reader = asyncio.create_task(self._read_output())
+
+    async def _read_output(self) -> None:
+        """Feed the session's stderr to the parser of the current request."""
+        async for line in iter_lines(self.process.stderr, lambda: self.output.touch()):
+            self.output.feed(line)
+
+    @classmethod
+    async def start(cls, startup_timeout: float) -> "AiderSession":
+        """
+        Start a session process and wait until Aider is imported.
+
+        Args:
+            startup_timeout: Seconds to wait for the ready message
+
+        Returns:
+            Ready session
+
+        Raises:
+            AiderSessionCrashed: If the process exits or times out during startup
+        """
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-u",
+            "-m",
+            "worker.aider_session",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        session = cls(process)
+
+        try:
+            ready = await asyncio.wait_for(session._read_message(), timeout=startup_timeout)
+        except (asyncio.TimeoutError, AiderSessionCrashed) as e:
+            await session.stop()
+            raise AiderSessionCrashed(f"Aider session failed to start: {e}") from e
+
+        session.log.info("aider_session_ready", msg="Aider session started", **ready)
+        return session
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session process is still running."""
+        return self.process.returncode is None
+
+    async def _read_message(self) -> Dict[str, Any]:
+        """Read one protocol message, detecting a crashed process."""
+        line = await self.process.stdout.readline()
+        if not line:
+            returncode = await self.process.wait()
+            raise AiderSessionCrashed(f"Aider session exited with code {returncode}")
+        return json.loads(line)
+
+    async def run(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request and wait for its response.
+
+        Args:
+            request: Request payload (see ``worker.aider_session``)
+
+        Returns:
+            Response payload
+
+        Raises:
+            AiderSessionCrashed: If the process dies while handling the request
+        """
+        if not self.alive:
+            raise AiderSessionCrashed("Aider session is not running")
+
+        try:
+            self.process.stdin.write((json.dumps(request) + "\n").encode())
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise AiderSessionCrashed(f"Aider session pipe closed: {e}") from e
+
+        response = await self._read_message()
+        self.tasks_done += 1
+        return response
+
+    async def kill(self) -> None:
+        """Kill the session immediately."""
+        if self.alive:
+            self.process.kill()
+        await self.process.wait()
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Ask the session to exit by closing stdin, killing it if it does not."""
+        if not self.alive:
+            return
+
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+            await self.kill()
+
+
+class AiderPool:
+    """Bounded pool of warm Aider sessions with recycling and crash detection."""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_tasks_per_process: Optional[int] = None,
+        startup_timeout: float = 120,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            size: Maximum number of session processes. Uses settings default if not provided.
+            max_tasks_per_process: Tasks after which a session is recycled.
+            startup_timeout: Seconds to wait for a new session to become ready
+        """
+        self.size = size or settings.aider_pool_size
+        self.max_tasks_per_process = (
+            max_tasks_per_process or settings.aider_pool_max_tasks_per_process
+        )
+        self.startup_timeout = startup_timeout
+        self.log = logger.bind(service="aider_pool")
+
+        self._idle: asyncio.Queue[AiderSession] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.size)
+        self._background: Set[asyncio.Task] = set()
+        self._closed = False
+
+    async def start(self) -> None:
+        """Pre-start every session so the first tasks find a warm process."""
+        results = await asyncio.gather(
+            *(AiderSession.start(self.startup_timeout) for _ in range(self.size)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, AiderSession):
+                self._idle.put_nowait(result)
+            else:
+                self.log.error("aider_session_start_failed", error=str(result))
+
+        self.log.info("aider_pool_started", msg="Aider pool started", size=self._idle.qsize())
+
+    def _replenish(self) -> None:
+        """Start a replacement session in the background."""
+        if self._closed:
+            return
+
+        async def _spawn() -> None:
+            try:
+                session = await AiderSession.start(self.startup_timeout)
+            except AiderSessionCrashed as e:
+                self.log.error("aider_session_start_failed", error=str(e))
+                return
+
+            if self._closed or self._idle.qsize() >= self.size:
+                await session.stop()
+            else:
+                self._idle.put_nowait(session)
+
+        task = asyncio.create_task(_spawn())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _acquire(self) -> AiderSession:
+        """Take an idle live session, starting one if none is available."""
+        while not self._idle.empty():
+            session = self._idle.get_nowait()
+            if session.alive:
+                return session
+            self.log.warning("aider_session_dead", msg="Discarding crashed Aider session")
+
+        return await AiderSession.start(self.startup_timeout)
+
+    async def _release(self, session: AiderSession, healthy: bool) -> None:
+        """Return a session to the pool, or recycle it."""
+        if not healthy:
+            # Crashed, timed out or cancelled: the session state is unknown
+            await session.kill()
+            self._replenish()
+            return
+
+        if session.tasks_done < self.max_tasks_per_process and not self._closed:
+            if self._idle.qsize() < self.size:
+                self._idle.put_nowait(session)
+            else:
+                await session.stop()
+            return
+
+        session.log.info(
+            "aider_session_recycled",
+            msg="Recycling Aider session",
+            tasks_done=session.tasks_done,
+        )
+        await session.stop()
+        self._replenish()
+
+    async def run(
+        self,
+        repo_path: str,
+        message: str,
+        model: str,
+        api_base: str,
+        api_key: str,
+        timeout: Optional[float] = None,
+        parser: Optional[AiderOutputParser] = None,
+    ) -> List[str]:
+        """
+        Run an Aider request on a warm session.
+
+        Args:
+            repo_path: Repository Aider should edit
+            message: Prompt for Aider
+            model: Aider model name (e.g. ``openai/qwen2.5-coder:14b``)
+            api_base: OpenAI-compatible API base URL
+            api_key: API key for the endpoint
+            timeout: Seconds to wait for the request. Uses settings default if not provided.
+            parser: Parser receiving the session output for this request
+
+        Returns:
+            Files edited by Aider
+
+        Raises:
+            AiderSessionError: If Aider reports an error
+            AiderSessionCrashed: If the session process dies
+            AiderStalled: If the session produces no output for ``aider_stall_timeout``
+            asyncio.TimeoutError: If the request exceeds the timeout
+        """
+        request = {
+            "repo_path": repo_path,
+            "message": message,
+            "model": model,
+            "api_base": api_base,
+            "api_key": api_key,
+        }
+
+        async with self._slots:
+            session = await self._acquire()
+            healthy = False
+            session.output = parser or AiderOutputParser(session.log)
+            try:
+                with tracer.start_as_current_span("aider.session") as span:
+                    span.set_attribute("process.pid", session.process.pid)
+                    span.set_attribute("aider.session.tasks_done", session.tasks_done)
+                    response = await watch_for_stall(
+                        session.run(request), session.output, timeout=timeout
+                    )
+                healthy = True
+            except AiderSessionCrashed:
+                session.log.error("aider_session_crashed", msg="Aider session crashed")
+                raise
+            except AiderStalled as e:
+                session.log.error(
+                    "aider_session_stalled", msg="Aider session stalled", error=str(e)
+                )
+                raise
+            finally:
+                await self._release(session, healthy)
+
+        if not response.get("ok"):
+            self.log.error(
+                "aider_request_failed",
+                msg="Aider request failed",
+                error=response.get("error"),
+                traceback=response.get("traceback"),
+            )
+            raise AiderSessionError(response.get("error") or "Aider request failed")
+
+        return response.get("edited_files", [])
+
+    async def close(self) -> None:
+        """Stop every session in the pool."""
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+        while not self._idle.empty():
+            await self._idle.get_nowait().stop()
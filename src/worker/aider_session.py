@@ -0,0 +1,75 @@
+"""Long-lived Aider session process used by the Aider pool.
+
+Run as ``python -m worker.aider_session``. Aider and its dependencies are
+imported once at startup; afterwards the process serves one request per line
+on stdin and answers with one JSON line per request::
+
+    -> {"repo_path": "...", "message": "...", "model": "...", "api_base": "...", "api_key": "..."}
+    <- {"ok": true, "edited_files": ["src/app.py"]}
+
+Aider writes its own output to stdout, so the protocol uses a private copy of
+the original stdout and everything else printed is redirected to stderr.
+"""
+
+import json
+import os
+import sys
+import traceback
+from typing import Any, Dict, TextIO
+
+
+def _open_protocol_channel() -> TextIO:
+    """Keep the original stdout for protocol messages and send prints to stderr."""
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return channel
+
+
+def _run_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one Aider request against the repository it names, with a new Coder."""
+    from aider.coders import Coder
+    from aider.io import InputOutput
+    from aider.models import Model
+    from aider.repo import GitRepo
+
+    repo_path = request["repo_path"]
+    os.chdir(repo_path)
+    os.environ["OPENAI_API_KEY"] = request["api_key"]
+    os.environ["OPENAI_API_BASE"] = request["api_base"]
+
+    io = InputOutput(pretty=False, yes=True)
+    coder = Coder.create(
+        main_model=Model(request["model"]),
+        io=io,
+        repo=GitRepo(io, [], repo_path),
+        fnames=[],
+        auto_commits=True,
+        detect_urls=False,
+    )
+    coder.run(with_message=request["message"])
+
+    return {"ok": True, "edited_files": sorted(coder.aider_edited_files or [])}
+
+
+def main() -> None:
+    """Warm up Aider and serve requests until stdin is closed."""
+    channel = _open_protocol_channel()
+
+    # Pay the import cost once, before reporting ready
+    import aider.coders  # noqa: F401
+    import aider.models  # noqa: F401
+
+    channel.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = _run_request(json.loads(line))
+        except Exception as e:
+            response = {"ok": False, "error": str(e), "traceback": traceback.format_exc()}
+        channel.write(json.dumps(response) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Capacity signal of the worker, used by the autoscaler.
+
+Scaling on queue length alone starts one pod per batch of messages, whether or
+not the LLM servers can take more work. Each worker therefore reports:
+
+- its task slots per lane (the prefetch counts) and how many are in use,
+- its LLM slots, how many are held and how many tasks wait for one,
+- the capacity of the LLM backends it routes to (healthy backends times
+  ``llm_backend_parallel``) and how many requests it has in flight on them.
+
+The numbers are exported as Prometheus gauges, which KEDA aggregates across pods
+(see ``k8s/base/scaledobject.yaml``), and as JSON on ``/capacity`` of the
+metrics port for inspection.
+"""
+
+from typing import Any, Dict, Optional
+
+from worker.concurrency import limits
+from worker.config import settings
+from worker.llm_router import LLMRouter
+from worker.metrics import (
+    LLM_BACKEND_CAPACITY,
+    LLM_SLOTS_IN_USE,
+    LLM_WAITING_TASKS,
+    TASK_SLOTS,
+    TASK_SLOTS_IN_USE,
+)
+
+QUICKFIX_LANE = "quickfix"
+REFINE_LANE = "refine"
+
+
+class Capacity:
+    """Track the task slots in use and report the worker's capacity."""
+
+    def __init__(self, lanes: Optional[Dict[str, int]] = None):
+        """
+        Initialize capacity tracker.
+
+        Args:
+            lanes: Task slots per lane. Uses settings default if not provided.
+        """
+        self.slots = lanes or {
+            QUICKFIX_LANE: settings.max_concurrent_tasks,
+            REFINE_LANE: settings.max_concurrent_refine_tasks,
+        }
+        self.in_use = {lane: 0 for lane in self.slots}
+        self.router: Optional[LLMRouter] = None
+
+        for lane, slots in self.slots.items():
+            TASK_SLOTS.labels(lane).set(slots)
+        LLM_SLOTS_IN_USE.set_function(lambda: limits.llm.in_use)
+        LLM_WAITING_TASKS.set_function(lambda: limits.llm.waiting)
+        LLM_BACKEND_CAPACITY.set_function(self.backend_capacity)
+
+    def lane(self, queue_name: Optional[str]) -> str:
+        """Return the lane of the queue a message was consumed from."""
+        return REFINE_LANE if queue_name == settings.rabbitmq_refine_queue else QUICKFIX_LANE
+
+    def start_task(self, lane: str) -> None:
+        """Count a task slot of a lane as in use."""
+        self.in_use[lane] += 1
+        TASK_SLOTS_IN_USE.labels(lane).inc()
+
+    def finish_task(self, lane: str) -> None:
+        """Free a task slot of a lane."""
+        self.in_use[lane] -= 1
+        TASK_SLOTS_IN_USE.labels(lane).dec()
+
+    def backend_capacity(self) -> int:
+        """Return the LLM requests the healthy backends can serve at once."""
+        if self.router is None:
+            return settings.llm_backend_parallel
+        healthy = sum(1 for backend in self.router.backends if backend.available)
+        return healthy * settings.llm_backend_parallel
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current capacity of this worker.
+
+        ``llm.saturation`` is this worker's demand on the LLM backends (LLM slots held
+        plus tasks waiting for one) over their capacity. Above 1 the worker already has
+        more LLM work than the backends can serve at once. The slots are counted rather
+        than the router's requests in flight, which are not seen by this process when
+        tasks run in forked processes.
+        """
+        in_flight = sum(b.in_flight for b in self.router.backends) if self.router else 0
+        capacity = self.backend_capacity()
+        demand = limits.llm.in_use + limits.llm.waiting
+        return {
+            "lanes": {
+                lane: {
+                    "slots": slots,
+                    "in_use": self.in_use[lane],
+                    "free": max(slots - self.in_use[lane], 0),
+                }
+                for lane, slots in self.slots.items()
+            },
+            "llm": {
+                "slots": settings.max_concurrent_llm_calls,
+                "in_use": limits.llm.in_use,
+                "waiting": limits.llm.waiting,
+                "backend_capacity": capacity,
+                "backend_in_flight": in_flight,
+                "saturation": round(demand / capacity, 3) if capacity else None,
+            },
+        }
+
+
+# Global capacity instance
+capacity = Capacity()
@@ -0,0 +1,161 @@
+"""Persistent checkpoints of task pipelines, keyed by message ID.
+
+When a step fails after a long generation (a rejected push, a GitHub error,
+a worker shutdown) the message is redelivered and the task starts over. The
+checkpoint records the result of every completed stage that has a side effect
+worth keeping: the commits produced by the LLM, the pushed branch, the pull
+request number. The retry then resumes at the first unfinished stage instead
+of running the LLM again.
+
+Checkpoints are JSON files under ``WORKSPACE_DIR/checkpoints``, rewritten
+atomically after each stage. They are removed when the task succeeds and
+pruned after ``checkpoint_ttl`` seconds otherwise.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from worker.config import settings
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class Checkpoint:
+    """Results of the completed stages of one task."""
+
+    task_id: str
+    path: Path
+    stages: Dict[str, Any] = field(default_factory=dict)
+
+    async def record(self, stage: str, result: Any) -> None:
+        """
+        Persist the result of a completed stage.
+
+        Args:
+            stage: Pipeline step name
+            result: JSON-serializable step result
+        """
+        self.stages[stage] = result
+        payload = json.dumps(
+            {"task_id": self.task_id, "updated_at": time.time(), "stages": self.stages}
+        )
+        await asyncio.to_thread(self._write, payload)
+
+    def _write(self, payload: str) -> None:
+        tmp = self.path.with_suffix(f".tmp-{os.getpid()}")
+        tmp.write_text(payload)
+        os.replace(tmp, self.path)
+
+
+def checkpoint_key(message_ids: List[Optional[str]]) -> Optional[str]:
+    """
+    Return the checkpoint key of a task from the messages it handles.
+
+    A task is keyed by its AMQP message ID, which redeliveries keep, and a merged
+    task by all the IDs it merges. A task with a message lacking an ID gets no key
+    and runs without a checkpoint: keying it by content would let a later identical
+    request resume a stale attempt.
+
+    Args:
+        message_ids: Message IDs set by the producers, None where missing
+
+    Returns:
+        The key, or None if the task cannot be checkpointed
+    """
+    if not message_ids or None in message_ids:
+        return None
+    if len(message_ids) == 1:
+        return message_ids[0]
+    digest = hashlib.sha256("\0".join(sorted(message_ids)).encode()).hexdigest()
+    return f"merged-{digest}"
+
+
+class CheckpointStore:
+    """Load, save and expire task checkpoints on local disk."""
+
+    def __init__(self, checkpoint_dir: Path, ttl: Optional[int] = None):
+        """
+        Initialize checkpoint store.
+
+        Args:
+            checkpoint_dir: Directory holding the checkpoint files
+            ttl: Seconds an unfinished checkpoint is kept. Uses settings default if not
+                provided.
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl or settings.checkpoint_ttl
+        self.log = logger.bind(checkpoint_dir=str(self.checkpoint_dir))
+
+    def _path(self, task_id: str) -> Path:
+        """Return the checkpoint file of a task, with a filesystem-safe name."""
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", task_id)
+        if len(name) > 100:
+            name = f"{name[:80]}-{hashlib.sha1(task_id.encode()).hexdigest()[:12]}"
+        return self.checkpoint_dir / f"{name}.json"
+
+    async def load(self, task_id: str) -> Checkpoint:
+        """
+        Load the checkpoint of a task, or start an empty one.
+
+        Args:
+            task_id: Message ID of the task
+
+        Returns:
+            The task's checkpoint
+        """
+        checkpoint = Checkpoint(task_id=task_id, path=self._path(task_id))
+        try:
+            data = json.loads(await asyncio.to_thread(checkpoint.path.read_text))
+        except FileNotFoundError:
+            return checkpoint
+        except (OSError, ValueError) as e:
+            self.log.warning(
+                "checkpoint_unreadable",
+                msg="Ignoring unreadable checkpoint",
+                task_id=task_id,
+                error=str(e),
+            )
+            return checkpoint
+
+        checkpoint.stages = data.get("stages", {})
+        self.log.info(
+            "checkpoint_loaded",
+            msg="Resuming task from checkpoint",
+            task_id=task_id,
+            stages=list(checkpoint.stages),
+        )
+        return checkpoint
+
+    async def clear(self, checkpoint: Checkpoint) -> None:
+        """Remove the checkpoint of a finished task."""
+        await asyncio.to_thread(checkpoint.path.unlink, True)
+
+    async def prune(self) -> None:
+        """Remove checkpoints not updated for longer than the TTL."""
+
+        def _prune() -> int:
+            cutoff = time.time() - self.ttl
+            removed = 0
+            for path in self.checkpoint_dir.glob("*.json"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+            return removed
+
+        removed = await asyncio.to_thread(_prune)
+        if removed:
+            self.log.info("checkpoints_pruned", msg="Removed expired checkpoints", count=removed)
@@ -0,0 +1,213 @@
+"""Deduplication and coalescing of tasks for the same issue or pull request.
+
+Tasks are keyed on ``(repo, issue_id)`` for quickfix, ``(repo, pr_number)``
+for refine and the repository alone for batch quickfix. For each key:
+
+- An exact duplicate of a message queued or running for the key (a webhook
+  redelivery, a double click) is dropped. Once a run has finished, the same
+  request runs again.
+- Work is serialized, so two runs never push to the same branch at once.
+  Different keys still run in parallel.
+- Messages that arrive while a run for the key is in progress wait, and the
+  next run takes all of them at once. Refine requests are merged into a single
+  LLM run, batches into one batch over all their issues, and repeated quickfix
+  requests collapse into one run.
+
+A message merged into another run completes with that run's result. If the run
+fails, every merged message fails with the same error, so none of them is lost.
+"""
+
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import structlog
+
+from worker.models import TaskMessage, TaskMode
+
+logger = structlog.get_logger()
+
+TaskKey = Tuple[str, str, int]
+
+# Fields that do not change the work a message asks for
+_FINGERPRINT_EXCLUDE = {"trigger_user", "comment_url"}
+
+
+def task_key(message: TaskMessage) -> TaskKey:
+    """Return the coalescing key of a message."""
+    repo = str(message.repo_url).rstrip("/").removesuffix(".git").lower()
+    if message.mode == TaskMode.REFINE:
+        return (repo, "pr", message.pr_number or 0)
+    if message.mode == TaskMode.BATCH_QUICKFIX:
+        return (repo, "batch", 0)
+    return (repo, "issue", message.issue_id or 0)
+
+
+def fingerprint(message: TaskMessage) -> str:
+    """Return a hash identifying messages that ask for exactly the same work."""
+    payload = message.model_dump_json(exclude=_FINGERPRINT_EXCLUDE)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def merge_messages(messages: List[TaskMessage]) -> TaskMessage:
+    """
+    Merge the messages waiting for one key into a single task.
+
+    Refine requests are concatenated in arrival order. The first comment stays the
+    main comment and the others are listed in ``extra_comment_ids`` so every
+    requester gets the completion reaction. Batches are merged into one batch over
+    all their issues. For other modes the latest message wins.
+
+    Args:
+        messages: Messages in arrival order
+
+    Returns:
+        The merged task
+    """
+    latest = messages[-1]
+    if len(messages) > 1 and latest.mode == TaskMode.BATCH_QUICKFIX:
+        issue_ids = [issue_id for message in messages for issue_id in message.issue_ids]
+        return latest.model_copy(update={"issue_ids": list(dict.fromkeys(issue_ids))})
+    if len(messages) == 1 or latest.mode != TaskMode.REFINE:
+        return latest
+
+    requests: List[str] = []
+    comment_ids: List[int] = []
+    for message in messages:
+        if message.refine_request and message.refine_request not in requests:
+            requests.append(message.refine_request)
+        comment_ids.extend(
+            cid for cid in [message.comment_id, *message.extra_comment_ids] if cid is not None
+        )
+
+    unique_ids = list(dict.fromkeys(comment_ids))
+    return latest.model_copy(
+        update={
+            "refine_request": "\n\n".join(
+                f"{i}. {request}" for i, request in enumerate(requests, start=1)
+            )
+            if len(requests) > 1
+            else (requests[0] if requests else latest.refine_request),
+            "comment_id": unique_ids[0] if unique_ids else latest.comment_id,
+            "extra_comment_ids": unique_ids[1:],
+        }
+    )
+
+
+class Claim(NamedTuple):
+    """A task to run and the AMQP message IDs of the messages it handles."""
+
+    task: TaskMessage
+    message_ids: List[Optional[str]]
+
+
+@dataclass
+class _Entry:
+    """A message waiting for its key, and the outcome of the run that handles it."""
+
+    message: TaskMessage
+    fingerprint: str
+    message_id: Optional[str] = None
+    done: "asyncio.Future[None]" = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+    claimed: bool = False
+
+
+class TaskCoalescer:
+    """Drop duplicate tasks, merge queued tasks and serialize work per issue or PR."""
+
+    def __init__(self):
+        """Initialize coalescer."""
+        self.log = logger.bind(service="coalescer")
+        self._locks: Dict[TaskKey, asyncio.Lock] = {}
+        self._pending: Dict[TaskKey, List[_Entry]] = {}
+        # Fingerprints of the messages handled by the run in progress for each key
+        self._running: Dict[TaskKey, Set[str]] = {}
+
+    def _is_duplicate(self, key: TaskKey, fp: str) -> bool:
+        """Return True if an identical message is queued or running for the key."""
+        if fp in self._running.get(key, ()):
+            return True
+        return any(entry.fingerprint == fp for entry in self._pending.get(key, []))
+
+    @asynccontextmanager
+    async def claim(
+        self, message: TaskMessage, message_id: Optional[str] = None
+    ) -> AsyncIterator[Optional[Claim]]:
+        """
+        Claim the right to process a message.
+
+        Yields the task to run, which may merge several messages, while holding the
+        key's lock. Yields None when the message is a duplicate or was handled by
+        another run, in which case there is nothing left to do.
+
+        Args:
+            message: Incoming message
+            message_id: AMQP message ID set by the producer, if any
+
+        Raises:
+            Exception: The error of the run this message was merged into
+        """
+        fp = fingerprint(message)
+        key = task_key(message)
+
+        if self._is_duplicate(key, fp):
+            self.log.info("task_duplicate_dropped", msg="Dropping duplicate task", key=key)
+            yield None
+            return
+
+        entry = _Entry(message=message, fingerprint=fp, message_id=message_id)
+        pending = self._pending.setdefault(key, [])
+        pending.append(entry)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        try:
+            async with lock:
+                if entry.claimed:
+                    # Another run took this message while it waited; share its outcome
+                    await entry.done
+                    yield None
+                    return
+
+                batch = list(pending)
+                pending.clear()
+                for item in batch:
+                    item.claimed = True
+                self._running[key] = {item.fingerprint for item in batch}
+
+                if len(batch) > 1:
+                    self.log.info(
+                        "tasks_coalesced",
+                        msg="Merging queued tasks into one run",
+                        key=key,
+                        count=len(batch),
+                    )
+
+                try:
+                    yield Claim(
+                        merge_messages([item.message for item in batch]),
+                        [item.message_id for item in batch],
+                    )
+                except BaseException as e:
+                    for item in batch:
+                        if item is not entry and not item.done.done():
+                            if isinstance(e, Exception):
+                                item.done.set_exception(e)
+                            else:
+                                item.done.cancel()
+                    raise
+                else:
+                    for item in batch:
+                        if item is not entry and not item.done.done():
+                            item.done.set_result(None)
+                finally:
+                    self._running.pop(key, None)
+        finally:
+            if not entry.claimed and entry in pending:
+                pending.remove(entry)
+            if not lock.locked() and not self._pending.get(key):
+                self._locks.pop(key, None)
+                self._pending.pop(key, None)
@@ -0,0 +1,143 @@
+"""Per-resource concurrency limits shared by all tasks running in a worker.
+
+A worker consumes up to ``max_concurrent_tasks`` quickfix messages and
+``max_concurrent_refine_tasks`` refine messages at once. The semaphores below
+keep those tasks from overloading the shared backends: the LLM server, the git
+remote and the GitHub API.
+
+The LLM is the bottleneck, so its semaphore is granted by task priority rather
+than in arrival order: an interactive refine waits for the generation in progress
+but not for the quickfix backlog. Waiting tasks gain one priority level every
+``llm_priority_aging`` seconds, so low priority tasks are never starved.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from worker.config import settings
+from worker.models import TaskMessage, TaskMode
+
+# Priority of the task running in the current context, set by process_task
+current_priority: ContextVar[int] = ContextVar("current_priority", default=0)
+
+
+def task_priority(message: TaskMessage) -> int:
+    """Return the scheduling priority of a message, defaulting to its mode's priority."""
+    if message.priority is not None:
+        return message.priority
+    if message.mode == TaskMode.REFINE:
+        return settings.refine_priority
+    return settings.quickfix_priority
+
+
+@dataclass
+class _Waiter:
+    """A task waiting for a priority semaphore slot."""
+
+    priority: int
+    since: float = field(default_factory=time.monotonic)
+    future: "asyncio.Future[None]" = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class PrioritySemaphore:
+    """Semaphore that hands free slots to the highest priority waiter."""
+
+    def __init__(self, value: int, aging: Optional[float] = None):
+        """
+        Initialize semaphore.
+
+        Args:
+            value: Number of slots
+            aging: Seconds of waiting that add one priority level. Uses settings
+                default if not provided.
+        """
+        self._size = value
+        self._value = value
+        self._aging = aging or settings.llm_priority_aging
+        self._waiters: List[_Waiter] = []
+
+    def locked(self) -> bool:
+        """Return True if acquire() would wait."""
+        return self._value == 0 or bool(self._waiters)
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots currently held."""
+        return self._size - self._value
+
+    @property
+    def waiting(self) -> int:
+        """Number of tasks waiting for a slot."""
+        return len(self._waiters)
+
+    def _score(self, waiter: _Waiter, now: float) -> float:
+        return waiter.priority + (now - waiter.since) / self._aging
+
+    async def acquire(self) -> bool:
+        """Acquire a slot, waiting behind higher priority tasks."""
+        if not self.locked():
+            self._value -= 1
+            return True
+
+        waiter = _Waiter(priority=current_priority.get())
+        self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.future.cancelled():
+                # The slot was handed over just before the cancellation; pass it on
+                self.release()
+            raise
+        return True
+
+    def release(self) -> None:
+        """Release a slot, handing it directly to the highest priority waiter."""
+        if self._waiters:
+            now = time.monotonic()
+            # max() keeps the first of equal scores, so ties are served in arrival order
+            waiter = max(self._waiters, key=lambda w: self._score(w, now))
+            self._waiters.remove(waiter)
+            waiter.future.set_result(None)
+        else:
+            self._value += 1
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+class ResourceLimits:
+    """Semaphores bounding concurrent access to shared backends."""
+
+    def __init__(
+        self,
+        llm_calls: Optional[int] = None,
+        git_network_ops: Optional[int] = None,
+        github_calls: Optional[int] = None,
+    ):
+        """
+        Initialize resource limits.
+
+        Args:
+            llm_calls: Max concurrent LLM generations. Uses settings default if not provided.
+            git_network_ops: Max concurrent clone/fetch/push operations.
+            github_calls: Max concurrent GitHub API requests.
+        """
+        self.llm = PrioritySemaphore(llm_calls or settings.max_concurrent_llm_calls)
+        self.git_network = asyncio.Semaphore(
+            git_network_ops or settings.max_concurrent_git_network_ops
+        )
+        self.github_api = asyncio.Semaphore(github_calls or settings.max_concurrent_github_calls)
+
+
+# Global limits instance
+limits = ResourceLimits()
@@ -1,5 +1,7 @@
 """Configuration management for the AI Agent Worker."""
 
+from typing import Dict, List, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,24 +19,95 @@ class Settings(BaseSettings):
     rabbitmq_password: str = "password"
     rabbitmq_vhost: str = "/"
     rabbitmq_queue: str = "agent-tasks"
+    rabbitmq_refine_queue: str = "agent-tasks-refine"
+    rabbitmq_max_priority: int = 9  # x-max-priority of the refine queue
     rabbitmq_graceful_timeout: int = 300
 
     # Worker Configuration
     log_level: str = "INFO"
+    metrics_enabled: bool = True
+    metrics_port: int = 9090
+    metrics_disk_sample_interval: float = 300.0
+    startup_budget: float = 60.0  # Seconds from process start to consuming, slower starts warn
+    worker_process_mode: str = "inline"  # inline, or forkserver to run each task in a child
+
+    # Tracing Configuration
+    tracing_exporter: str = "none"  # none, file, console or otlp
+    tracing_file_path: str = "/tmp/traces.jsonl"
+    tracing_otlp_endpoint: Optional[str] = None  # Defaults to OTEL_EXPORTER_OTLP_* env vars
+    tracing_service_name: str = "ai-agent-worker"
+
+    # Concurrency Configuration
+    max_concurrent_tasks: int = 1  # RabbitMQ prefetch count of the quickfix queue
+    max_concurrent_refine_tasks: int = 1  # RabbitMQ prefetch count of the refine queue
+    max_concurrent_llm_calls: int = 1
+    max_concurrent_git_network_ops: int = 4
+    max_concurrent_github_calls: int = 8
+    task_coalescing_enabled: bool = True
+    checkpoints_enabled: bool = True
+    checkpoint_ttl: int = 86400  # Seconds an unfinished task's checkpoint is kept
+    quickfix_priority: int = 1
+    refine_priority: int = 8
+    llm_priority_aging: float = 60.0  # Seconds of waiting for the LLM that add one priority level
 
     # Git Configuration
     git_clone_depth: int = 1
     workspace_dir: str = "/tmp/workspace"
+    workspace_max_size_mb: int = 2048  # Budget for task checkouts, 0 disables it
+    workspace_stale_after: int = 7200  # Seconds before another process's checkout is evicted
+    workspace_tmpfs_dir: Optional[str] = None  # Memory-backed directory for checkouts
+    workspace_tmpfs_min_free_mb: int = 512
     git_client: str = "github"
+    git_command_timeout: int = 60
+    git_network_timeout: int = 300
+    git_mirror_cache_enabled: bool = True
+    git_mirror_cache_max_size_mb: int = 2048
+    git_sparse_checkout_enabled: bool = False  # Blobless clone narrowed to the task's paths
+    git_sparse_label_prefix: str = "path:"  # Labels such as path:services/payments
+    git_sparse_config_file: str = ".ai-agent-sparse"  # Per-repo list of cone directories
+    repo_index_enabled: bool = True
 
     # GitHub Configuration
     github_token: str = ""
+    github_api_url: str = "https://api.github.com"
+    github_repo_cache_ttl: int = 300
+    github_rate_limit_reserve: int = 100  # Slow down below this many remaining calls
+    github_max_retries: int = 3
 
     # LLM Configuration
     llm_provider: str = "ollama"
     llm_model: str = "qwen2.5-coder:14b"
     ollama_base_url: str = "http://localhost:11434"
+    llm_backends: str = ""  # Comma-separated base URLs; defaults to ollama_base_url
+    llm_backend_models: Dict[str, List[str]] = {}  # JSON: model -> backends serving it
+    llm_backend_cooldown: float = 30.0  # Seconds a failed backend is skipped
+    llm_backend_parallel: int = 1  # Requests each backend serves at once (OLLAMA_NUM_PARALLEL)
+    llm_health_check_interval: float = 15.0
+    llm_warmup_enabled: bool = True  # Load the models before consuming tasks
+    llm_warmup_timeout: float = 600.0
+    llm_keep_alive: str = "30m"  # Ollama keep_alive of the warmed models, "-1" for forever
+    llm_keep_alive_refresh_interval: float = 60.0  # 0 disables the refresh
+    llm_quickfix_model: Optional[str] = None  # Defaults to llm_model
+    llm_refine_model: Optional[str] = None  # Defaults to llm_model
     llm_api_key: str = "ollama"
+    llm_http_max_connections: int = 20
+    llm_http_max_keepalive_connections: int = 10
+    llm_http_keepalive_expiry: float = 60.0
+    llm_health_check_timeout: float = 5.0
+    llm_native_context_chars: int = 24000
+    llm_native_fallback_to_aider: bool = True
+    context_retrieval_enabled: bool = True
+    context_token_budget: int = 3000
+    context_top_k: int = 8
+    llm_result_cache_enabled: bool = True
+    llm_result_cache_max_size_mb: int = 256
+
+    # Aider Configuration
+    aider_pool_size: int = 0  # 0 spawns a fresh Aider process per task
+    aider_pool_max_tasks_per_process: int = 20
+    aider_timeout: int = 900
+    aider_stall_timeout: int = 300  # Kill Aider after this many seconds without output
+    aider_output_tail_lines: int = 200
 
     @property
     def rabbitmq_url(self) -> str:
@@ -44,6 +117,12 @@ class Settings(BaseSettings):
             f"@{self.rabbitmq_host}:{self.rabbitmq_port}/{self.rabbitmq_vhost}"
         )
 
+    @property
+    def llm_backend_urls(self) -> List[str]:
+        """Base URLs of the LLM backends."""
+        urls = [url.strip() for url in self.llm_backends.split(",") if url.strip()]
+        return urls or [self.ollama_base_url]
+
 
 # Global settings instance
 settings = Settings()
@@ -0,0 +1,213 @@
+"""Relevance-ranked repository context for LLM prompts.
+
+Files and code snippets are ranked against the task text with BM25, in two
+stages so large repositories stay cheap:
+
+1. Every indexed file is scored from its path and symbol names, which are
+   already in the repository index.
+2. The best candidate files are read and split into line windows, and the
+   windows are scored again. The top windows are packed into a token budget.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from worker.repo_index import MAX_PARSED_FILE_BYTES, RepoIndex
+
+# Rough conversion used to fit snippets into a token budget
+CHARS_PER_TOKEN = 4
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "does", "for",
+    "from", "has", "have", "how", "if", "in", "into", "is", "it", "its", "not", "of", "on",
+    "or", "should", "so", "that", "the", "their", "then", "there", "this", "to", "use",
+    "was", "we", "when", "which", "will", "with", "would", "you", "self", "return", "def",
+    "import", "none", "true", "false", "null", "const", "let", "var", "function",
+}  # fmt: skip
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Identifiers are also split on snake_case and camelCase boundaries, so
+    ``parseHttpRequest`` matches a query about "http request parsing".
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Terms, with stopwords and single characters removed
+    """
+    terms: List[str] = []
+    for word in _WORD_RE.findall(text):
+        parts = [p for chunk in word.split("_") for p in _CAMEL_RE.findall(chunk)]
+        candidates = [word] + parts if len(parts) > 1 else [word]
+        for term in candidates:
+            term = term.lower()
+            if len(term) > 1 and term not in STOPWORDS:
+                terms.append(term)
+    return terms
+
+
+class BM25:
+    """Okapi BM25 scorer over a small in-memory corpus."""
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the scorer.
+
+        Args:
+            documents: Tokenized documents
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(documents)) if documents else 0.0
+
+        doc_freq: Counter = Counter()
+        for freqs in self.term_freqs:
+            doc_freq.update(freqs.keys())
+        n = len(documents)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+    def scores(self, query: List[str]) -> List[float]:
+        """Score every document against the query terms."""
+        terms = set(query)
+        results: List[float] = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+@dataclass
+class Snippet:
+    """A ranked window of lines from a repository file."""
+
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+    score: float
+
+
+class ContextRetriever:
+    """Rank repository snippets against task text and pack them into a budget."""
+
+    def __init__(
+        self,
+        repo_path: Path,
+        index: RepoIndex,
+        candidate_files: int = 40,
+        window_lines: int = 40,
+    ):
+        """
+        Initialize retriever.
+
+        Args:
+            repo_path: Checkout to read file contents from
+            index: Repository index of the checkout
+            candidate_files: Files kept after the path/symbol ranking stage
+            window_lines: Lines per snippet
+        """
+        self.repo_path = Path(repo_path)
+        self.index = index
+        self.candidate_files = candidate_files
+        self.window_lines = window_lines
+
+    def _rank_files(self, query: List[str]) -> List[str]:
+        """Rank indexed files by their path and symbol names."""
+        paths = [p for p, entry in self.index.files.items() if entry.size <= MAX_PARSED_FILE_BYTES]
+        documents = [
+            tokenize(path.replace("/", " ")) + tokenize(" ".join(self.index.files[path].symbols))
+            for path in paths
+        ]
+        scores = BM25(documents).scores(query)
+        ranked = sorted(zip(scores, paths), reverse=True)
+        return [path for score, path in ranked[: self.candidate_files] if score > 0]
+
+    def _windows(self, path: str) -> List[Snippet]:
+        """Split a file into line windows."""
+        try:
+            lines = (self.repo_path / path).read_text().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+
+        return [
+            Snippet(
+                path=path,
+                start_line=start + 1,
+                end_line=min(start + self.window_lines, len(lines)),
+                text="\n".join(lines[start : start + self.window_lines]),
+                score=0.0,
+            )
+            for start in range(0, len(lines), self.window_lines)
+        ]
+
+    def candidates(self, text: str) -> List[str]:
+        """Return the files whose content ``retrieve`` would read for a task text."""
+        query = tokenize(text)
+        return self._rank_files(query) if query else []
+
+    def retrieve(self, text: str, token_budget: int, top_k: int) -> List[Snippet]:
+        """
+        Select the snippets most relevant to a task.
+
+        Args:
+            text: Task text (issue title and body, or refine request)
+            token_budget: Approximate token budget for all snippets
+            top_k: Maximum number of snippets
+
+        Returns:
+            Snippets ordered by relevance
+        """
+        query = tokenize(text)
+        if not query:
+            return []
+
+        snippets = [s for path in self._rank_files(query) for s in self._windows(path)]
+        if not snippets:
+            return []
+
+        # Path terms count for every window of a file, so small relevant files are not
+        # outranked by long files that merely repeat common words
+        documents = [tokenize(s.path.replace("/", " ")) + tokenize(s.text) for s in snippets]
+        for snippet, score in zip(snippets, BM25(documents).scores(query)):
+            snippet.score = score
+
+        selected: List[Snippet] = []
+        budget = token_budget * CHARS_PER_TOKEN
+        for snippet in sorted(snippets, key=lambda s: s.score, reverse=True):
+            if snippet.score <= 0 or len(selected) >= top_k:
+                break
+            if len(snippet.text) > budget:
+                continue
+            budget -= len(snippet.text)
+            selected.append(snippet)
+
+        return selected
+
+
+def render_snippets(snippets: List[Snippet]) -> str:
+    """Render snippets as markdown sections for a prompt."""
+    return "\n\n".join(
+        f"### {s.path} (lines {s.start_line}-{s.end_line})\n```\n{s.text}\n```" for s in snippets
+    )
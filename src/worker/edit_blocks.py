@@ -0,0 +1,209 @@
+"""Parse and apply SEARCH/REPLACE edit blocks produced by the LLM.
+
+The format is the one Aider uses for its ``diff`` edit format::
+
+    path/to/file.py
+    ```python
+    <<<<<<< SEARCH
+    original lines
+    =======
+    new lines
+    >>>>>>> REPLACE
+    ```
+
+An empty SEARCH section creates the file, or appends to it if it already exists.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SEARCH_MARKER = re.compile(r"^\s*<{5,9} SEARCH\s*$")
+DIVIDER_MARKER = re.compile(r"^\s*={5,9}\s*$")
+REPLACE_MARKER = re.compile(r"^\s*>{5,9} REPLACE\s*$")
+PATH_TOKEN = re.compile(r"[\w\-./]+")
+
+
+class EditBlockError(Exception):
+    """Raised when edit blocks are malformed or cannot be applied."""
+
+
+@dataclass
+class EditBlock:
+    """A single SEARCH/REPLACE edit on one file."""
+
+    path: str
+    search: str
+    replace: str
+
+
+def _filename_from(line: str) -> str:
+    """Extract a file path from the line preceding a SEARCH marker."""
+    name = line.strip().strip("*`'\" ")
+    # Models sometimes decorate the path: "File: `src/app.py`" or "**src/app.py**"
+    name = re.sub(r"^(file(name)?|path)\s*:\s*", "", name, flags=re.IGNORECASE)
+    return name.strip("*`'\" ")
+
+
+def _looks_like_path(name: str) -> bool:
+    """Return True for a single token with a directory or an extension, e.g. ``src/app.py``."""
+    if not PATH_TOKEN.fullmatch(name) or name.endswith("."):
+        return False
+    return "/" in name or "." in name.lstrip(".")
+
+
+def parse_edit_blocks(text: str) -> List[EditBlock]:
+    """
+    Parse all SEARCH/REPLACE blocks from an LLM response.
+
+    The path of a block is the line right before its opening fence (or SEARCH marker),
+    else the last line since the previous block that looks like a path, else the path
+    of the previous block. Prose between blocks is never taken for a path.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Edit blocks in the order they appear
+
+    Raises:
+        EditBlockError: If a block is incomplete or has no file path
+    """
+    lines = text.splitlines()
+    blocks: List[EditBlock] = []
+    current_path = ""
+    # Last path-looking line since the previous block
+    mentioned = ""
+    i = 0
+
+    while i < len(lines):
+        if not SEARCH_MARKER.match(lines[i]):
+            name = _filename_from(lines[i])
+            if not lines[i].strip().startswith("```") and _looks_like_path(name):
+                mentioned = name
+            i += 1
+            continue
+
+        before = i - 1
+        if before >= 0 and lines[before].strip().startswith("```"):
+            before -= 1
+        adjacent = lines[before].strip() if before >= 0 else ""
+        name = _filename_from(adjacent)
+        # Right before the block, a bare name without extension (Makefile) is accepted too
+        if not adjacent.startswith("```") and PATH_TOKEN.fullmatch(name):
+            current_path = name
+        elif mentioned:
+            current_path = mentioned
+        mentioned = ""
+
+        if not current_path:
+            raise EditBlockError(f"SEARCH block without a file path at line {i + 1}")
+
+        search: List[str] = []
+        replace: List[str] = []
+        i += 1
+        while i < len(lines) and not DIVIDER_MARKER.match(lines[i]):
+            search.append(lines[i])
+            i += 1
+        i += 1
+        while i < len(lines) and not REPLACE_MARKER.match(lines[i]):
+            replace.append(lines[i])
+            i += 1
+        if i >= len(lines):
+            raise EditBlockError(f"Unterminated edit block for {current_path}")
+        i += 1
+
+        blocks.append(
+            EditBlock(
+                path=current_path,
+                search="\n".join(search) + ("\n" if search else ""),
+                replace="\n".join(replace) + ("\n" if replace else ""),
+            )
+        )
+
+    return blocks
+
+
+def _resolve(repo_path: Path, relative: str) -> Path:
+    """Resolve a path from an edit block, refusing paths outside the repository."""
+    root = repo_path.resolve()
+    target = (root / relative).resolve()
+    if target != root and root not in target.parents:
+        raise EditBlockError(f"Edit targets a path outside the repository: {relative}")
+    if ".git" in target.relative_to(root).parts:
+        raise EditBlockError(f"Edit targets git metadata: {relative}")
+    return target
+
+
+def _replace_loose(content: str, search: str, replace: str) -> str:
+    """Replace ``search`` ignoring trailing whitespace differences on each line."""
+    content_lines = content.splitlines(keepends=True)
+    search_lines = [line.rstrip() for line in search.splitlines()]
+    n = len(search_lines)
+
+    for start in range(len(content_lines) - n + 1):
+        window = [line.rstrip() for line in content_lines[start : start + n]]
+        if window == search_lines:
+            return "".join(content_lines[:start]) + replace + "".join(content_lines[start + n :])
+
+    raise ValueError("search text not found")
+
+
+def apply_edit_blocks(repo_path: Path, blocks: List[EditBlock]) -> List[str]:
+    """
+    Apply edit blocks to files in a repository.
+
+    All blocks are validated before anything is written, so a failing block leaves
+    the working tree untouched.
+
+    Args:
+        repo_path: Repository root
+        blocks: Blocks returned by ``parse_edit_blocks``
+
+    Returns:
+        Relative paths of the edited files
+
+    Raises:
+        EditBlockError: If a SEARCH section does not match the file content
+    """
+    pending: Dict[Path, str] = {}
+    edited: List[str] = []
+
+    for block in blocks:
+        target = _resolve(repo_path, block.path)
+
+        if target in pending:
+            content: Optional[str] = pending[target]
+        elif target.exists():
+            content = target.read_text()
+        else:
+            content = None
+
+        if not block.search.strip():
+            existing = content or ""
+            if existing and not existing.endswith("\n"):
+                existing += "\n"
+            pending[target] = existing + block.replace
+        else:
+            if content is None:
+                raise EditBlockError(f"Cannot edit missing file: {block.path}")
+
+            if block.search in content:
+                pending[target] = content.replace(block.search, block.replace, 1)
+            else:
+                try:
+                    pending[target] = _replace_loose(content, block.search, block.replace)
+                except ValueError:
+                    raise EditBlockError(
+                        f"SEARCH section does not match the content of {block.path}"
+                    ) from None
+
+        if block.path not in edited:
+            edited.append(block.path)
+
+    for target, content in pending.items():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+    return edited
@@ -12,3 +12,6 @@ class GitClient:
             raise Exception("GitLab client is not supported yet")
         else:
             raise Exception(f"{settings.git_client} client is not supported")
+
+    async def close(self) -> None:
+        await self.client.close()
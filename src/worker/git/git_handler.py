@@ -1,58 +1,115 @@
 """Git operations handler for cloning and managing repositories."""
 
+import asyncio
 import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Union
+
 import structlog
 
+from worker.concurrency import limits
 from worker.config import settings
+from worker.git.command import run_git
+from worker.git.repo_cache import RepoCache
+from worker.git.sparse import choose_cone
+from worker.tracing import traced
+from worker.workspace import WorkspaceManager
 
 logger = structlog.get_logger()
 
+# Directories left out of file trees
+IGNORED_DIRS = {
+    ".git",
+    "__pycache__",
+    "node_modules",
+    ".venv",
+    "venv",
+    ".pytest_cache",
+}
+
 
 class GitHandler:
     """Handle Git operations for repository cloning and branching."""
 
-    def __init__(self, workspace_dir: Optional[str] = None):
+    def __init__(
+        self,
+        workspace_dir: Optional[str] = None,
+        repo_cache: Optional[RepoCache] = None,
+        workspace: Optional[WorkspaceManager] = None,
+    ):
         """
         Initialize Git handler.
 
         Args:
             workspace_dir: Directory for git operations. Uses settings default if not provided.
+            repo_cache: Mirror cache used to create checkouts. Built from settings if not
+                provided and the cache is enabled.
+            workspace: Manager of the per-task checkout directories. Built from settings
+                if not provided.
         """
         self.workspace_dir = Path(workspace_dir or settings.workspace_dir)
         self.workspace_dir.mkdir(parents=True, exist_ok=True)
         self.log = logger.bind(workspace=str(self.workspace_dir))
 
-    def shallow_clone(
+        if repo_cache is None and settings.git_mirror_cache_enabled:
+            repo_cache = RepoCache(self.workspace_dir / ".mirrors")
+        self.repo_cache = repo_cache
+        self.workspace = workspace or WorkspaceManager(self.workspace_dir)
+
+    async def allocate(self, name: str) -> Path:
+        """
+        Reserve a unique, empty checkout directory for a task.
+
+        Args:
+            name: Readable prefix of the directory name
+
+        Returns:
+            Path of the directory, to pass to ``shallow_clone`` and ``cleanup``
+        """
+        return await self.workspace.allocate(name)
+
+    @traced("git.shallow_clone")
+    async def shallow_clone(
         self,
         repo_url: str,
-        target_dir: str,
+        target_dir: Union[str, Path],
         branch: str = "main",
         token: Optional[str] = None,
+        sparse: bool = False,
     ) -> Path:
         """
         Perform shallow clone of a repository.
 
+        When the mirror cache is enabled the checkout is created from the local bare
+        mirror of the repository, which is refreshed with an incremental fetch first.
+
+        In sparse mode only the top-level files are checked out until
+        ``narrow_checkout`` picks the task's directories. Without the mirror cache the
+        clone is also blobless (``--filter=blob:none``), so file contents outside the
+        checked out directories are never downloaded unless needed.
+
         Args:
             repo_url: Git repository URL
-            target_dir: Target directory name (relative to workspace)
+            target_dir: Target directory, from ``allocate`` (or relative to the workspace)
             branch: Branch to clone (default: main)
             token: GitHub token for authentication
+            sparse: Clone in sparse mode
 
         Returns:
             Path to cloned repository
 
         Raises:
             subprocess.CalledProcessError: If git clone fails
+            subprocess.TimeoutExpired: If git clone exceeds the network timeout
         """
         repo_path = self.workspace_dir / target_dir
 
         # Clean up if exists
-        if repo_path.exists():
+        if repo_path.exists() and any(repo_path.iterdir()):
             self.log.warning("repo_exists", msg="Removing existing repo", path=str(repo_path))
-            shutil.rmtree(repo_path)
+            await asyncio.to_thread(shutil.rmtree, repo_path)
 
         # Build clone URL with token if provided
         clone_url = repo_url
@@ -60,34 +117,74 @@ class GitHandler:
             # Insert token into URL: https://TOKEN@github.com/user/repo.git
             clone_url = repo_url.replace("https://", f"https://{token}@")
 
+        if self.repo_cache is not None:
+            async with limits.git_network:
+                await self._clone_from_mirror(repo_url, clone_url, repo_path, branch, sparse)
+            await self.workspace.measure(repo_path)
+            return repo_path
+
         self.log.info(
             "cloning_repo",
             msg="Starting shallow clone",
             url=repo_url,
             branch=branch,
             depth=settings.git_clone_depth,
+            sparse=sparse,
         )
 
         try:
             # Perform shallow clone
-            subprocess.run(
-                [
-                    "git",
-                    "clone",
-                    "--depth",
-                    str(settings.git_clone_depth),
-                    "--branch",
-                    branch,
-                    "--single-branch",
-                    clone_url,
-                    str(repo_path),
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minute timeout
+            async with limits.git_network:
+                await run_git(
+                    [
+                        "clone",
+                        "--depth",
+                        str(settings.git_clone_depth),
+                        "--branch",
+                        branch,
+                        "--single-branch",
+                        *(["--filter=blob:none", "--sparse"] if sparse else []),
+                        clone_url,
+                        str(repo_path),
+                    ],
+                    timeout=settings.git_network_timeout,
+                    log=self.log,
+                )
+
+            self.log.info("clone_success", msg="Repository cloned", path=str(repo_path))
+            # Counted against the workspace budget from now on, without rescanning it
+            await self.workspace.measure(repo_path)
+            return repo_path
+
+        except subprocess.CalledProcessError as e:
+            self.log.error(
+                "clone_failed",
+                msg="Git clone failed",
+                error=e.stderr,
+                returncode=e.returncode,
+            )
+            raise
+        except subprocess.TimeoutExpired:
+            self.log.error(
+                "clone_timeout", msg="Git clone timed out", timeout=settings.git_network_timeout
             )
+            raise
+
+    async def _clone_from_mirror(
+        self, repo_url: str, clone_url: str, repo_path: Path, branch: str, sparse: bool = False
+    ) -> Path:
+        """Create a task checkout from the repository mirror cache."""
+        self.log.info("cloning_repo", msg="Cloning from mirror cache", url=repo_url, branch=branch)
 
+        try:
+            await self.repo_cache.checkout(
+                repo_url=repo_url,
+                clone_url=clone_url,
+                repo_path=repo_path,
+                branch=branch,
+                timeout=settings.git_network_timeout,
+                sparse=sparse,
+            )
             self.log.info("clone_success", msg="Repository cloned", path=str(repo_path))
             return repo_path
 
@@ -100,10 +197,49 @@ class GitHandler:
             )
             raise
         except subprocess.TimeoutExpired:
-            self.log.error("clone_timeout", msg="Git clone timed out after 5 minutes")
+            self.log.error(
+                "clone_timeout", msg="Git fetch timed out", timeout=settings.git_network_timeout
+            )
+            raise
+
+    @traced("git.sparse_checkout")
+    async def narrow_checkout(
+        self, repo_path: Path, texts: Iterable[str], labels: Iterable[str] = ()
+    ) -> List[str]:
+        """
+        Check out only the directories a task points at in a sparse clone.
+
+        Args:
+            repo_path: Checkout created by ``shallow_clone`` with ``sparse=True``
+            texts: Task texts mentioning paths (issue title and body, refine request)
+            labels: Issue or pull request labels
+
+        Returns:
+            Directories of the cone, or an empty list if the full tree was checked out
+
+        Raises:
+            subprocess.CalledProcessError: If git sparse-checkout fails
+        """
+        cone = await choose_cone(repo_path, texts, labels, log=self.log)
+        if cone:
+            args = ["sparse-checkout", "set", "--cone", "--", *cone]
+        else:
+            args = ["sparse-checkout", "disable"]
+
+        try:
+            # Checking out files of a blobless clone downloads their contents
+            async with limits.git_network:
+                await run_git(
+                    args, cwd=repo_path, timeout=settings.git_network_timeout, log=self.log
+                )
+        except subprocess.CalledProcessError as e:
+            self.log.error("sparse_checkout_failed", msg="Sparse checkout failed", error=e.stderr)
             raise
+        await self.workspace.measure(repo_path)
+        return cone
 
-    def create_branch(self, repo_path: Path, branch_name: str) -> None:
+    @traced("git.create_branch")
+    async def create_branch(self, repo_path: Path, branch_name: str) -> None:
         """
         Create and checkout a new branch.
 
@@ -117,19 +253,57 @@ class GitHandler:
         self.log.info("creating_branch", msg="Creating new branch", branch=branch_name)
 
         try:
-            subprocess.run(
-                ["git", "checkout", "-b", branch_name],
+            await run_git(
+                ["checkout", "-b", branch_name],
                 cwd=repo_path,
-                check=True,
-                capture_output=True,
-                text=True,
+                timeout=settings.git_command_timeout,
+                log=self.log,
             )
             self.log.info("branch_created", msg="Branch created", branch=branch_name)
         except subprocess.CalledProcessError as e:
             self.log.error("branch_failed", msg="Failed to create branch", error=e.stderr)
             raise
 
-    def commit_changes(self, repo_path: Path, message: str, allow_empty: bool = False) -> None:
+    @traced("git.reset_branch")
+    async def reset_branch(self, repo_path: Path, branch_name: str, start_point: str) -> None:
+        """
+        Check out a branch at a given commit, discarding any uncommitted changes.
+
+        The branch is created if missing and reset to ``start_point`` otherwise, so
+        several branches can be worked on one after another in the same checkout.
+
+        Args:
+            repo_path: Path to git repository
+            branch_name: Branch to check out
+            start_point: Commit the branch starts from
+
+        Raises:
+            subprocess.CalledProcessError: If git checkout fails
+        """
+        self.log.info(
+            "resetting_branch",
+            msg="Checking out clean branch",
+            branch=branch_name,
+            start=start_point,
+        )
+        timeout = settings.git_command_timeout
+        try:
+            await run_git(
+                ["checkout", "--force", "-B", branch_name, start_point],
+                cwd=repo_path,
+                timeout=timeout,
+                log=self.log,
+            )
+            # Files left behind by a failed generation on the previous branch
+            await run_git(["clean", "-fdq"], cwd=repo_path, timeout=timeout, log=self.log)
+        except subprocess.CalledProcessError as e:
+            self.log.error("branch_failed", msg="Failed to reset branch", error=e.stderr)
+            raise
+
+    @traced("git.commit_changes")
+    async def commit_changes(
+        self, repo_path: Path, message: str, allow_empty: bool = False
+    ) -> None:
         """
         Stage all changes and commit.
 
@@ -144,36 +318,105 @@ class GitHandler:
         self.log.info("committing", msg="Committing changes", allow_empty=allow_empty)
 
         try:
+            timeout = settings.git_command_timeout
+
             # Configure git user (required for commits)
-            subprocess.run(
-                ["git", "config", "user.name", "AI Coding Agent"],
+            await run_git(
+                ["config", "user.name", "AI Coding Agent"],
                 cwd=repo_path,
-                check=True,
-                capture_output=True,
+                timeout=timeout,
+                log=self.log,
             )
-            subprocess.run(
-                ["git", "config", "user.email", "ai-agent@example.com"],
+            await run_git(
+                ["config", "user.email", "ai-agent@example.com"],
                 cwd=repo_path,
-                check=True,
-                capture_output=True,
+                timeout=timeout,
+                log=self.log,
             )
 
             # Stage all changes
-            subprocess.run(["git", "add", "-A"], cwd=repo_path, check=True, capture_output=True)
+            await run_git(["add", "-A"], cwd=repo_path, timeout=timeout, log=self.log)
 
             # Commit
-            commit_cmd = ["git", "commit", "-m", message]
+            commit_cmd = ["commit", "-m", message]
             if allow_empty:
                 commit_cmd.append("--allow-empty")
 
-            subprocess.run(commit_cmd, cwd=repo_path, check=True, capture_output=True, text=True)
+            await run_git(commit_cmd, cwd=repo_path, timeout=timeout, log=self.log)
 
             self.log.info("commit_success", msg="Changes committed")
         except subprocess.CalledProcessError as e:
             self.log.error("commit_failed", msg="Git commit failed", error=e.stderr)
             raise
 
-    def push_branch(self, repo_path: Path, branch_name: str, remote: str = "origin") -> None:
+    @traced("git.head_commit")
+    async def head_commit(self, repo_path: Path) -> str:
+        """Return the SHA of the commit checked out in a repository."""
+        output = await run_git(
+            ["rev-parse", "HEAD"], cwd=repo_path, timeout=settings.git_command_timeout
+        )
+        return output.strip()
+
+    @traced("git.export_commits")
+    async def export_commits(self, repo_path: Path, base: str) -> str:
+        """
+        Export the commits made on top of a base commit as a mailbox of patches.
+
+        Args:
+            repo_path: Path to git repository
+            base: Commit the exported commits are based on
+
+        Returns:
+            Patches in ``git format-patch`` format (empty if there are no new commits)
+        """
+        return await run_git(
+            ["format-patch", "--stdout", "--binary", f"{base}..HEAD"],
+            cwd=repo_path,
+            timeout=settings.git_command_timeout,
+            log=self.log,
+        )
+
+    @traced("git.import_commits")
+    async def import_commits(self, repo_path: Path, patches: str) -> None:
+        """
+        Recreate commits exported by ``export_commits`` on the current branch.
+
+        Args:
+            repo_path: Path to git repository
+            patches: Output of ``export_commits``
+
+        Raises:
+            subprocess.CalledProcessError: If the patches do not apply
+        """
+        if not patches:
+            return
+
+        self.log.info("importing_commits", msg="Re-applying commits from checkpoint")
+        timeout = settings.git_command_timeout
+        await run_git(["config", "user.name", "AI Coding Agent"], cwd=repo_path, timeout=timeout)
+        await run_git(
+            ["config", "user.email", "ai-agent@example.com"], cwd=repo_path, timeout=timeout
+        )
+
+        with tempfile.NamedTemporaryFile("w", suffix=".mbox") as mbox:
+            mbox.write(patches)
+            mbox.flush()
+            try:
+                await run_git(
+                    ["am", "--3way", "--keep-cr", mbox.name],
+                    cwd=repo_path,
+                    timeout=timeout,
+                    log=self.log,
+                )
+            except subprocess.CalledProcessError as e:
+                self.log.error(
+                    "import_failed", msg="Checkpointed commits do not apply", error=e.stderr
+                )
+                await run_git(["am", "--abort"], cwd=repo_path, timeout=timeout, log=self.log)
+                raise
+
+    @traced("git.push_branch")
+    async def push_branch(self, repo_path: Path, branch_name: str, remote: str = "origin") -> None:
         """
         Push branch to remote.
 
@@ -184,38 +427,115 @@ class GitHandler:
 
         Raises:
             subprocess.CalledProcessError: If git push fails
+            subprocess.TimeoutExpired: If git push exceeds the network timeout
         """
         self.log.info("pushing_branch", msg="Pushing to remote", branch=branch_name)
 
         try:
-            subprocess.run(
-                ["git", "push", "-u", remote, branch_name],
-                cwd=repo_path,
-                check=True,
-                capture_output=True,
-                text=True,
-            )
+            async with limits.git_network:
+                await run_git(
+                    ["push", "-u", remote, branch_name],
+                    cwd=repo_path,
+                    timeout=settings.git_network_timeout,
+                    log=self.log,
+                )
             self.log.info("push_success", msg="Branch pushed")
         except subprocess.CalledProcessError as e:
             self.log.error("push_failed", msg="Git push failed", error=e.stderr)
             raise
+        except subprocess.TimeoutExpired:
+            self.log.error(
+                "push_timeout", msg="Git push timed out", timeout=settings.git_network_timeout
+            )
+            raise
+
+    @traced("git.push_branches")
+    async def push_branches(
+        self, repo_path: Path, branch_names: List[str], remote: str = "origin"
+    ) -> Dict[str, Optional[str]]:
+        """
+        Push several branches to remote with a single ``git push``.
+
+        A rejected branch does not stop the others from being pushed.
+
+        Args:
+            repo_path: Path to git repository
+            branch_names: Branches to push
+            remote: Remote name (default: origin)
+
+        Returns:
+            Error reported for each branch, or None for branches that were pushed
+
+        Raises:
+            subprocess.CalledProcessError: If the push fails as a whole (e.g. remote unreachable)
+            subprocess.TimeoutExpired: If git push exceeds the network timeout
+        """
+        self.log.info("pushing_branches", msg="Pushing to remote", branches=branch_names)
+
+        try:
+            async with limits.git_network:
+                output = await run_git(
+                    ["push", "--porcelain", "-u", remote, *branch_names],
+                    cwd=repo_path,
+                    timeout=settings.git_network_timeout,
+                    log=self.log,
+                )
+        except subprocess.CalledProcessError as e:
+            # Some refs were rejected; the porcelain output still lists every ref
+            output = e.output or ""
+            if "\t" not in output:
+                self.log.error("push_failed", msg="Git push failed", error=e.stderr)
+                raise
+        except subprocess.TimeoutExpired:
+            self.log.error(
+                "push_timeout", msg="Git push timed out", timeout=settings.git_network_timeout
+            )
+            raise
+
+        # Porcelain lines look like "<flag>\t<src>:<dst>\t<summary>"; "!" means rejected
+        statuses: Dict[str, Optional[str]] = {}
+        for line in output.splitlines():
+            parts = line.split("\t")
+            if len(parts) < 3 or ":" not in parts[1]:
+                continue
+            branch = parts[1].split(":", 1)[1].removeprefix("refs/heads/")
+            statuses[branch] = parts[2] if parts[0] == "!" else None
+
+        results = {
+            branch: statuses.get(branch, "not reported by git push") for branch in branch_names
+        }
+        failed = {branch: error for branch, error in results.items() if error}
+        if failed:
+            self.log.warning("push_partial", msg="Some branches were not pushed", failed=failed)
+        else:
+            self.log.info("push_success", msg="Branches pushed", count=len(branch_names))
+        return results
 
-    def cleanup(self, target_dir: str) -> None:
+    @traced("git.cleanup")
+    async def cleanup(self, target_dir: Union[str, Path]) -> None:
         """
         Remove cloned repository directory.
 
+        The directory is moved to the workspace trash and deleted in the background.
+
         Args:
-            target_dir: Directory name to remove (relative to workspace)
+            target_dir: Directory to remove, from ``allocate`` (or relative to workspace)
         """
         repo_path = self.workspace_dir / target_dir
 
+        if self.repo_cache is not None:
+            self.repo_cache.release(repo_path)
+
         if repo_path.exists():
             self.log.info("cleaning_up", msg="Removing repository", path=str(repo_path))
-            shutil.rmtree(repo_path)
-            self.log.info("cleanup_done", msg="Repository removed")
+            await self.workspace.release(repo_path)
         else:
             self.log.warning("cleanup_skip", msg="Repository not found", path=str(repo_path))
 
+    async def close(self) -> None:
+        """Wait for the background removal of task directories."""
+        await self.workspace.close()
+
     def get_file_tree(self, repo_path: Path, max_depth: int = 3) -> str:
         """
         Generate a tree representation of repository files.
@@ -237,15 +557,7 @@ class GitHandler:
                 entries = sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name))
 
                 # Filter out common ignored directories
-                ignored = {
-                    ".git",
-                    "__pycache__",
-                    "node_modules",
-                    ".venv",
-                    "venv",
-                    ".pytest_cache",
-                }
-                entries = [e for e in entries if e.name not in ignored]
+                entries = [e for e in entries if e.name not in IGNORED_DIRS]
 
                 for i, entry in enumerate(entries):
                     is_last = i == len(entries) - 1
@@ -264,7 +576,8 @@ class GitHandler:
 
         return "\n".join(tree_lines)
 
-    def change_branch(self, repo_path: Path, branch_name: str) -> None:
+    @traced("git.change_branch")
+    async def change_branch(self, repo_path: Path, branch_name: str) -> None:
         """
         Change to a specific branch
 
@@ -278,12 +591,11 @@ class GitHandler:
         self.log.info("moving_branch", msg="Move to branch", branch=branch_name)
 
         try:
-            subprocess.run(
-                ["git", "checkout", branch_name],
+            await run_git(
+                ["checkout", branch_name],
                 cwd=repo_path,
-                check=True,
-                capture_output=True,
-                text=True,
+                timeout=settings.git_command_timeout,
+                log=self.log,
             )
             self.log.info("moving_branch", msg="Move to branch", branch=branch_name)
         except subprocess.CalledProcessError as e:
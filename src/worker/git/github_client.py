@@ -1,40 +1,228 @@
 """GitHub API client for issue and PR management."""
 
-from typing import Optional, Dict, Any, List
-from github import Github, GithubException
-from github.Repository import Repository
-from github.Issue import Issue
-from github.PullRequest import PullRequest
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+import httpx
 import structlog
 
+from worker.concurrency import limits
 from worker.config import settings
+from worker.tracing import set_span_attributes, traced
 
 logger = structlog.get_logger()
 
+# Cached GET responses revalidated with If-None-Match (304s are free against the rate limit)
+ETAG_CACHE_SIZE = 512
+
+# GitHub asks integrations to leave at least a second between content-creating requests
+MUTATION_INTERVAL = 1.0
+
+# Wait used for secondary rate limits that come without a Retry-After header
+SECONDARY_LIMIT_BACKOFF = 60.0
+
+
+class GitHubAPIError(Exception):
+    """Raised when the GitHub API returns an error response."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"GitHub API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
 
 class GitHubClient:
-    """Client for interacting with GitHub API."""
+    """Async client for the GitHub REST API.
 
-    def __init__(self, token: Optional[str] = None):
+    A single pooled HTTP client is shared by every task. GET responses are cached
+    with their ETag and revalidated with conditional requests, repositories are
+    cached for ``github_repo_cache_ttl`` seconds, and requests slow down as
+    ``X-RateLimit-Remaining`` approaches ``github_rate_limit_reserve``.
+    """
+
+    def __init__(self, token: Optional[str] = None, api_url: Optional[str] = None):
         """
         Initialize GitHub client.
 
         Args:
             token: GitHub personal access token. Uses settings if not provided.
+            api_url: REST API base URL. Uses settings if not provided.
         """
         self.token = token or settings.github_token
-        self.client = Github(self.token)
+        self.api_url = (api_url or settings.github_api_url).rstrip("/")
+        self.http = httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "User-Agent": "ai-coding-agent-worker",
+            },
+            timeout=httpx.Timeout(30, connect=10),
+            limits=httpx.Limits(
+                max_connections=settings.max_concurrent_github_calls,
+                max_keepalive_connections=settings.max_concurrent_github_calls,
+            ),
+        )
         self.log = logger.bind(service="github")
 
-    def get_repository(self, repo_url: str) -> Repository:
+        self._etags: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._repos: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._pause_until = 0.0
+        self._mutation_lock = asyncio.Lock()
+        self._last_mutation = 0.0
+
+    async def _throttle(self) -> None:
+        """Wait out any backoff set by previous rate limit responses."""
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            self.log.info(
+                "github_rate_limit_wait",
+                msg="Waiting for GitHub rate limit",
+                seconds=round(delay, 1),
+            )
+            await asyncio.sleep(delay)
+
+    def _pause(self, seconds: float) -> None:
+        """Delay every following request by at least ``seconds``."""
+        self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def _track_rate_limit(self, response: httpx.Response) -> None:
+        """Spread the remaining quota over the time left until the limit resets."""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+
+        remaining_calls = int(remaining)
+        until_reset = max(0.0, float(reset) - time.time())
+        if remaining_calls >= settings.github_rate_limit_reserve:
+            return
+
+        delay = until_reset if remaining_calls == 0 else until_reset / remaining_calls
+        self.log.warning(
+            "github_rate_limit_low",
+            msg="GitHub rate limit running low, slowing down",
+            remaining=remaining_calls,
+            reset_in_seconds=round(until_reset),
+            delay_seconds=round(delay, 2),
+        )
+        self._pause(delay)
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying a rate limited response, if at all."""
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            return float(retry_after)
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(response.headers.get("X-RateLimit-Reset", time.time()))
+            return max(1.0, reset - time.time())
+
+        if "secondary rate limit" in response.text.lower():
+            return SECONDARY_LIMIT_BACKOFF * 2**attempt
+
+        return None
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send one request, spacing out mutations to avoid secondary rate limits."""
+        if method == "GET":
+            async with limits.github_api:
+                return await self.http.request(method, url, **kwargs)
+
+        async with self._mutation_lock:
+            wait = self._last_mutation + MUTATION_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with limits.github_api:
+                    return await self.http.request(method, url, **kwargs)
+            finally:
+                self._last_mutation = time.monotonic()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """
+        Perform an API request with conditional caching and rate limit handling.
+
+        Args:
+            method: HTTP method
+            url: Path relative to the API URL, or an absolute API URL
+            **kwargs: Extra arguments for ``httpx.AsyncClient.request``
+
+        Returns:
+            Decoded JSON body, or None for empty responses
+
+        Raises:
+            GitHubAPIError: If the API returns an error
+        """
+        cached = self._etags.get(url) if method == "GET" else None
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        for attempt in range(settings.github_max_retries + 1):
+            await self._throttle()
+            response = await self._send(method, url, headers=headers, **kwargs)
+            self._track_rate_limit(response)
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == settings.github_max_retries:
+                break
+            self.log.warning(
+                "github_rate_limited",
+                msg="GitHub rate limit hit, backing off",
+                status=response.status_code,
+                retry_in_seconds=round(delay, 1),
+                attempt=attempt + 1,
+            )
+            self._pause(delay)
+
+        set_span_attributes(
+            **{
+                "http.request.method": method,
+                "url.full": str(response.request.url),
+                "http.response.status_code": response.status_code,
+                "github.cache_hit": response.status_code == 304 and cached is not None,
+                "github.attempts": attempt + 1,
+                "github.rate_limit_remaining": response.headers.get("X-RateLimit-Remaining"),
+            }
+        )
+
+        if response.status_code == 304 and cached:
+            self._etags.move_to_end(url)
+            return cached[1]
+
+        if response.is_error:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise GitHubAPIError(response.status_code, message)
+
+        data = response.json() if response.content else None
+
+        etag = response.headers.get("ETag")
+        if method == "GET" and etag:
+            self._etags[url] = (etag, data)
+            self._etags.move_to_end(url)
+            while len(self._etags) > ETAG_CACHE_SIZE:
+                self._etags.popitem(last=False)
+
+        return data
+
+    @traced("github.get_repository")
+    async def get_repository(self, repo_url: str) -> Dict[str, Any]:
         """
-        Get repository object from URL.
+        Get repository from URL, served from memory while the cached entry is fresh.
 
         Args:
             repo_url: GitHub repository URL
 
         Returns:
-            Repository object
+            Repository data as returned by the API
         """
         # Extract owner/repo from URL
         # Remove trailing slash and .git suffix properly
@@ -46,70 +234,80 @@ class GitHubClient:
         owner, repo = parts[-2], parts[-1]
 
         full_name = f"{owner}/{repo}"
+
+        cached = self._repos.get(full_name)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
         self.log.info("get_repo", msg="Fetching repository", repo=full_name)
 
         try:
-            return self.client.get_repo(full_name)
-        except GithubException as e:
+            data = await self._request("GET", f"/repos/{full_name}")
+        except GitHubAPIError as e:
             self.log.error("repo_fetch_failed", msg="Failed to fetch repo", error=str(e))
             raise
 
-    def get_issue(self, repo: Repository, issue_id: int) -> Issue:
+        self._repos[full_name] = (time.monotonic() + settings.github_repo_cache_ttl, data)
+        return data
+
+    @traced("github.get_issue")
+    async def get_issue(self, repo: Dict[str, Any], issue_id: int) -> Dict[str, Any]:
         """
         Get issue by ID.
 
         Args:
-            repo: Repository object
+            repo: Repository data
             issue_id: Issue number
 
         Returns:
-            Issue object
+            Issue data as returned by the API
         """
         self.log.info("get_issue", msg="Fetching issue", issue_id=issue_id)
 
         try:
-            return repo.get_issue(issue_id)
-        except GithubException as e:
+            return await self._request("GET", f"/repos/{repo['full_name']}/issues/{issue_id}")
+        except GitHubAPIError as e:
             self.log.error("issue_fetch_failed", msg="Failed to fetch issue", error=str(e))
             raise
 
-    def get_issue_data(self, issue: Issue) -> Dict[str, Any]:
+    def get_issue_data(self, issue: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract relevant data from issue.
 
         Args:
-            issue: GitHub Issue object
+            issue: Issue data as returned by the API
 
         Returns:
             Dictionary with issue data
         """
         return {
-            "number": issue.number,
-            "title": issue.title,
-            "body": issue.body or "",
-            "state": issue.state,
-            "labels": [label.name for label in issue.labels],
-            "author": issue.user.login,
-            "created_at": issue.created_at.isoformat(),
-            "updated_at": issue.updated_at.isoformat(),
-            "comments_count": issue.comments,
-            "url": issue.html_url,
+            "number": issue["number"],
+            "title": issue["title"],
+            "body": issue.get("body") or "",
+            "state": issue["state"],
+            "labels": [label["name"] for label in issue.get("labels", [])],
+            "author": issue["user"]["login"],
+            "created_at": issue["created_at"],
+            "updated_at": issue["updated_at"],
+            "comments_count": issue.get("comments", 0),
+            "url": issue["html_url"],
         }
 
-    def create_pull_request(
+    @traced("github.create_pull_request")
+    async def create_pull_request(
         self,
-        repo: Repository,
+        repo: Dict[str, Any],
         title: str,
         body: str,
         head: str,
         base: str = "main",
         draft: bool = False,
-    ) -> PullRequest:
+    ) -> Dict[str, Any]:
         """
         Create a pull request.
 
         Args:
-            repo: Repository object
+            repo: Repository data
             title: PR title
             body: PR description
             head: Source branch
@@ -117,7 +315,7 @@ class GitHubClient:
             draft: Create as draft PR
 
         Returns:
-            PullRequest object
+            Pull request data as returned by the API
         """
         self.log.info(
             "creating_pr",
@@ -129,74 +327,82 @@ class GitHubClient:
         )
 
         try:
-            pr = repo.create_pull(title=title, body=body, head=head, base=base, draft=draft)
+            pr = await self._request(
+                "POST",
+                f"/repos/{repo['full_name']}/pulls",
+                json={"title": title, "body": body, "head": head, "base": base, "draft": draft},
+            )
 
-            self.log.info("pr_created", msg="Pull request created", pr_number=pr.number)
+            self.log.info("pr_created", msg="Pull request created", pr_number=pr["number"])
             return pr
 
-        except GithubException as e:
+        except GitHubAPIError as e:
             self.log.error("pr_creation_failed", msg="Failed to create PR", error=str(e))
             raise
 
-    def add_pr_comment(self, pr: PullRequest, comment: str) -> None:
+    @traced("github.add_pr_comment")
+    async def add_pr_comment(self, pr: Dict[str, Any], comment: str) -> None:
         """
         Add comment to pull request.
 
         Args:
-            pr: PullRequest object
+            pr: Pull request data
             comment: Comment text
         """
-        self.log.info("adding_comment", msg="Adding comment to PR", pr_number=pr.number)
+        self.log.info("adding_comment", msg="Adding comment to PR", pr_number=pr["number"])
 
         try:
-            pr.create_issue_comment(comment)
+            await self._request("POST", pr["comments_url"], json={"body": comment})
             self.log.info("comment_added", msg="Comment added")
-        except GithubException as e:
+        except GitHubAPIError as e:
             self.log.error("comment_failed", msg="Failed to add comment", error=str(e))
             raise
 
-    def add_issue_comment(self, issue: Issue, comment: str) -> None:
+    @traced("github.add_issue_comment")
+    async def add_issue_comment(self, issue: Dict[str, Any], comment: str) -> None:
         """
         Add comment to issue.
 
         Args:
-            issue: Issue object
+            issue: Issue data
             comment: Comment text
         """
-        self.log.info("adding_comment", msg="Adding comment to issue", issue_number=issue.number)
+        self.log.info("adding_comment", msg="Adding comment to issue", issue_number=issue["number"])
 
         try:
-            issue.create_comment(comment)
+            await self._request("POST", issue["comments_url"], json={"body": comment})
             self.log.info("comment_added", msg="Comment added")
-        except GithubException as e:
+        except GitHubAPIError as e:
             self.log.error("comment_failed", msg="Failed to add comment", error=str(e))
             raise
 
-    def add_labels(self, issue: Issue, labels: List[str]) -> None:
+    @traced("github.add_labels")
+    async def add_labels(self, issue: Dict[str, Any], labels: List[str]) -> None:
         """
         Add labels to issue or PR.
 
         Args:
-            issue: Issue or PullRequest object
+            issue: Issue data (pull requests are also issues in GitHub)
             labels: List of label names
         """
         self.log.info("adding_labels", msg="Adding labels", labels=labels)
 
         try:
-            issue.add_to_labels(*labels)
+            await self._request("POST", f"{issue['url']}/labels", json={"labels": labels})
             self.log.info("labels_added", msg="Labels added")
-        except GithubException as e:
+        except GitHubAPIError as e:
             self.log.error("labels_failed", msg="Failed to add labels", error=str(e))
             raise
 
-    def add_comment_reaction(
-        self, issue: Issue, comment_id: int, reaction: str = "rocket"
+    @traced("github.add_comment_reaction")
+    async def add_comment_reaction(
+        self, issue: Dict[str, Any], comment_id: int, reaction: str = "rocket"
     ) -> None:
         """
         Add reaction to a comment.
 
         Args:
-            issue: Issue object (PRs are also issues in GitHub)
+            issue: Issue data (PRs are also issues in GitHub)
             comment_id: Comment ID
             reaction: Reaction type (+1, -1, laugh, confused, heart, hooray, rocket, eyes)
         """
@@ -208,9 +414,16 @@ class GitHubClient:
         )
 
         try:
-            comment = issue.get_comment(comment_id)
-            comment.create_reaction(reaction)
+            await self._request(
+                "POST",
+                f"{issue['repository_url']}/issues/comments/{comment_id}/reactions",
+                json={"content": reaction},
+            )
             self.log.info("reaction_added", msg="Reaction added successfully")
-        except GithubException as e:
+        except GitHubAPIError as e:
             self.log.error("reaction_failed", msg="Failed to add reaction", error=str(e))
             raise
+
+    async def close(self) -> None:
+        """Close the HTTP client."""
+        await self.http.aclose()
@@ -0,0 +1,302 @@
+"""Persistent bare-mirror cache for repositories cloned by the worker.
+
+Each remote repository gets one bare mirror under the workspace. Mirrors are
+updated with incremental fetches and per-task checkouts are created from them
+with ``git clone --shared``, so only new objects travel over the network. Like
+the plain clone, a fetch only brings the task's branch, ``git_clone_depth``
+commits deep, so the first task of a large repository is not slower than before.
+
+A checkout borrows the mirror's objects, so it holds a shared ``flock`` on the
+mirror's ``.lease`` file while it exists. Eviction skips mirrors whose lease file
+it cannot lock exclusively, which protects checkouts made by any process sharing
+the workspace (e.g. the task processes of the forkserver mode). The kernel drops
+the lease of a process that dies.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import IO, AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+
+import structlog
+
+from worker.config import settings
+from worker.git.command import run_git
+
+logger = structlog.get_logger()
+
+# Only branch heads are mirrored; GitHub's refs/pull/* would bloat the mirror.
+MIRROR_REFSPEC = "+refs/heads/{branch}:refs/heads/{branch}"
+
+
+class RepoCache:
+    """Manage bare mirrors with per-repo locking and size-based LRU eviction."""
+
+    def __init__(self, cache_dir: Path, max_size_mb: Optional[int] = None):
+        """
+        Initialize repository cache.
+
+        Args:
+            cache_dir: Directory holding the bare mirrors
+            max_size_mb: Total size budget for all mirrors. Uses settings default if not provided.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = (max_size_mb or settings.git_mirror_cache_max_size_mb) * 1024 * 1024
+        self.log = logger.bind(cache_dir=str(self.cache_dir))
+
+        # Checkouts currently borrowing objects from a mirror, with their locked lease file
+        self._leases: Dict[Path, IO[str]] = {}
+        # In-process locks; flock alone does not order coroutines of the same worker
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def repo_key(repo_url: str) -> str:
+        """
+        Build a filesystem-safe cache key for a repository URL.
+
+        Credentials embedded in the URL are ignored so the same repository always maps
+        to the same mirror.
+
+        Args:
+            repo_url: Git repository URL
+
+        Returns:
+            Cache key such as ``github.com__owner__repo``
+        """
+        parsed = urlparse(repo_url)
+        path = parsed.path.rstrip("/")
+        if path.endswith(".git"):
+            path = path[:-4]
+
+        raw = f"{parsed.hostname or 'local'}/{path.strip('/')}"
+        key = re.sub(r"[^A-Za-z0-9._-]+", "__", raw)
+        if len(key) > 100:
+            key = f"{key[:80]}-{hashlib.sha1(raw.encode()).hexdigest()[:12]}"
+        return key
+
+    def mirror_path(self, repo_url: str) -> Path:
+        """Return the bare mirror path for a repository URL."""
+        return self.cache_dir / f"{self.repo_key(repo_url)}.git"
+
+    @asynccontextmanager
+    async def _locked(self, key: str, blocking: bool = True) -> AsyncIterator[bool]:
+        """
+        Hold the exclusive lock of a mirror.
+
+        Combines an asyncio lock, which orders tasks of this worker, with ``flock`` on a
+        sidecar file, which also protects the mirror against other worker processes
+        sharing the same workspace volume.
+
+        Args:
+            key: Mirror cache key
+            blocking: Wait for the lock instead of giving up when it is held
+
+        Yields:
+            True if the lock was acquired
+        """
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        if not blocking and lock.locked():
+            yield False
+            return
+
+        async with lock:
+            lock_path = self.cache_dir / f"{key}.lock"
+            with open(lock_path, "a") as lock_file:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                try:
+                    await asyncio.to_thread(fcntl.flock, lock_file.fileno(), flags)
+                except BlockingIOError:
+                    yield False
+                    return
+
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    async def _update_mirror(self, mirror: Path, fetch_url: str, branch: str, timeout: int) -> None:
+        """
+        Create the mirror if missing and fetch the latest commits of a branch.
+
+        The authenticated URL is passed on the command line only, so tokens are never
+        written to the mirror's config.
+        """
+        if not (mirror / "HEAD").exists():
+            self.log.info("mirror_init", msg="Creating bare mirror", mirror=str(mirror))
+            if mirror.exists():
+                await asyncio.to_thread(shutil.rmtree, mirror)
+            await run_git(["init", "--bare", "--quiet", str(mirror)], log=self.log)
+            # Per-task checkouts borrow objects from the mirror; never let gc drop them.
+            await run_git(["config", "gc.auto", "0"], cwd=mirror, log=self.log)
+
+        self.log.info("mirror_fetch", msg="Fetching into mirror", mirror=str(mirror))
+        await run_git(
+            [
+                "fetch",
+                "--no-tags",
+                "--quiet",
+                "--depth",
+                str(settings.git_clone_depth),
+                fetch_url,
+                MIRROR_REFSPEC.format(branch=branch),
+            ],
+            cwd=mirror,
+            timeout=timeout,
+            log=self.log,
+        )
+
+    async def checkout(
+        self,
+        repo_url: str,
+        clone_url: str,
+        repo_path: Path,
+        branch: str = "main",
+        timeout: int = 300,
+        sparse: bool = False,
+    ) -> Path:
+        """
+        Refresh the mirror of a repository and create a task checkout from it.
+
+        Args:
+            repo_url: Git repository URL (without credentials)
+            clone_url: URL used to fetch and push, possibly with credentials
+            repo_path: Destination of the task checkout
+            branch: Branch to check out
+            timeout: Timeout in seconds for the network fetch
+            sparse: Start the checkout with only the top-level files (``--sparse``)
+
+        Returns:
+            Path to the task checkout
+
+        Raises:
+            subprocess.CalledProcessError: If a git command fails
+            subprocess.TimeoutExpired: If the fetch times out
+        """
+        key = self.repo_key(repo_url)
+        mirror = self.mirror_path(repo_url)
+
+        async with self._locked(key):
+            await self._update_mirror(mirror, clone_url, branch, timeout)
+
+            # Evictors hold the mirror lock too, so the shared lock is granted at once
+            lease = open(self.cache_dir / f"{key}.lease", "a")
+            fcntl.flock(lease.fileno(), fcntl.LOCK_SH)
+            self._leases[repo_path] = lease
+
+            try:
+                await run_git(
+                    [
+                        "clone",
+                        "--shared",
+                        "--quiet",
+                        *(["--sparse"] if sparse else []),
+                        "--branch",
+                        branch,
+                        "--single-branch",
+                        str(mirror),
+                        str(repo_path),
+                    ],
+                    log=self.log,
+                )
+            except BaseException:
+                self.release(repo_path)
+                raise
+            self._touch(mirror)
+
+        # Push and pull against the real remote, not the local mirror
+        await run_git(["remote", "set-url", "origin", clone_url], cwd=repo_path, log=self.log)
+
+        self.log.info("mirror_checkout", msg="Checkout created from mirror", path=str(repo_path))
+        await self.evict()
+        return repo_path
+
+    def release(self, repo_path: Path) -> None:
+        """
+        Mark a task checkout as no longer using its mirror.
+
+        Args:
+            repo_path: Path previously returned by ``checkout``
+        """
+        lease = self._leases.pop(repo_path, None)
+        if lease is not None:
+            lease.close()
+
+    def _leased(self, key: str) -> bool:
+        """Return True if a checkout of any process still borrows from a mirror."""
+        with open(self.cache_dir / f"{key}.lease", "a") as lease:
+            try:
+                fcntl.flock(lease.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lease.fileno(), fcntl.LOCK_UN)
+            return False
+
+    async def evict(self) -> None:
+        """Remove least recently used mirrors until the cache fits its size budget."""
+        mirrors = [p for p in self.cache_dir.glob("*.git") if p.is_dir()]
+        sizes = await asyncio.to_thread(lambda: {mirror: dir_size(mirror) for mirror in mirrors})
+        total = sum(sizes.values())
+
+        if total <= self.max_size_bytes:
+            return
+
+        for mirror in sorted(mirrors, key=self._last_used):
+            if total <= self.max_size_bytes:
+                break
+
+            key = mirror.name[: -len(".git")]
+            # New leases are only taken under the mirror lock, so the check holds
+            async with self._locked(key, blocking=False) as acquired:
+                if not acquired or self._leased(key):
+                    continue
+                self.log.info(
+                    "mirror_evict",
+                    msg="Evicting repository mirror",
+                    mirror=str(mirror),
+                    size_bytes=sizes[mirror],
+                )
+                await asyncio.to_thread(shutil.rmtree, mirror, True)
+                (self.cache_dir / f"{key}.last-used").unlink(missing_ok=True)
+                total -= sizes[mirror]
+
+    def _touch(self, mirror: Path) -> None:
+        """Record that a mirror has just been used."""
+        marker = self.cache_dir / f"{mirror.name[: -len('.git')]}.last-used"
+        marker.touch()
+        now = time.time()
+        os.utime(marker, (now, now))
+
+    def _last_used(self, mirror: Path) -> float:
+        """Return the last-used timestamp of a mirror (0 if unknown)."""
+        marker = self.cache_dir / f"{mirror.name[: -len('.git')]}.last-used"
+        try:
+            return marker.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+
+def dir_size(path: Path, allocated: bool = False) -> int:
+    """
+    Return the total size in bytes of the files under a directory.
+
+    Args:
+        path: Directory to measure
+        allocated: Count the disk blocks allocated to the files rather than their length
+    """
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += stat.st_blocks * 512 if allocated else stat.st_size
+    return total
@@ -0,0 +1,175 @@
+"""Sparse checkouts for large repositories.
+
+In sparse mode a repository is cloned with ``--filter=blob:none --sparse``:
+the commit and tree objects are downloaded, but file contents are only fetched
+for the directories in the sparse-checkout cone. The cone is chosen from the
+task itself:
+
+- paths mentioned in the issue or refine request,
+- labels such as ``path:services/payments`` (see ``git_sparse_label_prefix``),
+- the ``.ai-agent-sparse`` file at the repository root, one directory per line.
+
+When nothing points at a part of the repository, the full tree is checked out.
+Files the LLM stage needs outside the cone are added to it on demand with
+``git sparse-checkout add``, which fetches their blobs lazily from the remote.
+"""
+
+import re
+import subprocess
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Set
+
+import structlog
+
+from worker.concurrency import limits
+from worker.config import settings
+from worker.git.command import run_git
+
+logger = structlog.get_logger()
+
+# Path-like words: at least one slash or a file extension
+_PATH_TOKEN_RE = re.compile(r"[\w.-]+(?:/[\w.-]+)+/?|[\w-]+\.[A-Za-z0-9]{1,10}\b")
+
+# A file name mentioned on its own is only trusted when it is this unambiguous
+MAX_BASENAME_MATCHES = 3
+
+
+async def is_sparse(repo_path: Path) -> bool:
+    """Return True if the checkout has sparse-checkout enabled."""
+    try:
+        output = await run_git(
+            ["config", "--bool", "core.sparseCheckout"],
+            cwd=repo_path,
+            timeout=settings.git_command_timeout,
+        )
+    except subprocess.CalledProcessError:
+        # Exit code 1 means the key is unset
+        return False
+    return output.strip() == "true"
+
+
+def path_hints(text: str, files: Iterable[str]) -> Set[str]:
+    """
+    Find the directories of tracked files or directories mentioned in free text.
+
+    Args:
+        text: Issue or refine request text
+        files: Tracked file paths of the repository
+
+    Returns:
+        Directories to include in the cone (empty for top-level files)
+    """
+    files = list(files)
+    file_set = set(files)
+    dirs = {str(parent) for path in files for parent in PurePosixPath(path).parents}
+    by_name: Dict[str, List[str]] = {}
+    for path in files:
+        by_name.setdefault(PurePosixPath(path).name, []).append(path)
+
+    hints: Set[str] = set()
+    for token in _PATH_TOKEN_RE.findall(text):
+        token = token.strip("./").rstrip("/")
+        if token in dirs:
+            hints.add(token)
+        elif token in file_set:
+            hints.add(str(PurePosixPath(token).parent))
+        elif 0 < len(by_name.get(token, [])) <= MAX_BASENAME_MATCHES:
+            hints.update(str(PurePosixPath(path).parent) for path in by_name[token])
+
+    hints.discard(".")
+    return hints
+
+
+async def choose_cone(
+    repo_path: Path,
+    texts: Iterable[str],
+    labels: Iterable[str] = (),
+    log: Optional[structlog.typing.FilteringBoundLogger] = None,
+) -> List[str]:
+    """
+    Choose the sparse-checkout cone of a task.
+
+    Only tree objects are read, so this does not download any file contents beyond
+    the repository's sparse config file.
+
+    Args:
+        repo_path: Sparse checkout, before narrowing
+        texts: Task texts to look for paths in (issue title and body, refine request)
+        labels: Issue or pull request labels
+        log: Logger. Uses the module logger if not provided.
+
+    Returns:
+        Directories of the cone, or an empty list when the full tree is needed
+    """
+    log = log or logger
+    timeout = settings.git_command_timeout
+    output = await run_git(
+        ["ls-tree", "-r", "-z", "--name-only", "HEAD"], cwd=repo_path, timeout=timeout
+    )
+    files = [path for path in output.split("\0") if path]
+    dirs = {str(parent) for path in files for parent in PurePosixPath(path).parents}
+
+    cone: Set[str] = set()
+    for text in texts:
+        cone |= path_hints(text or "", files)
+
+    prefix = settings.git_sparse_label_prefix
+    cone |= {label[len(prefix) :].strip("/") for label in labels if label.startswith(prefix)}
+
+    config_file = settings.git_sparse_config_file
+    if config_file in files:
+        content = await run_git(["show", f"HEAD:{config_file}"], cwd=repo_path, timeout=timeout)
+        cone |= {
+            line.strip().strip("/")
+            for line in content.splitlines()
+            if line.strip() and not line.startswith("#")
+        }
+
+    # Directories that do not exist would silently check out nothing
+    chosen = sorted(path for path in cone if path in dirs)
+    log.info(
+        "sparse_cone_chosen",
+        msg="Chose sparse checkout cone" if chosen else "No paths found, using the full tree",
+        paths=chosen,
+        ignored=sorted(cone - set(chosen)),
+    )
+    return chosen
+
+
+async def materialize(
+    repo_path: Path,
+    paths: Iterable[str],
+    log: Optional[structlog.typing.FilteringBoundLogger] = None,
+) -> List[str]:
+    """
+    Add the directories of files missing from a sparse checkout to its cone.
+
+    Blobs of the added directories are fetched lazily from the remote. Nothing is
+    done for checkouts that are not sparse.
+
+    Args:
+        repo_path: Checkout the files belong to
+        paths: Repository-relative file paths about to be read or edited
+        log: Logger. Uses the module logger if not provided.
+
+    Returns:
+        Directories added to the cone
+    """
+    log = log or logger
+    missing = {
+        str(PurePosixPath(path).parent) for path in paths if not (Path(repo_path) / path).exists()
+    }
+    missing.discard(".")
+    if not missing or not await is_sparse(repo_path):
+        return []
+
+    added = sorted(missing)
+    log.info("sparse_checkout_add", msg="Adding directories to sparse checkout", paths=added)
+    async with limits.git_network:
+        await run_git(
+            ["sparse-checkout", "add", "--", *added],
+            cwd=repo_path,
+            timeout=settings.git_network_timeout,
+            log=log,
+        )
+    return added
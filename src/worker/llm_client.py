@@ -1,16 +1,56 @@
 """LLM client for code generation using Ollama."""
 
 import asyncio
+import json
 import os
 import subprocess
-from typing import Optional, Dict, Any
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Dict, Any, List, Set
 import httpx
 import structlog
 
+from worker.aider_output import AiderOutputParser, AiderStalled, consume_output, watch_for_stall
+from worker.concurrency import limits
 from worker.config import settings
+from worker.context_retriever import ContextRetriever, render_snippets
+from worker.edit_blocks import EditBlockError, apply_edit_blocks, parse_edit_blocks
+from worker.git.command import kill_process_group, run_git
+from worker.git.sparse import materialize
+from worker.llm_router import LLMRouter
+from worker.repo_index import RepoIndexStore
+from worker.metrics import LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS, RESULT_CACHE_LOOKUPS
+from worker.result_cache import ResultCache
+from worker.tracing import set_span_attributes, traced, tracer
+
+if TYPE_CHECKING:
+    from worker.aider_pool import AiderPool
 
 logger = structlog.get_logger()
 
+NATIVE_SYSTEM_PROMPT = """You are an expert software engineer editing a git repository.
+
+Describe every change as a SEARCH/REPLACE block using exactly this format:
+
+path/to/file.py
+```
+<<<<<<< SEARCH
+exact lines copied from the current file
+=======
+new lines
+>>>>>>> REPLACE
+```
+
+Rules:
+- Put the file path, relative to the repository root, alone on the line before the block.
+- The SEARCH section must match the existing file content exactly, including indentation.
+- Keep SEARCH sections short but unique within the file.
+- To create a new file, leave the SEARCH section empty.
+- Only output SEARCH/REPLACE blocks and brief explanations.
+"""
+
 
 class LLMClient:
     """Client for interacting with LLM providers (Ollama)."""
@@ -20,36 +60,136 @@ class LLMClient:
         provider: str = "ollama",
         model: str = "qwen2.5-coder:14b",
         base_url: Optional[str] = None,
+        aider_pool: Optional["AiderPool"] = None,
+        index_store: Optional[RepoIndexStore] = None,
+        result_cache: Optional[ResultCache] = None,
+        router: Optional[LLMRouter] = None,
     ):
         """
         Initialize LLM client.
 
         Args:
-            provider: LLM provider ("ollama")
+            provider: LLM provider ("ollama" runs Aider, "native" streams completions
+                and applies edits in-process)
             model: Model name to use
-            base_url: Base URL for API
+            base_url: Base URL for API. Requests are routed across the configured
+                backends if not provided.
+            aider_pool: Pool of warm Aider sessions. Aider is spawned per task if not provided.
+            index_store: Repository index store. Built from settings if not provided and
+                the index is enabled.
+            result_cache: Cache of generated patches. Built from settings if not provided
+                and the cache is enabled.
+            router: Router spreading requests across LLM backends. Built from settings
+                (or from base_url) if not provided.
         """
         self.provider = provider
         self.model = model
-        self.base_url = base_url or settings.ollama_base_url
+        self.router = router or LLMRouter([base_url] if base_url else None)
+        self.aider_pool = aider_pool
+
+        if index_store is None and settings.repo_index_enabled:
+            index_store = RepoIndexStore(Path(settings.workspace_dir) / ".indexes")
+        self.index_store = index_store
+
+        if result_cache is None and settings.llm_result_cache_enabled:
+            result_cache = ResultCache(Path(settings.workspace_dir) / ".result-cache")
+        self.result_cache = result_cache
         self.log = logger.bind(provider=provider, model=model)
 
-        # HTTP client with extended timeouts for LLM generation
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(900, connect=10), follow_redirects=True
+        # Long-lived HTTP client, shared by every task this worker runs
+        self.client = self._build_http_client()
+        # Requests using each client, so a replaced client is closed once it has drained
+        self._client_users: Dict[httpx.AsyncClient, int] = {}
+        self._retired_clients: Set[httpx.AsyncClient] = set()
+        self._completions_started = 0
+
+    @staticmethod
+    def _build_http_client() -> httpx.AsyncClient:
+        """Build the pooled HTTP client with extended timeouts for LLM generation."""
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(900, connect=10),
+            limits=httpx.Limits(
+                max_connections=settings.llm_http_max_connections,
+                max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+                keepalive_expiry=settings.llm_http_keepalive_expiry,
+            ),
+            follow_redirects=True,
         )
 
-    async def _call_aider(self, prompt: str, repo_path: str):
+    @asynccontextmanager
+    async def _borrow_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Use the current HTTP client, replacing it if it is closed or fails.
+
+        A transport error can leave broken connections in the pool, so the next
+        requests go through a fresh client; requests still streaming through the old
+        one (possibly from healthy backends) finish before it is closed.
+        """
+        if self.client.is_closed:
+            self.log.warning("llm_client_closed", msg="HTTP client was closed, re-creating it")
+            self.client = self._build_http_client()
+
+        client = self.client
+        self._client_users[client] = self._client_users.get(client, 0) + 1
+        try:
+            yield client
+        except httpx.TransportError as e:
+            if client is self.client:
+                self.log.warning(
+                    "llm_client_reset",
+                    msg="LLM request failed at the transport level, re-creating HTTP client",
+                    error=str(e) or type(e).__name__,
+                )
+                await self._replace_client()
+            raise
+        finally:
+            self._client_users[client] -= 1
+            if not self._client_users[client]:
+                del self._client_users[client]
+                if client in self._retired_clients:
+                    self._retired_clients.discard(client)
+                    await client.aclose()
+
+    async def _replace_client(self) -> None:
+        """Send new requests through a fresh HTTP client; the old one drains, then closes."""
+        old, self.client = self.client, self._build_http_client()
+        if self._client_users.get(old):
+            self._retired_clients.add(old)
+        else:
+            await old.aclose()
+
+    @traced("llm.aider")
+    async def _call_aider(self, prompt: str, repo_path: str, model: str):
         env = os.environ.copy()
         env["PYTHONUNBUFFERED"] = "1"  # Force Python to flush logs immediately
-
-        # Configure OpenAI-compatible endpoint pointing to Ollama
         env["OPENAI_API_KEY"] = settings.llm_api_key
-        env["OPENAI_API_BASE"] = f"{settings.ollama_base_url}/v1"
-
-        model_cmd = f"openai/{settings.llm_model}"
 
-        self._configure_git_identity(repo_path)
+        model_cmd = f"openai/{model}"
+
+        await self._configure_git_identity(repo_path)
+
+        # Aider edits the checkout as it goes, so a failed run is not retried elsewhere
+        if self.aider_pool is not None:
+            parser = AiderOutputParser(self.log)
+            async with limits.llm, self.router.acquire(model) as backend:
+                # Configure OpenAI-compatible endpoint pointing to Ollama
+                env["OPENAI_API_BASE"] = f"{backend.url}/v1"
+                self.log.info(
+                    "aider_pool_run", msg="Running Aider on a warm session", repo=repo_path
+                )
+                try:
+                    edited_files = await self.aider_pool.run(
+                        repo_path=repo_path,
+                        message=prompt,
+                        model=model_cmd,
+                        api_base=env["OPENAI_API_BASE"],
+                        api_key=env["OPENAI_API_KEY"],
+                        parser=parser,
+                    )
+                finally:
+                    self._report_aider_run(parser)
+            self.log.info("Aider finished successfully", edited_files=edited_files)
+            return
 
         cmd = [
             "aider",
@@ -62,28 +202,375 @@ class LLMClient:
             prompt,
         ]
 
-        self.log.info(f"[ASYNC] Starting Aider at: {repo_path}")
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=repo_path,
-            env=env,
-        )
-
-        await process.wait()
+        parser = AiderOutputParser(self.log)
+
+        async with limits.llm, self.router.acquire(model) as backend:
+            env["OPENAI_API_BASE"] = f"{backend.url}/v1"
+            self.log.info(f"[ASYNC] Starting Aider at: {repo_path}")
+
+            # The span covers the whole lifetime of the Aider process
+            with tracer.start_as_current_span("aider.process") as span:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    cwd=repo_path,
+                    env=env,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True,
+                )
+                span.set_attribute("process.pid", process.pid)
+
+                try:
+                    await watch_for_stall(
+                        asyncio.gather(consume_output(process.stdout, parser), process.wait()),
+                        parser,
+                    )
+                except BaseException as e:
+                    if isinstance(e, (AiderStalled, asyncio.TimeoutError)):
+                        self.log.error("aider_killed", msg="Killing Aider", reason=str(e))
+                    await kill_process_group(process)
+                    raise
+                finally:
+                    self._report_aider_run(parser)
+                span.set_attribute("process.exit_code", process.returncode)
 
         if process.returncode != 0:
-            self.log.error(f"Aider finished with error code: {process.returncode}")
+            self.log.error(
+                f"Aider finished with error code: {process.returncode}",
+                output_tail=list(parser.tail)[-20:],
+            )
             raise Exception(f"Aider finished with error code: {process.returncode}")
 
         self.log.info("Aider finished successfully")
 
-    def _configure_git_identity(self, repo_path: str):
+    def _report_aider_run(self, parser: AiderOutputParser) -> None:
+        """Log and trace the token usage and edits parsed from an Aider run."""
+        summary = parser.summary()
+        self.log.info("aider_summary", msg="Aider run summary", **summary)
+        set_span_attributes(
+            **{
+                "aider.tokens_sent": summary["tokens_sent"],
+                "aider.tokens_received": summary["tokens_received"],
+                "aider.cost": summary["cost"],
+                "aider.edited_files": summary["edited_files"],
+            }
+        )
+
+    async def _run_engine(
+        self, prompt: str, repo_path: str, commit_message: str, model: str
+    ) -> None:
+        """
+        Run the configured code generation engine on a repository.
+
+        The native engine falls back to Aider when the model output cannot be turned
+        into edits, unless the fallback is disabled.
+        """
+        if self.provider != "native":
+            await self._call_aider(prompt, repo_path, model)
+            return
+
+        try:
+            await self._call_native(prompt, repo_path, commit_message, model)
+        except EditBlockError as e:
+            if not settings.llm_native_fallback_to_aider:
+                raise
+            self.log.warning(
+                "native_engine_fallback",
+                msg="Native edits could not be applied, falling back to Aider",
+                error=str(e),
+            )
+            await self._call_aider(prompt, repo_path, model)
+
+    async def _generate(
+        self, prompt: str, repo_path: str, commit_message: str, model: Optional[str] = None
+    ) -> None:
+        """
+        Run the engine, reusing the patch of an identical earlier generation.
+
+        Generations are cached by (base commit, engine and model, prompt). On a hit the
+        cached patch is applied and committed without calling the model; on a miss the
+        commits made by the engine are stored as a patch for the next attempt.
+
+        Args:
+            prompt: Task prompt
+            repo_path: Path to the repository
+            commit_message: Message of the commit holding the edits
+            model: Model to generate with. Uses the client's model if not provided.
+        """
+        model = model or self.model
+        if self.result_cache is None:
+            await self._run_engine(prompt, repo_path, commit_message, model)
+            return
+
+        timeout = settings.git_command_timeout
+        base_sha = await run_git(["rev-parse", "HEAD"], cwd=repo_path, timeout=timeout)
+        base_sha = base_sha.strip()
+        key = self.result_cache.key(base_sha, f"{self.provider}:{model}", prompt)
+
+        patch = await self.result_cache.get(key)
+        if patch is not None:
+            if await self._apply_cached_patch(patch, repo_path, commit_message):
+                RESULT_CACHE_LOOKUPS.labels("hit").inc()
+                set_span_attributes(**{"llm.cache_hit": True})
+                return
+            await self.result_cache.discard(key)
+
+        RESULT_CACHE_LOOKUPS.labels("miss").inc()
+        set_span_attributes(**{"llm.cache_hit": False})
+        await self._run_engine(prompt, repo_path, commit_message, model)
+
+        diff = await run_git(
+            ["diff", "--binary", base_sha, "HEAD"], cwd=repo_path, timeout=timeout, log=self.log
+        )
+        if diff:
+            await self.result_cache.put(key, diff.encode())
+
+    async def _apply_cached_patch(self, patch: bytes, repo_path: str, commit_message: str) -> bool:
+        """
+        Apply and commit a cached patch.
+
+        Returns:
+            True if the patch was applied, False if it no longer applies cleanly
+        """
+        timeout = settings.git_command_timeout
+        with tempfile.NamedTemporaryFile(suffix=".patch") as patch_file:
+            patch_file.write(patch)
+            patch_file.flush()
+            try:
+                await run_git(
+                    ["apply", "--index", "--binary", patch_file.name],
+                    cwd=repo_path,
+                    timeout=timeout,
+                    log=self.log,
+                )
+            except subprocess.CalledProcessError as e:
+                self.log.warning(
+                    "result_cache_apply_failed",
+                    msg="Cached patch does not apply, calling the model",
+                    error=e.stderr,
+                )
+                return False
+
+        await self._configure_git_identity(repo_path)
+        await run_git(
+            ["commit", "-m", commit_message], cwd=repo_path, timeout=timeout, log=self.log
+        )
+        self.log.info("result_cache_hit", msg="Applied cached LLM patch, skipping the model")
+        return True
+
+    @traced("llm.native")
+    async def _call_native(
+        self, prompt: str, repo_path: str, commit_message: str, model: str
+    ) -> None:
+        """
+        Generate and apply edits in-process, streaming the completion over HTTP.
+
+        The completion is retried on another backend if the chosen one fails.
+
+        Args:
+            prompt: Task prompt
+            repo_path: Path to the repository
+            commit_message: Message of the commit holding the edits
+            model: Model to generate with
+
+        Raises:
+            EditBlockError: If the response holds no usable edit blocks, or they change nothing
+            httpx.HTTPError: If the completion request fails
+        """
+        repo = Path(repo_path)
+        context = await self._build_native_context(prompt, repo)
+        messages = [
+            {"role": "system", "content": NATIVE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"{context}\n\n{prompt}"},
+        ]
+
+        async with limits.llm:
+            response = await self.router.run(
+                model, lambda backend: self._stream_completion(messages, model, backend.url)
+            )
+
+        blocks = parse_edit_blocks(response)
+        if not blocks:
+            raise EditBlockError("LLM response contained no edit blocks")
+
+        # Files outside a sparse checkout's cone are fetched before they are edited
+        await materialize(repo, [block.path for block in blocks], log=self.log)
+        edited = apply_edit_blocks(repo, blocks)
+        self.log.info("native_edits_applied", msg="Applied LLM edits", files=edited)
+
+        await self._configure_git_identity(repo_path)
+        timeout = settings.git_command_timeout
+        await run_git(["add", "--", *edited], cwd=repo_path, timeout=timeout, log=self.log)
+        try:
+            await run_git(["diff", "--cached", "--quiet"], cwd=repo_path, timeout=timeout)
+        except subprocess.CalledProcessError:
+            pass  # Staged changes to commit
+        else:
+            # SEARCH == REPLACE, or the edits were already there
+            raise EditBlockError("LLM edits did not change any file")
+        await run_git(
+            ["commit", "-m", commit_message], cwd=repo_path, timeout=timeout, log=self.log
+        )
+
+    async def _stream_completion(
+        self, messages: List[Dict[str, str]], model: str, base_url: str
+    ) -> str:
+        """
+        Stream a chat completion from the OpenAI-compatible endpoint.
+
+        Works against Ollama (``/v1/chat/completions``) and any OpenAI-compatible server.
+
+        Args:
+            messages: Chat messages
+            model: Model to generate with
+            base_url: Base URL of the backend
+
+        Returns:
+            Full completion text
+        """
+        url = f"{base_url.rstrip('/')}/v1/chat/completions"
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "temperature": 0,
+        }
+        headers = {"Authorization": f"Bearer {settings.llm_api_key}"}
+
+        started = time.monotonic()
+        first_token_at: Optional[float] = None
+        chunks: List[str] = []
+        usage: Dict[str, Any] = {}
+
+        self.log.info("llm_stream_start", msg="Streaming completion", url=url, model=model)
+        call = "first" if self._completions_started == 0 else "later"
+        self._completions_started += 1
+
+        async with (
+            self._borrow_client() as client,
+            client.stream("POST", url, json=payload, headers=headers) as response,
+        ):
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+
+                event = json.loads(data)
+                usage = event.get("usage") or usage
+                choices = event.get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if not delta:
+                    continue
+
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                    LLM_TIME_TO_FIRST_TOKEN.labels(call).observe(first_token_at - started)
+                    self.log.info(
+                        "llm_first_token",
+                        msg="First token received",
+                        ttft_seconds=round(first_token_at - started, 3),
+                    )
+                chunks.append(delta)
+
+        LLM_TOKENS.labels("native", "sent").inc(usage.get("prompt_tokens") or 0)
+        LLM_TOKENS.labels("native", "received").inc(usage.get("completion_tokens") or 0)
+        self.log.info(
+            "llm_stream_done",
+            msg="Completion finished",
+            duration_seconds=round(time.monotonic() - started, 3),
+            chunks=len(chunks),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+        )
+        return "".join(chunks)
+
+    async def _build_native_context(self, prompt: str, repo: Path) -> str:
+        """
+        Build the repository context sent with a native completion.
+
+        Lists the tracked files (with their symbols when the repository index is enabled)
+        and includes the content of files mentioned in the prompt, within the
+        ``llm_native_context_chars`` budget.
+        """
+        if self.index_store is not None:
+            index = await self.index_store.load_or_build(repo)
+            files = sorted(index.files)
+            sections = ["## Repository map", index.render_map(files)]
+        else:
+            output = await run_git(
+                ["ls-files"], cwd=repo, timeout=settings.git_command_timeout, log=self.log
+            )
+            files = output.splitlines()
+            sections = ["## Repository files", "\n".join(files[:500])]
+            if len(files) > 500:
+                sections.append(f"... and {len(files) - 500} more files")
+
+        mentioned = [
+            path
+            for path in files
+            if path in prompt or (len(Path(path).name) > 3 and Path(path).name in prompt)
+        ]
+
+        await materialize(repo, mentioned, log=self.log)
+        budget = settings.llm_native_context_chars
+        for path in mentioned:
+            try:
+                content = (repo / path).read_text()
+            except (OSError, UnicodeDecodeError):
+                continue
+            if len(content) > budget:
+                continue
+            budget -= len(content)
+            sections.append(f"## {path}\n```\n{content}\n```")
+
+        return "\n\n".join(sections)
+
+    @traced("llm.retrieve_context")
+    async def _retrieve_context(self, query: str, repo_path: str) -> str:
+        """
+        Select the repository snippets most relevant to a task.
+
+        Args:
+            query: Task text to rank snippets against
+            repo_path: Path to the repository
+
+        Returns:
+            Rendered snippets, or an empty string if retrieval is disabled or finds nothing
+        """
+        if not settings.context_retrieval_enabled or self.index_store is None:
+            return ""
+
+        started = time.monotonic()
+        index = await self.index_store.load_or_build(Path(repo_path))
+        retriever = ContextRetriever(Path(repo_path), index)
+        await materialize(Path(repo_path), retriever.candidates(query), log=self.log)
+        snippets = await asyncio.to_thread(
+            retriever.retrieve, query, settings.context_token_budget, settings.context_top_k
+        )
+
+        context = render_snippets(snippets)
+        self.log.info(
+            "context_retrieved",
+            msg="Selected relevant code for the prompt",
+            snippets=len(snippets),
+            files=len({s.path for s in snippets}),
+            chars=len(context),
+            duration_seconds=round(time.monotonic() - started, 3),
+        )
+        return context
+
+    async def _configure_git_identity(self, repo_path: str):
         """Configure a dummy git user to allow Aider create commits"""
         try:
-            subprocess.run(["git", "config", "user.name", "AI Agent"], cwd=repo_path, check=True)
-            subprocess.run(
-                ["git", "config", "user.email", "agent@bot.local"], cwd=repo_path, check=True
+            timeout = settings.git_command_timeout
+            await run_git(["config", "user.name", "AI Agent"], cwd=repo_path, timeout=timeout)
+            await run_git(
+                ["config", "user.email", "agent@bot.local"], cwd=repo_path, timeout=timeout
             )
         except subprocess.CalledProcessError as e:
             self.log.error(f"Failed to configure git: {e}")
@@ -100,7 +587,10 @@ class LLMClient:
         Returns:
             Generated code as formatted string
         """
-        prompt = self._build_code_prompt(issue_data)
+        context = await self._retrieve_context(
+            f"{issue_data.get('title') or ''}\n{issue_data.get('body') or ''}", repo_path
+        )
+        prompt = self._build_code_prompt(issue_data, context)
 
         self.log.info(
             "generating_code",
@@ -108,7 +598,12 @@ class LLMClient:
             issue_id=issue_data.get("number"),
         )
 
-        await self._call_aider(prompt, repo_path, allow_commits=True)
+        await self._generate(
+            prompt,
+            repo_path,
+            commit_message=f"AI Agent: fix issue #{issue_data.get('number')}",
+            model=settings.llm_quickfix_model,
+        )
 
         self.log.info("code_generated", msg="LLM code received")
 
@@ -123,7 +618,8 @@ class LLMClient:
         Returns:
             None (changes are made directly to the repository)
         """
-        prompt = self._build_refine_prompt(refine_request)
+        context = await self._retrieve_context(refine_request, repo_path)
+        prompt = self._build_refine_prompt(refine_request, context)
 
         self.log.info(
             "refining_code",
@@ -131,15 +627,26 @@ class LLMClient:
             request_preview=refine_request[:100],
         )
 
-        await self._call_aider(prompt, repo_path)
+        await self._generate(
+            prompt,
+            repo_path,
+            commit_message="AI Agent: apply review refinement",
+            model=settings.llm_refine_model,
+        )
 
         self.log.info("code_refined", msg="LLM refinement completed")
 
-    def _build_code_prompt(self, issue_data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _context_section(context: str) -> str:
+        """Render retrieved snippets as a prompt section."""
+        return f"## Relevant Code\n\n{context}\n\n" if context else ""
+
+    def _build_code_prompt(self, issue_data: Dict[str, Any], context: str = "") -> str:
         """Build prompt for code generation from an issue."""
-        return f"""You are an expert software engineer. Implement a complete solution for this issue.
+        return f"""You are an expert software engineer. \
+Implement a complete solution for this issue.
 
-## Your Task
+{self._context_section(context)}## Your Task
 
 Implement a solution for issue #{issue_data.get("number")}: {issue_data.get("title")}
 
@@ -154,17 +661,19 @@ Implement a solution for issue #{issue_data.get("number")}: {issue_data.get("tit
 - Make sure the code is syntactically correct
 """
 
-    def _build_refine_prompt(self, refine_request: str) -> str:
+    def _build_refine_prompt(self, refine_request: str, context: str = "") -> str:
         """Build prompt for code refinement based on user feedback."""
-        return f"""You are an expert software engineer. A reviewer has requested changes to this pull request.
+        return f"""You are an expert software engineer. \
+A reviewer has requested changes to this pull request.
 
 ## Refinement Request
 
 {refine_request}
 
-## Your Task
+{self._context_section(context)}## Your Task
 
-Make the necessary changes to satisfy the reviewer's request. Analyze the existing code and apply the requested modifications.
+Make the necessary changes to satisfy the reviewer's request. \
+Analyze the existing code and apply the requested modifications.
 
 **Guidelines:**
 - Understand the intent behind the refinement request
@@ -175,6 +684,14 @@ Make the necessary changes to satisfy the reviewer's request. Analyze the existi
 - Preserve existing functionality unless explicitly asked to change it
 """
 
+    def start(self) -> None:
+        """Start the backend health checks."""
+        self.router.start()
+
     async def close(self):
-        """Close HTTP client."""
+        """Close HTTP client and stop the backend health checks."""
+        await self.router.close()
         await self.client.aclose()
+        for client in self._retired_clients:
+            await client.aclose()
+        self._retired_clients.clear()
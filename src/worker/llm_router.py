@@ -0,0 +1,272 @@
+"""Routing of LLM requests across several Ollama (or OpenAI-compatible) backends.
+
+Every worker used to send its generations to a single ``ollama_base_url``, so
+adding Ollama replicas did not add capacity. The router spreads requests over
+all backends listed in ``llm_backends``:
+
+- The backend with the fewest requests in flight from this worker is picked,
+  preferring backends that already have the model loaded (read from Ollama's
+  ``/api/ps`` by the health checks), so a request does not trigger a model swap.
+- ``llm_backend_models`` restricts models to some backends, e.g. a small model
+  served by a CPU replica and a large one by the GPU replicas.
+- Backends are probed every ``llm_health_check_interval`` seconds. A backend that
+  fails a probe or a request is skipped for ``llm_backend_cooldown`` seconds, and
+  a failed request is retried on the next best backend.
+
+When every backend is down the least bad one is still tried, so the worker
+fails on a real error instead of on an empty routing table.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, TypeVar
+
+import httpx
+import structlog
+
+from worker.config import settings
+from worker.metrics import LLM_BACKEND_HEALTHY, LLM_BACKEND_IN_FLIGHT, LLM_BACKEND_REQUESTS
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class NoBackendError(RuntimeError):
+    """Raised when no backend is configured to serve a model."""
+
+
+@dataclass
+class Backend:
+    """An LLM server and what the router knows about it."""
+
+    url: str
+    in_flight: int = 0
+    healthy: bool = True
+    down_until: float = 0.0
+    # Models loaded in memory, or None when the server does not report them
+    loaded_models: Optional[Set[str]] = None
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and self.down_until <= time.monotonic()
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Return True for errors caused by the backend rather than by the request."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return False
+
+
+class LLMRouter:
+    """Pick a backend per request with least-outstanding load balancing and failover."""
+
+    def __init__(
+        self,
+        backends: Optional[List[str]] = None,
+        backend_models: Optional[Dict[str, List[str]]] = None,
+    ):
+        """
+        Initialize LLM router.
+
+        Args:
+            backends: Base URLs of the LLM servers. Uses settings default if not provided.
+            backend_models: Backends allowed to serve each model; models not listed are
+                served by every backend. Uses settings default if not provided.
+        """
+        urls = backends or settings.llm_backend_urls
+        self.backends = [Backend(url=url.rstrip("/")) for url in dict.fromkeys(urls)]
+        models = settings.llm_backend_models if backend_models is None else backend_models
+        self.backend_models = {
+            model: {url.rstrip("/") for url in urls} for model, urls in models.items()
+        }
+        self.log = logger.bind(service="llm_router")
+        self._health_task: Optional[asyncio.Task] = None
+        self._probe_client: Optional[httpx.AsyncClient] = None
+
+        for backend in self.backends:
+            LLM_BACKEND_HEALTHY.labels(backend.url).set(1)
+
+    def candidates(self, model: str, exclude: Set[str] = frozenset()) -> List[Backend]:
+        """
+        Return the backends able to serve a model, best first.
+
+        Available backends come first, then those having the model loaded, then the
+        least loaded ones; among equals, the least recently used goes first.
+        """
+        allowed = self.backend_models.get(model)
+        backends = [
+            b
+            for b in self.backends
+            if b.url not in exclude and (allowed is None or b.url in allowed)
+        ]
+        return sorted(
+            backends,
+            key=lambda b: (
+                not b.available,
+                b.loaded_models is not None and model not in b.loaded_models,
+                b.in_flight,
+                b.last_used,
+            ),
+        )
+
+    def pick(self, model: str, exclude: Set[str] = frozenset()) -> Backend:
+        """
+        Return the best backend for a model.
+
+        Raises:
+            NoBackendError: If no backend may serve the model
+        """
+        candidates = self.candidates(model, exclude)
+        if not candidates:
+            raise NoBackendError(f"No LLM backend configured for model {model}")
+        return candidates[0]
+
+    def mark_failed(self, backend: Backend, error: BaseException) -> None:
+        """Take a backend out of rotation for the cooldown period."""
+        backend.down_until = time.monotonic() + settings.llm_backend_cooldown
+        self.log.warning(
+            "llm_backend_failed",
+            msg="LLM backend failed, skipping it for a while",
+            backend=backend.url,
+            cooldown_seconds=settings.llm_backend_cooldown,
+            error=str(error) or type(error).__name__,
+        )
+
+    @asynccontextmanager
+    async def acquire(self, model: str, exclude: Set[str] = frozenset()) -> AsyncIterator[Backend]:
+        """
+        Count a request against the best backend for the duration of the block.
+
+        A backend failure raised by the block takes the backend out of rotation.
+
+        Args:
+            model: Model the request is for
+            exclude: URLs of backends not to use (already tried)
+
+        Yields:
+            The chosen backend
+        """
+        backend = self.pick(model, exclude)
+        backend.in_flight += 1
+        backend.last_used = time.monotonic()
+        LLM_BACKEND_IN_FLIGHT.labels(backend.url).inc()
+        try:
+            yield backend
+        except BaseException as e:
+            if isinstance(e, Exception) and is_backend_failure(e):
+                LLM_BACKEND_REQUESTS.labels(backend.url, "failure").inc()
+                self.mark_failed(backend, e)
+            raise
+        else:
+            LLM_BACKEND_REQUESTS.labels(backend.url, "success").inc()
+        finally:
+            backend.in_flight -= 1
+            LLM_BACKEND_IN_FLIGHT.labels(backend.url).dec()
+
+    async def run(self, model: str, request: Callable[[Backend], Awaitable[T]]) -> T:
+        """
+        Send a request to the best backend, failing over to the next ones.
+
+        Only backend failures (connection errors, timeouts, 5xx and 429 responses) are
+        retried, once per backend able to serve the model.
+
+        Args:
+            model: Model the request is for
+            request: Coroutine function sending the request to a backend
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            Exception: The error of the last attempt
+        """
+        tried: Set[str] = set()
+        while True:
+            try:
+                async with self.acquire(model, exclude=tried) as backend:
+                    tried.add(backend.url)
+                    return await request(backend)
+            except Exception as e:
+                if not is_backend_failure(e) or not self.candidates(model, exclude=tried):
+                    raise
+                self.log.warning(
+                    "llm_failover",
+                    msg="Retrying LLM request on another backend",
+                    failed_backend=backend.url,
+                    error=str(e) or type(e).__name__,
+                )
+
+    async def probe(self, backend: Backend) -> bool:
+        """
+        Check one backend and refresh the models it has loaded.
+
+        Ollama lists its loaded models on ``/api/ps``; other OpenAI-compatible servers
+        only need to answer on their root URL.
+        """
+        client = self._probe_client or httpx.AsyncClient()
+        self._probe_client = client
+        timeout = settings.llm_health_check_timeout
+        try:
+            response = await client.get(f"{backend.url}/api/ps", timeout=timeout)
+            if response.status_code == 200:
+                models = response.json().get("models", [])
+                backend.loaded_models = {m.get("name") or m.get("model") for m in models}
+            else:
+                backend.loaded_models = None
+                response = await client.get(backend.url, timeout=timeout)
+                response.raise_for_status()
+            healthy = True
+        except (httpx.HTTPError, ValueError) as e:
+            healthy = False
+            error = str(e) or type(e).__name__
+
+        if healthy != backend.healthy:
+            if healthy:
+                self.log.info("llm_backend_up", msg="LLM backend is healthy", backend=backend.url)
+            else:
+                self.log.warning(
+                    "llm_backend_down",
+                    msg="LLM backend failed its health check",
+                    backend=backend.url,
+                    error=error,
+                )
+        backend.healthy = healthy
+        LLM_BACKEND_HEALTHY.labels(backend.url).set(1 if healthy else 0)
+        return healthy
+
+    async def probe_all(self) -> bool:
+        """Check every backend; return True if at least one is healthy."""
+        results = await asyncio.gather(*(self.probe(b) for b in self.backends))
+        return any(results)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(settings.llm_health_check_interval)
+
+    def start(self) -> None:
+        """Start the periodic health checks (only useful with several backends)."""
+        if self._health_task is None and len(self.backends) > 1:
+            self._health_task = asyncio.create_task(self._health_loop())
+            self.log.info(
+                "llm_router_started",
+                msg="Routing LLM requests",
+                backends=[b.url for b in self.backends],
+            )
+
+    async def close(self) -> None:
+        """Stop the health checks."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        if self._probe_client is not None:
+            await self._probe_client.aclose()
+            self._probe_client = None
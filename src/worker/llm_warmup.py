@@ -0,0 +1,211 @@
+"""Model warm-up and keep-alive for Ollama backends.
+
+After a scale-from-zero event the first task used to pay Ollama's model load
+time (tens of seconds for a 14B model). At startup the worker now loads every
+model it will use on every backend allowed to serve it, and checks that each
+model answers a one-token completion, before it starts consuming messages.
+
+Ollama unloads a model ``keep_alive`` after its last request. The load requests
+carry ``llm_keep_alive``, and while the worker runs the models that are still
+loaded are refreshed every ``llm_keep_alive_refresh_interval`` seconds. The
+models therefore stay in memory as long as KEDA keeps workers around (i.e.
+while the queues have work), plus ``llm_keep_alive`` to absorb the next burst.
+Models that were evicted are not reloaded by the refresh, so the refresh never
+competes with running generations for memory.
+
+Servers that are not Ollama (no ``/api/ps``) are only probed.
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import httpx
+import structlog
+
+from worker.config import settings
+from worker.llm_router import Backend, LLMRouter
+from worker.metrics import LLM_MODEL_LOAD_DURATION, LLM_WARMUP_DURATION
+
+logger = structlog.get_logger()
+
+# Seconds between attempts while a backend is starting or still pulling a model
+RETRY_INTERVAL = 2.0
+
+
+class ModelWarmer:
+    """Preload models on the LLM backends and keep them loaded."""
+
+    def __init__(self, router: LLMRouter, models: Iterable[Optional[str]]):
+        """
+        Initialize model warmer.
+
+        Args:
+            router: Router holding the backends to warm
+            models: Models to warm; empty and duplicate entries are ignored
+        """
+        self.router = router
+        self.models: List[str] = [m for m in dict.fromkeys(models) if m]
+        self.log = logger.bind(service="llm_warmup")
+        self.client = httpx.AsyncClient(follow_redirects=True)
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._warming: Set[asyncio.Task] = set()
+
+    async def _load(self, backend: Backend, model: str, timeout: float) -> float:
+        """
+        Load a model on an Ollama backend and set its keep-alive.
+
+        An Ollama generate request without a prompt only loads the model. It returns
+        at once when the model is already loaded, resetting its keep-alive timer.
+
+        Returns:
+            Load time reported by Ollama, in seconds (0 if the model was loaded)
+        """
+        response = await self.client.post(
+            f"{backend.url}/api/generate",
+            json={"model": model, "keep_alive": settings.llm_keep_alive, "stream": False},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return (response.json().get("load_duration") or 0) / 1e9
+
+    async def _probe(self, backend: Backend, model: str, timeout: float) -> None:
+        """Ask the model for a single token through the OpenAI-compatible endpoint."""
+        response = await self.client.post(
+            f"{backend.url}/v1/chat/completions",
+            json={
+                "model": model,
+                "messages": [{"role": "user", "content": "ping"}],
+                "max_tokens": 1,
+                "stream": False,
+            },
+            headers={"Authorization": f"Bearer {settings.llm_api_key}"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+
+    async def _warm(self, backend: Backend, model: str, deadline: float) -> bool:
+        """Load and probe one model on one backend, retrying until the deadline."""
+        started = time.monotonic()
+        attempts = 0
+        while True:
+            attempts += 1
+            remaining = max(deadline - time.monotonic(), 1.0)
+            try:
+                if not await self.router.probe(backend):
+                    raise httpx.ConnectError("Backend failed its health check")
+                load_seconds = None
+                if backend.loaded_models is not None:
+                    load_seconds = await self._load(backend, model, remaining)
+                await self._probe(backend, model, remaining)
+                break
+            except (httpx.HTTPError, ValueError) as e:
+                error = e
+            if time.monotonic() + RETRY_INTERVAL >= deadline:
+                duration = time.monotonic() - started
+                LLM_WARMUP_DURATION.labels(model, "failure").observe(duration)
+                self.log.warning(
+                    "llm_warmup_failed",
+                    msg="Model did not answer before the warm-up timeout",
+                    backend=backend.url,
+                    model=model,
+                    attempts=attempts,
+                    error=str(error) or type(error).__name__,
+                )
+                self.router.mark_failed(backend, error)
+                return False
+            await asyncio.sleep(RETRY_INTERVAL)
+
+        duration = time.monotonic() - started
+        LLM_WARMUP_DURATION.labels(model, "success").observe(duration)
+        if load_seconds is not None:
+            LLM_MODEL_LOAD_DURATION.labels(model).observe(load_seconds)
+            backend.loaded_models.add(model)
+        self.log.info(
+            "llm_model_warm",
+            msg="Model loaded and answering",
+            backend=backend.url,
+            model=model,
+            attempts=attempts,
+            load_seconds=None if load_seconds is None else round(load_seconds, 3),
+            duration_seconds=round(duration, 3),
+        )
+        return True
+
+    async def warm_up(self) -> None:
+        """
+        Warm every model on every backend allowed to serve it.
+
+        Returns as soon as every model answers on at least one backend; the other
+        backends keep warming in the background. Backends that are still starting (or
+        still pulling the model) are retried for up to ``llm_warmup_timeout`` seconds.
+        Backends that never answer are taken out of rotation like a failed request.
+
+        Raises:
+            RuntimeError: If a model did not answer on any backend
+        """
+        started = time.monotonic()
+        deadline = started + settings.llm_warmup_timeout
+        tasks: Dict[asyncio.Task, str] = {
+            asyncio.create_task(self._warm(backend, model, deadline)): model
+            for model in self.models
+            for backend in self.router.candidates(model)
+        }
+        pending = set(tasks)
+        warm: Set[str] = set()
+        while len(warm) < len(self.models):
+            cold = [m for m in self.models if m not in warm and m not in map(tasks.get, pending)]
+            if cold:
+                for task in pending:
+                    task.cancel()
+                raise RuntimeError(f"No LLM backend answered for models: {', '.join(cold)}")
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            warm |= {tasks[task] for task in done if task.result()}
+        self._warming = pending
+
+        self.log.info(
+            "llm_warmup_complete",
+            msg="Models warm, ready to consume tasks",
+            models=self.models,
+            backends=len(self.router.backends),
+            duration_seconds=round(time.monotonic() - started, 3),
+        )
+
+    async def refresh(self) -> None:
+        """Reset the keep-alive timer of the models still loaded on each backend."""
+        for backend in self.router.backends:
+            if not await self.router.probe(backend) or not backend.loaded_models:
+                continue
+            for model in self.models:
+                if model not in backend.loaded_models:
+                    continue
+                try:
+                    await self._load(backend, model, settings.llm_health_check_timeout)
+                except httpx.HTTPError as e:
+                    self.log.warning(
+                        "llm_keep_alive_failed",
+                        msg="Could not refresh model keep-alive",
+                        backend=backend.url,
+                        model=model,
+                        error=str(e) or type(e).__name__,
+                    )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.llm_keep_alive_refresh_interval)
+            await self.refresh()
+
+    def start(self) -> None:
+        """Start refreshing the keep-alive of the warm models."""
+        if self._refresh_task is None and settings.llm_keep_alive_refresh_interval > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Stop the keep-alive refresh and any warm-up still running."""
+        tasks = [*self._warming, *filter(None, [self._refresh_task])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._warming = set()
+        self._refresh_task = None
+        await self.client.aclose()
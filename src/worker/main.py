@@ -1,19 +1,50 @@
 """AI Agent Worker - With Git & LLM Integration (Iteration 3)."""
 
 import asyncio
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncContextManager, Optional
+
 import structlog
 from faststream import FastStream
-from faststream.rabbit import RabbitBroker, RabbitQueue
+from faststream.rabbit import Channel, RabbitBroker, RabbitQueue
+from faststream.rabbit.annotations import RabbitMessage
+from opentelemetry import trace
 
+from worker import startup
+from worker.capacity import capacity
+from worker.checkpoints import CheckpointStore, checkpoint_key
+from worker.coalescer import Claim, TaskCoalescer
+from worker.concurrency import current_priority, task_priority
 from worker.config import settings
 from worker.git.git_client import GitClient
 from worker.git.git_handler import GitHandler
 from worker.llm_client import LLMClient
+from worker.llm_warmup import ModelWarmer
+from worker.metrics import (
+    TASK_DURATION,
+    TASKS_IN_FLIGHT,
+    TASKS_TOTAL,
+    sample_workspace_disk,
+    start_metrics_server,
+)
 from worker.models import TaskMessage, TaskMode
+from worker.tracing import (
+    bind_trace_to_logs,
+    extract_context,
+    setup_tracing,
+    shutdown_tracing,
+    tracer,
+)
+
+if TYPE_CHECKING:
+    from worker.aider_pool import AiderPool
 
 # Configure structured logging
 structlog.configure(
     processors=[
+        structlog.contextvars.merge_contextvars,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.add_log_level,
         structlog.processors.JSONRenderer(),
@@ -21,6 +52,7 @@ structlog.configure(
 )
 
 logger = structlog.get_logger()
+startup.mark("imports")
 
 # Initialize RabbitMQ broker with graceful timeout
 broker = RabbitBroker(
@@ -29,30 +61,120 @@ broker = RabbitBroker(
 )
 app = FastStream(broker)
 
+# Tasks are consumed from two lanes, each on its own channel. The channel's prefetch
+# count bounds how many messages of the lane this worker processes concurrently, so a
+# quickfix backlog never occupies the slots reserved for interactive refine requests.
+
 # Declare queue as durable to match existing queue
 queue = RabbitQueue(name=settings.rabbitmq_queue, durable=True)
+quickfix_channel = Channel(prefetch_count=settings.max_concurrent_tasks)
+
+# Refine requests jump ahead of each other by message priority
+refine_queue = RabbitQueue(
+    name=settings.rabbitmq_refine_queue,
+    durable=True,
+    arguments={"x-max-priority": settings.rabbitmq_max_priority},
+)
+refine_channel = Channel(prefetch_count=settings.max_concurrent_refine_tasks)
+
+# Shared handlers, created on startup and reused by every task
+git_handler: Optional[GitHandler] = None
+git_client: Optional[GitClient] = None
+llm_client: Optional[LLMClient] = None
+aider_pool: Optional["AiderPool"] = None
+model_warmer: Optional[ModelWarmer] = None
+disk_sampler: Optional[asyncio.Task] = None
+coalescer: Optional[TaskCoalescer] = None
+checkpoints: Optional[CheckpointStore] = None
+
+
+def claim_task(
+    message: TaskMessage, message_id: Optional[str]
+) -> AsyncContextManager[Optional[Claim]]:
+    """Claim a message through the coalescer, or run it as is when coalescing is disabled."""
+    if coalescer is None:
+        return nullcontext(Claim(message, [message_id]))
+    return coalescer.claim(message, message_id)
+
+
+async def run_task(
+    task: TaskMessage, log: structlog.typing.FilteringBoundLogger, task_id: Optional[str]
+) -> None:
+    """
+    Run a task with the handler of its mode, resuming from its checkpoint.
+
+    Args:
+        task: Task to run
+        log: Logger bound to the task context
+        task_id: Key of the task's checkpoint, stable across redeliveries. The task
+            runs without a checkpoint if not provided.
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    checkpoint = None
+    if checkpoints is not None and task_id is not None:
+        checkpoint = await checkpoints.load(task_id)
+
+    if task.mode == TaskMode.QUICKFIX:
+        from worker.modes.quickfix_mode import QuickFixMode
+
+        quickfix_mode = QuickFixMode(
+            git_handler=git_handler,
+            git_client=git_client,
+            llm_client=llm_client,
+        )
+        await quickfix_mode.execute(task, checkpoint)
+
+    elif task.mode == TaskMode.REFINE:
+        from worker.modes.refine_mode import RefineMode
+
+        refine_mode = RefineMode(
+            git_handler=git_handler,
+            git_client=git_client,
+            llm_client=llm_client,
+        )
+        await refine_mode.execute(task, checkpoint)
 
-# Initialize shared handlers
-git_handler = GitHandler()
-git_client = GitClient()
-llm_client = LLMClient()
+    elif task.mode == TaskMode.BATCH_QUICKFIX:
+        from worker.modes.batch_quickfix_mode import BatchQuickFixMode
 
+        batch_mode = BatchQuickFixMode(
+            git_handler=git_handler,
+            git_client=git_client,
+            llm_client=llm_client,
+        )
+        await batch_mode.execute(task, checkpoint)
 
-@broker.subscriber(queue)
-async def process_task(message: TaskMessage) -> None:
+    else:
+        log.error("unknown_mode", msg="Unknown task mode", mode=task.mode)
+        raise ValueError(f"Unknown mode: {task.mode}")
+
+    if checkpoint is not None:
+        await checkpoints.clear(checkpoint)
+
+
+@broker.subscriber(refine_queue, channel=refine_channel)
+@broker.subscriber(queue, channel=quickfix_channel)
+async def process_task(message: TaskMessage, raw_message: RabbitMessage) -> None:
     """
-    Process incoming tasks from RabbitMQ queue.
+    Process incoming tasks from the RabbitMQ queues.
 
-    Routes tasks to appropriate mode handler.
+    Routes tasks to appropriate mode handler. Both lanes accept any mode; the refine
+    queue only exists so interactive requests get their own concurrency slots.
 
     Args:
         message: Task message containing repo_url, issue_id, mode, and trigger_user
+        raw_message: Raw RabbitMQ message, used for its trace context headers
     """
+    startup.first_message()
+
     # Build log context based on mode
     log_context = {
         "repo_url": str(message.repo_url),
         "mode": message.mode.value,
         "trigger_user": message.trigger_user,
+        "priority": task_priority(message),
     }
 
     # Add mode-specific fields
@@ -60,59 +182,163 @@ async def process_task(message: TaskMessage) -> None:
         log_context["issue_id"] = message.issue_id
     elif message.mode == TaskMode.REFINE and message.pr_number:
         log_context["pr_number"] = message.pr_number
+    elif message.mode == TaskMode.BATCH_QUICKFIX:
+        log_context["issue_ids"] = message.issue_ids
 
-    log = logger.bind(**log_context)
-    log.info("task_received", msg="Starting task processing")
+    # Root span of the task, continuing the producer's trace when the message carries one
+    parent = extract_context(raw_message.headers)
+    with (
+        tracer.start_as_current_span(
+            "process_task", context=parent, kind=trace.SpanKind.CONSUMER
+        ) as span,
+        bind_trace_to_logs(span),
+    ):
+        span.set_attributes({f"task.{key}": value for key, value in log_context.items()})
+        log = logger.bind(**log_context)
+        log.info("task_received", msg="Starting task processing")
 
-    try:
-        if message.mode == TaskMode.QUICKFIX:
-            from worker.modes.quickfix_mode import QuickFixMode
+        # Orders this task's LLM calls against the other tasks waiting for the LLM
+        current_priority.set(log_context["priority"])
 
-            quickfix_mode = QuickFixMode(
-                git_handler=git_handler,
-                git_client=git_client,
-                llm_client=llm_client,
-            )
-            await quickfix_mode.execute(message)
+        mode = message.mode.value
+        lane = capacity.lane(raw_message.raw_message.routing_key)
+        started = time.monotonic()
+        outcome = "failure"
+        TASKS_IN_FLIGHT.labels(mode).inc()
+        capacity.start_task(lane)
 
-        elif message.mode == TaskMode.REFINE:
-            from worker.modes.refine_mode import RefineMode
+        try:
+            # Duplicates are dropped and messages queued behind a running task for the
+            # same issue or PR are merged into the next run
+            # The producer's message ID survives redeliveries; FastStream invents a new
+            # one per delivery when it is missing, so it is read from the AMQP message
+            async with claim_task(message, raw_message.raw_message.message_id) as claimed:
+                if claimed is None:
+                    outcome = "coalesced"
+                    log.info(
+                        "task_coalesced", msg="Task was a duplicate or merged into another run"
+                    )
+                    return
+                task = claimed.task
+                task_id = checkpoint_key(claimed.message_ids)
+                if settings.worker_process_mode == "forkserver":
+                    from worker import prefork
 
-            refine_mode = RefineMode(
-                git_handler=git_handler,
-                git_client=git_client,
-                llm_client=llm_client,
-            )
-            await refine_mode.execute(message)
+                    await prefork.run_task(task, log, task_id, log_context)
+                else:
+                    await run_task(task, log, task_id)
 
-        else:
-            log.error("unknown_mode", msg="Unknown task mode", mode=message.mode)
-            raise ValueError(f"Unknown mode: {message.mode}")
+            outcome = "success"
+            log.info("task_completed", msg="Task processed successfully")
 
-        log.info("task_completed", msg="Task processed successfully")
+        except Exception as e:
+            log.error("task_failed", msg="Task processing failed", error=str(e), exc_info=True)
+            raise
 
-    except Exception as e:
-        log.error("task_failed", msg="Task processing failed", error=str(e), exc_info=True)
-        raise
+        finally:
+            TASKS_IN_FLIGHT.labels(mode).dec()
+            capacity.finish_task(lane)
+            TASKS_TOTAL.labels(mode, outcome).inc()
+            TASK_DURATION.labels(mode, outcome).observe(time.monotonic() - started)
 
 
 @app.on_startup
 async def on_startup():
-    """Log startup information."""
+    """Create the shared clients and log startup information."""
+    global git_handler, git_client, llm_client, aider_pool, disk_sampler, coalescer, checkpoints
+    global model_warmer
+
+    setup_tracing()
+
+    if settings.worker_process_mode == "forkserver":
+        from worker import prefork
+
+        await prefork.start()
+    elif settings.worker_process_mode != "inline":
+        raise ValueError(f"Unknown worker process mode: {settings.worker_process_mode}")
+
+    if settings.metrics_enabled:
+        start_metrics_server(capacity=capacity.snapshot)
+
+    git_handler = GitHandler()
+    await git_handler.workspace.purge_trash()
+    if settings.metrics_enabled:
+        disk_paths = [git_handler.workspace.root]
+        if git_handler.repo_cache is not None:
+            disk_paths.append(git_handler.repo_cache.cache_dir)
+        disk_sampler = asyncio.create_task(sample_workspace_disk(disk_paths))
+    git_client = GitClient()
+
+    if settings.task_coalescing_enabled:
+        coalescer = TaskCoalescer()
+
+    if settings.checkpoints_enabled:
+        checkpoints = CheckpointStore(Path(settings.workspace_dir) / "checkpoints")
+        await checkpoints.prune()
+
+    # Task processes spawn their own Aider, a pool in this process would sit idle
+    if settings.aider_pool_size > 0 and settings.worker_process_mode == "inline":
+        from worker.aider_pool import AiderPool
+
+        aider_pool = AiderPool()
+        await aider_pool.start()
+
+    llm_client = LLMClient(
+        provider=settings.llm_provider, model=settings.llm_model, aider_pool=aider_pool
+    )
+    llm_client.start()
+    capacity.router = llm_client.router
+
+    # Consuming starts once the startup hooks return, i.e. once the models are warm
+    if settings.llm_warmup_enabled:
+        model_warmer = ModelWarmer(
+            llm_client.router,
+            [settings.llm_model, settings.llm_quickfix_model, settings.llm_refine_model],
+        )
+        await model_warmer.warm_up()
+        model_warmer.start()
+
     logger.info(
         "worker_starting",
         msg="AI Agent Worker starting",
         rabbitmq_host=settings.rabbitmq_host,
         queue=settings.rabbitmq_queue,
+        refine_queue=settings.rabbitmq_refine_queue,
+        max_concurrent_tasks=settings.max_concurrent_tasks,
+        max_concurrent_refine_tasks=settings.max_concurrent_refine_tasks,
         log_level=settings.log_level,
     )
 
 
+@app.after_startup
+async def after_startup():
+    """Record the startup time once the consumers are subscribed."""
+    startup.ready()
+
+
 @app.on_shutdown
 async def on_shutdown():
     """Log shutdown information."""
     logger.info("worker_shutdown", msg="AI Agent Worker shutting down")
 
 
+@app.after_shutdown
+async def after_shutdown():
+    """Close the shared clients once the broker has drained in-flight tasks."""
+    if disk_sampler is not None:
+        disk_sampler.cancel()
+    if model_warmer is not None:
+        await model_warmer.close()
+    if llm_client is not None:
+        await llm_client.close()
+    if git_client is not None:
+        await git_client.close()
+    if git_handler is not None:
+        await git_handler.close()
+    if aider_pool is not None:
+        await aider_pool.close()
+    shutdown_tracing()
+
+
 if __name__ == "__main__":
     asyncio.run(app.run())
@@ -0,0 +1,199 @@
+"""Prometheus metrics for the worker.
+
+Metrics are served on ``metrics_port`` (path ``/metrics``) while the worker runs,
+along with the worker's capacity as JSON on ``/capacity``. Task outcomes and
+durations are recorded by ``process_task``, stage durations by the step pipeline,
+and the workspace disk usage by a background sampler.
+"""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, List, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram, make_wsgi_app
+
+from worker.config import settings
+from worker.git.repo_cache import dir_size
+
+logger = structlog.get_logger()
+
+# Tasks range from seconds (cache hits, failures) to tens of minutes (slow generations)
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+TASKS_TOTAL = Counter(
+    "ai_agent_tasks_total",
+    "Tasks processed, by mode and outcome",
+    ["mode", "outcome"],
+)
+TASK_DURATION = Histogram(
+    "ai_agent_task_duration_seconds",
+    "End-to-end task duration",
+    ["mode", "outcome"],
+    buckets=DURATION_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "ai_agent_stage_duration_seconds",
+    "Duration of the steps of a task (clone, issue fetch, generation, push, PR creation...)",
+    ["mode", "stage", "outcome"],
+    buckets=DURATION_BUCKETS,
+)
+TASKS_IN_FLIGHT = Gauge(
+    "ai_agent_tasks_in_flight",
+    "Tasks currently being processed",
+    ["mode"],
+)
+LLM_TOKENS = Counter(
+    "ai_agent_llm_tokens_total",
+    "LLM tokens used, by engine and direction (sent or received)",
+    ["engine", "direction"],
+)
+LLM_COST = Counter(
+    "ai_agent_llm_cost_dollars_total",
+    "LLM cost reported by Aider",
+)
+AIDER_STALLS = Counter(
+    "ai_agent_aider_stalls_total",
+    "Aider runs killed because they produced no output for aider_stall_timeout seconds",
+)
+LLM_BACKEND_REQUESTS = Counter(
+    "ai_agent_llm_backend_requests_total",
+    "LLM requests sent to each backend, by outcome (success or failure)",
+    ["backend", "outcome"],
+)
+LLM_BACKEND_IN_FLIGHT = Gauge(
+    "ai_agent_llm_backend_in_flight",
+    "LLM requests in flight on each backend",
+    ["backend"],
+)
+LLM_BACKEND_HEALTHY = Gauge(
+    "ai_agent_llm_backend_healthy",
+    "Whether each LLM backend passed its last health check (1) or not (0)",
+    ["backend"],
+)
+LLM_WARMUP_DURATION = Histogram(
+    "ai_agent_llm_warmup_seconds",
+    "Time until a model answered its warm-up probe on a backend at startup",
+    ["model", "outcome"],
+    buckets=DURATION_BUCKETS,
+)
+LLM_MODEL_LOAD_DURATION = Histogram(
+    "ai_agent_llm_model_load_seconds",
+    "Model load time reported by Ollama during warm-up (0 when already loaded)",
+    ["model"],
+    buckets=DURATION_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "ai_agent_llm_time_to_first_token_seconds",
+    "Time to first token of native completions, for the first completion of the worker "
+    "process (cold) and the later ones",
+    ["call"],
+    buckets=DURATION_BUCKETS,
+)
+RESULT_CACHE_LOOKUPS = Counter(
+    "ai_agent_result_cache_lookups_total",
+    "LLM result cache lookups, by result (hit or miss)",
+    ["result"],
+)
+BATCH_ISSUES_TOTAL = Counter(
+    "ai_agent_batch_issues_total",
+    "Issues handled by batch quickfix tasks, by outcome (pull_request or failed)",
+    ["outcome"],
+)
+TASK_SLOTS = Gauge(
+    "ai_agent_task_slots",
+    "Tasks the worker consumes at once, by lane (the prefetch count)",
+    ["lane"],
+)
+TASK_SLOTS_IN_USE = Gauge(
+    "ai_agent_task_slots_in_use",
+    "Task slots in use, by lane",
+    ["lane"],
+)
+LLM_SLOTS_IN_USE = Gauge(
+    "ai_agent_llm_slots_in_use",
+    "LLM slots (max_concurrent_llm_calls) held by running generations",
+)
+LLM_WAITING_TASKS = Gauge(
+    "ai_agent_llm_waiting_tasks",
+    "Tasks waiting for an LLM slot",
+)
+LLM_BACKEND_CAPACITY = Gauge(
+    "ai_agent_llm_backend_capacity",
+    "LLM requests the healthy backends serve at once (backends x llm_backend_parallel)",
+)
+WORKSPACE_DISK_BYTES = Gauge(
+    "ai_agent_workspace_disk_bytes",
+    "Disk space used by the task checkouts and repository mirrors",
+)
+STARTUP_DURATION = Gauge(
+    "ai_agent_startup_seconds",
+    "Seconds from process start to each startup phase (imports, ready)",
+    ["phase"],
+)
+TIME_TO_FIRST_MESSAGE = Gauge(
+    "ai_agent_time_to_first_message_seconds",
+    "Seconds from process start to the first message consumed",
+)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        """Do not log every scrape."""
+
+
+def start_metrics_server(
+    port: Optional[int] = None, capacity: Optional[Callable[[], Dict[str, Any]]] = None
+) -> None:
+    """
+    Serve the metrics over HTTP in a background thread.
+
+    Args:
+        port: Port to listen on. Uses settings default if not provided.
+        capacity: Function returning the worker's capacity, served as JSON on
+            ``/capacity``. The endpoint is not served if not provided.
+    """
+    port = port or settings.metrics_port
+    metrics_app = make_wsgi_app()
+
+    def app(environ: Dict[str, Any], start_response: Callable) -> Any:
+        if capacity is not None and environ.get("PATH_INFO") == "/capacity":
+            body = json.dumps(capacity()).encode()
+            headers = [("Content-Type", "application/json"), ("Content-Length", str(len(body)))]
+            start_response("200 OK", headers)
+            return [body]
+        return metrics_app(environ, start_response)
+
+    server = make_server(
+        "", port, app, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("metrics_server_started", msg="Serving Prometheus metrics", port=port)
+
+
+async def sample_workspace_disk(paths: List[Path], interval: Optional[float] = None) -> None:
+    """
+    Update the workspace disk usage gauge until cancelled.
+
+    Only the directories that grow with the tasks are measured; the small indexes,
+    result cache and checkpoints are left out to keep each sample cheap.
+
+    Args:
+        paths: Directories to measure (the task checkouts and the mirror cache)
+        interval: Seconds between samples. Uses settings default if not provided.
+    """
+    interval = interval or settings.metrics_disk_sample_interval
+    while True:
+        size = await asyncio.to_thread(
+            lambda: sum(dir_size(path, allocated=True) for path in paths)
+        )
+        WORKSPACE_DISK_BYTES.set(size)
+        await asyncio.sleep(interval)
@@ -1,7 +1,7 @@
 """Pydantic models for message validation."""
 
 from enum import Enum
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, PositiveInt
 
 
 class TaskMode(str, Enum):
@@ -9,6 +9,7 @@ class TaskMode(str, Enum):
 
     QUICKFIX = "quickfix"
     REFINE = "refine"
+    BATCH_QUICKFIX = "batch_quickfix"
 
 
 class TaskMessage(BaseModel):
@@ -22,9 +23,22 @@ class TaskMessage(BaseModel):
 
     trigger_user: str = Field(..., description="User who triggered the task", min_length=1)
 
+    priority: int | None = Field(
+        None,
+        description="Scheduling priority from 0 to 9, higher runs first (defaults by mode)",
+        ge=0,
+        le=9,
+    )
+
     # QuickFix mode fields
     issue_id: int | None = Field(None, description="GitHub issue number (for quickfix mode)", gt=0)
 
+    # Batch QuickFix mode fields
+    issue_ids: list[PositiveInt] = Field(
+        default_factory=list,
+        description="GitHub issue numbers solved in one clone (for batch_quickfix mode)",
+    )
+
     # Refine mode fields
     pr_number: int | None = Field(None, description="Pull request number (for refine mode)", gt=0)
     pr_branch: str | None = Field(None, description="PR branch name (for refine mode)")
@@ -34,6 +48,10 @@ class TaskMessage(BaseModel):
         None, description="Refinement request from /refine command (for refine mode)"
     )
     comment_id: int | None = Field(None, description="GitHub comment ID (for refine mode)")
+    extra_comment_ids: list[int] = Field(
+        default_factory=list,
+        description="Comments whose refine requests were merged into this task (for refine mode)",
+    )
     comment_url: str | None = Field(None, description="GitHub comment URL (for refine mode)")
 
     class Config:
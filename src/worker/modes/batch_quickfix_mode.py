@@ -0,0 +1,279 @@
+"""Batch QuickFix Mode implementation - Many issues of one repository in a single run.
+
+The repository is cloned once and every issue is fetched concurrently. Fixes
+are then generated one after another in the same checkout, each on its own
+branch starting from the same base commit, so the model session, the mirror,
+the repository index and the clone are shared by the whole batch. All branches
+are pushed with a single ``git push`` and the pull requests are opened
+together.
+
+A failing issue does not fail the batch: its error is recorded, reported on
+the issue, and the remaining issues carry on.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from worker.checkpoints import Checkpoint
+from worker.config import settings
+from worker.git.git_client import GitClient
+from worker.git.git_handler import GitHandler
+from worker.llm_client import LLMClient
+from worker.metrics import BATCH_ISSUES_TOTAL
+from worker.models import TaskMessage
+from worker.pipeline import Pipeline, Step
+
+logger = structlog.get_logger()
+
+
+class BatchQuickFixMode:
+    """Orchestrate Batch QuickFix Mode workflow."""
+
+    def __init__(
+        self,
+        git_handler: GitHandler,
+        git_client: GitClient,
+        llm_client: LLMClient,
+    ):
+        """Initialize Batch QuickFix Mode handler."""
+        self.log = logger.bind(mode="batch_quickfix")
+        self.git_handler = git_handler
+        self.git = git_client
+        self.llm_client = llm_client
+
+    async def execute(
+        self, task: TaskMessage, checkpoint: Optional[Checkpoint] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Execute Batch QuickFix Mode workflow.
+
+        Args:
+            task: Task message containing repo_url and issue_ids
+            checkpoint: Checkpoint of a previous attempt. The commits of every issue, the
+                push, the pull requests and the issue reports are recorded in it.
+
+        Returns:
+            Outcome per issue: the pull request number and URL, or the error
+
+        Raises:
+            ValueError: If the task has no issue IDs
+        """
+        issue_ids = list(dict.fromkeys(task.issue_ids))
+        if not issue_ids:
+            raise ValueError("issue_ids is required for Batch QuickFix mode")
+
+        repo_url = str(task.repo_url)
+        self.log.info(
+            "batch_quickfix_start",
+            msg="Starting Batch QuickFix Mode",
+            repo=repo_url,
+            issues=issue_ids,
+        )
+
+        batch_name = "-".join(map(str, issue_ids))[:64]
+        repo_path = await self.git_handler.allocate(f"repo-batch-{batch_name}")
+        sparse = settings.git_sparse_checkout_enabled
+
+        # Batches are coalesced per repository, single quickfixes per issue, so both can
+        # run for the same issue at once; their branches must not collide
+        def branch_name(issue_id: int) -> str:
+            return f"ai-agent/batch-quickfix-issue-{issue_id}"
+
+        async def clone(r: Dict[str, Any]) -> Path:
+            return await self.git_handler.shallow_clone(
+                repo_url=repo_url, target_dir=repo_path, token=settings.github_token, sparse=sparse
+            )
+
+        async def fetch_repository(r: Dict[str, Any]) -> Dict[str, Any]:
+            return await self.git.client.get_repository(repo_url)
+
+        async def fetch_issues(r: Dict[str, Any]) -> Dict[int, Any]:
+            results = await asyncio.gather(
+                *(self.git.client.get_issue(r["repository"], issue_id) for issue_id in issue_ids),
+                return_exceptions=True,
+            )
+            return dict(zip(issue_ids, results))
+
+        async def narrow_checkout(r: Dict[str, Any]) -> str:
+            # The cone covers every issue of the batch
+            if sparse:
+                texts: List[str] = []
+                labels: List[str] = []
+                for issue in r["issues"].values():
+                    if isinstance(issue, BaseException):
+                        continue
+                    issue_data = self.git.client.get_issue_data(issue)
+                    texts += [issue_data["title"], issue_data["body"]]
+                    labels += issue_data["labels"]
+                await self.git_handler.narrow_checkout(r["clone"], texts=texts, labels=labels)
+            return await self.git_handler.head_commit(r["clone"])
+
+        def make_generate(issue_id: int):
+            async def generate(r: Dict[str, Any]) -> Dict[str, Any]:
+                issue = r["issues"][issue_id]
+                if isinstance(issue, BaseException):
+                    return {"error": f"Failed to fetch issue: {issue}"}
+
+                base = r["checkout"]
+                try:
+                    await self.git_handler.reset_branch(r["clone"], branch_name(issue_id), base)
+                    issue_data = self.git.client.get_issue_data(issue)
+                    await self.llm_client.generate_code(issue_data, str(r["clone"]))
+                    patches = await self.git_handler.export_commits(r["clone"], base)
+                except Exception as e:
+                    self.log.error(
+                        "batch_issue_failed",
+                        msg="Generation failed for issue",
+                        issue=issue_id,
+                        error=str(e),
+                    )
+                    return {"error": str(e) or type(e).__name__}
+
+                if not patches:
+                    return {"error": "The model did not change any file"}
+                return {"base": base, "patches": patches}
+
+            async def restore(r: Dict[str, Any], saved: Dict[str, Any]) -> None:
+                if "patches" in saved:
+                    await self.git_handler.reset_branch(
+                        r["clone"], branch_name(issue_id), saved["base"]
+                    )
+                    await self.git_handler.import_commits(r["clone"], saved["patches"])
+
+            return generate, restore
+
+        async def push(r: Dict[str, Any]) -> Dict[str, Optional[str]]:
+            # Every issue is listed: None once pushed, otherwise why it was not
+            errors: Dict[str, Optional[str]] = {
+                str(issue_id): r[f"generate_{issue_id}"].get("error") for issue_id in issue_ids
+            }
+            ready = [issue_id for issue_id in issue_ids if errors[str(issue_id)] is None]
+            if ready:
+                pushed = await self.git_handler.push_branches(
+                    r["clone"], [branch_name(issue_id) for issue_id in ready]
+                )
+                for issue_id in ready:
+                    error = pushed[branch_name(issue_id)]
+                    errors[str(issue_id)] = f"Push rejected: {error}" if error else None
+            return errors
+
+        async def create_pull_requests(r: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+            async def create(issue_id: int) -> Dict[str, Any]:
+                issue = r["issues"][issue_id]
+                pr = await self.git.client.create_pull_request(
+                    repo=r["repository"],
+                    title=f"[AI Agent QuickFix] Fix issue #{issue_id}: {issue['title']}",
+                    body=f"🤖 Automated fix for issue #{issue_id}",
+                    head=branch_name(issue_id),
+                    base="main",
+                    draft=False,
+                )
+                return {"number": pr["number"], "html_url": pr["html_url"]}
+
+            ready = [issue_id for issue_id in issue_ids if r["push"][str(issue_id)] is None]
+            created = await asyncio.gather(*(create(i) for i in ready), return_exceptions=True)
+
+            # The final outcome of every issue
+            outcomes = {
+                str(issue_id): {"error": error}
+                for issue_id, error in r["push"].items()
+                if error is not None
+            }
+            for issue_id, result in zip(ready, created):
+                if isinstance(result, BaseException):
+                    result = {"error": f"Failed to create pull request: {result}"}
+                outcomes[str(issue_id)] = result
+            return outcomes
+
+        async def report(r: Dict[str, Any]) -> Dict[str, Any]:
+            async def report_issue(issue_id: int, result: Dict[str, Any]) -> None:
+                issue = r["issues"][issue_id]
+                if isinstance(issue, BaseException):
+                    return
+                if "error" in result:
+                    await self.git.client.add_issue_comment(
+                        issue, f"🤖 QuickFix could not be applied: {result['error']}"
+                    )
+                    return
+                await self.git.client.add_issue_comment(
+                    issue, f"🤖 QuickFix applied. PR: #{result['number']}"
+                )
+                await self.git.client.add_labels(issue, ["ai-agent", "quickfix"])
+
+            outcomes = {issue_id: r["pull_requests"][str(issue_id)] for issue_id in issue_ids}
+            results = await asyncio.gather(
+                *(report_issue(i, result) for i, result in outcomes.items()),
+                return_exceptions=True,
+            )
+            for issue_id, result in zip(issue_ids, results):
+                if isinstance(result, BaseException):
+                    self.log.warning(
+                        "batch_report_failed",
+                        msg="Could not report outcome on issue",
+                        issue=issue_id,
+                        error=str(result),
+                    )
+            return {str(issue_id): result for issue_id, result in outcomes.items()}
+
+        # Generations run one after another in the shared checkout; the GitHub calls of
+        # every issue run concurrently
+        steps = [
+            Step("clone", clone),
+            Step("repository", fetch_repository),
+            Step("issues", fetch_issues, depends_on=["repository"]),
+            Step("checkout", narrow_checkout, depends_on=["clone", "issues"]),
+        ]
+        previous = "checkout"
+        for issue_id in issue_ids:
+            generate, restore = make_generate(issue_id)
+            steps.append(
+                Step(
+                    f"generate_{issue_id}",
+                    generate,
+                    depends_on=[previous],
+                    checkpoint=True,
+                    restore=restore,
+                )
+            )
+            previous = f"generate_{issue_id}"
+
+        steps += [
+            Step(
+                "push",
+                push,
+                depends_on=[f"generate_{issue_id}" for issue_id in issue_ids],
+                checkpoint=True,
+            ),
+            Step(
+                "pull_requests",
+                create_pull_requests,
+                depends_on=["push", "repository", "issues"],
+                checkpoint=True,
+            ),
+            Step("report", report, depends_on=["pull_requests", "issues"], checkpoint=True),
+        ]
+
+        pipeline = Pipeline("batch_quickfix", steps, log=self.log, checkpoint=checkpoint)
+
+        try:
+            results = await pipeline.run()
+        finally:
+            await self.git_handler.cleanup(repo_path)
+
+        outcomes = {int(issue_id): result for issue_id, result in results["report"].items()}
+        failed = {issue_id: r["error"] for issue_id, r in outcomes.items() if "error" in r}
+        for result in outcomes.values():
+            BATCH_ISSUES_TOTAL.labels("failed" if "error" in result else "pull_request").inc()
+
+        self.log.info(
+            "batch_quickfix_complete",
+            msg="Batch QuickFix completed",
+            pull_requests={
+                issue_id: r["number"] for issue_id, r in outcomes.items() if "error" not in r
+            },
+            failed=failed,
+        )
+        return outcomes
@@ -1,12 +1,17 @@
 """QuickFix Mode implementation - Fire and forget workflow."""
 
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 import structlog
 
+from worker.checkpoints import Checkpoint
 from worker.models import TaskMessage
 from worker.git.git_handler import GitHandler
 from worker.git.git_client import GitClient
 from worker.llm_client import LLMClient
 from worker.config import settings
+from worker.pipeline import Pipeline, Step
 
 logger = structlog.get_logger()
 
@@ -26,8 +31,16 @@ class QuickFixMode:
         self.git = git_client
         self.llm_client = llm_client
 
-    async def execute(self, task: TaskMessage) -> None:
-        """Execute QuickFix Mode workflow."""
+    async def execute(self, task: TaskMessage, checkpoint: Optional[Checkpoint] = None) -> None:
+        """
+        Execute QuickFix Mode workflow.
+
+        Args:
+            task: Task message containing repo_url and issue_id
+            checkpoint: Checkpoint of a previous attempt. The generated commits, the push,
+                the pull request, the comment and the labels are recorded in it, and a
+                retry resumes after the last recorded stage.
+        """
         repo_url = str(task.repo_url)
         issue_id = task.issue_id
 
@@ -35,44 +48,106 @@ class QuickFixMode:
             "quickfix_mode_start", msg="Starting QuickFix Mode", repo=repo_url, issue=issue_id
         )
 
-        repo_name = None
+        repo_path = await self.git_handler.allocate(f"repo-{issue_id}")
+        branch_name = f"ai-agent/quickfix-issue-{issue_id}"
+        sparse = settings.git_sparse_checkout_enabled
 
-        try:
-            # Clone repository
-            repo_name = f"repo-{issue_id}"
-            repo_path = self.git_handler.shallow_clone(
-                repo_url=repo_url, target_dir=repo_name, token=settings.github_token
+        async def clone(r: Dict[str, Any]) -> Path:
+            return await self.git_handler.shallow_clone(
+                repo_url=repo_url, target_dir=repo_path, token=settings.github_token, sparse=sparse
             )
 
-            # Fetch issue
-            repo_obj = self.git.client.get_repository(repo_url)
-            issue = self.git.client.get_issue(repo_obj, issue_id)
-            issue_data = self.git.client.get_issue_data(issue)
-
-            branch_name = f"ai-agent/quickfix-issue-{issue_id}"
-            self.git_handler.create_branch(repo_path, branch_name)
-
-            # Generate code
-            await self.llm_client.generate_code(issue_data, str(repo_path))
-
-            self.git_handler.push_branch(repo_path, branch_name)
-
-            # Create PR
-            pr = self.git.client.create_pull_request(
-                repo=repo_obj,
-                title=f"[AI Agent QuickFix] Fix issue #{issue_id}: {issue_data['title']}",
+        async def fetch_repository(r: Dict[str, Any]) -> Dict[str, Any]:
+            return await self.git.client.get_repository(repo_url)
+
+        async def fetch_issue(r: Dict[str, Any]) -> Dict[str, Any]:
+            return await self.git.client.get_issue(r["repository"], issue_id)
+
+        async def narrow_checkout(r: Dict[str, Any]) -> None:
+            # Check out only the directories the issue points at
+            if sparse:
+                issue_data = self.git.client.get_issue_data(r["issue"])
+                await self.git_handler.narrow_checkout(
+                    r["clone"],
+                    texts=[issue_data["title"], issue_data["body"]],
+                    labels=issue_data["labels"],
+                )
+
+        async def create_branch(r: Dict[str, Any]) -> None:
+            await self.git_handler.create_branch(r["clone"], branch_name)
+
+        async def generate(r: Dict[str, Any]) -> Dict[str, str]:
+            issue_data = self.git.client.get_issue_data(r["issue"])
+            base = await self.git_handler.head_commit(r["clone"])
+            await self.llm_client.generate_code(issue_data, str(r["clone"]))
+            patches = await self.git_handler.export_commits(r["clone"], base)
+            return {"base": base, "patches": patches}
+
+        async def restore_generated(r: Dict[str, Any], saved: Dict[str, str]) -> None:
+            await self.git_handler.import_commits(r["clone"], saved["patches"])
+
+        async def push(r: Dict[str, Any]) -> str:
+            await self.git_handler.push_branch(r["clone"], branch_name)
+            return branch_name
+
+        async def create_pull_request(r: Dict[str, Any]) -> Dict[str, Any]:
+            pr = await self.git.client.create_pull_request(
+                repo=r["repository"],
+                title=f"[AI Agent QuickFix] Fix issue #{issue_id}: {r['issue']['title']}",
                 body=f"🤖 Automated fix for issue #{issue_id}",
                 head=branch_name,
                 base="main",
                 draft=False,
             )
+            return {"number": pr["number"], "html_url": pr["html_url"]}
 
-            self.git.client.add_issue_comment(issue, f"🤖 QuickFix applied. PR: #{pr.number}")
-            self.git.client.add_labels(issue, ["ai-agent", "quickfix"])
+        async def comment(r: Dict[str, Any]) -> None:
+            await self.git.client.add_issue_comment(
+                r["issue"], f"🤖 QuickFix applied. PR: #{r['pull_request']['number']}"
+            )
 
-            self.log.info("quickfix_complete", pr_number=pr.number)
+        async def label(r: Dict[str, Any]) -> None:
+            await self.git.client.add_labels(r["issue"], ["ai-agent", "quickfix"])
+
+        # Cloning overlaps with the GitHub fetches; comment and labels run together.
+        # A sparse checkout is narrowed once both the clone and the issue are available.
+        pipeline = Pipeline(
+            "quickfix",
+            [
+                Step("clone", clone),
+                Step("repository", fetch_repository),
+                Step("issue", fetch_issue, depends_on=["repository"]),
+                # Only a sparse checkout needs the issue before branching
+                Step(
+                    "checkout",
+                    narrow_checkout,
+                    depends_on=["clone", "issue"] if sparse else ["clone"],
+                ),
+                Step("branch", create_branch, depends_on=["checkout"]),
+                Step(
+                    "generate",
+                    generate,
+                    depends_on=["branch", "issue"],
+                    checkpoint=True,
+                    restore=restore_generated,
+                ),
+                Step("push", push, depends_on=["generate"], checkpoint=True),
+                Step(
+                    "pull_request",
+                    create_pull_request,
+                    depends_on=["push", "repository"],
+                    checkpoint=True,
+                ),
+                Step("comment", comment, depends_on=["pull_request", "issue"], checkpoint=True),
+                Step("labels", label, depends_on=["pull_request", "issue"], checkpoint=True),
+            ],
+            log=self.log,
+            checkpoint=checkpoint,
+        )
+
+        try:
+            results = await pipeline.run()
+            self.log.info("quickfix_complete", pr_number=results["pull_request"]["number"])
 
         finally:
-            if repo_name:
-                self.git_handler.cleanup(repo_name)
-            await self.llm_client.close()
+            await self.git_handler.cleanup(repo_path)
@@ -6,13 +6,19 @@ the requested modifications using an LLM, pushes the changes, and reacts to
 the original comment to confirm completion.
 """
 
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 import structlog
 
+from worker.checkpoints import Checkpoint
 from worker.config import settings
 from worker.git.git_client import GitClient
 from worker.git.git_handler import GitHandler
 from worker.llm_client import LLMClient
 from worker.models import TaskMessage
+from worker.pipeline import Pipeline, Step
 
 logger = structlog.get_logger()
 
@@ -44,7 +50,7 @@ class RefineMode:
         self.git = git_client
         self.llm_client = llm_client
 
-    async def execute(self, task: TaskMessage) -> None:
+    async def execute(self, task: TaskMessage, checkpoint: Optional[Checkpoint] = None) -> None:
         """
         Execute Refine Mode workflow.
 
@@ -57,6 +63,9 @@ class RefineMode:
         Args:
             task: Task message containing repo_url, pr_number, pr_branch,
                   refine_request, and comment_id.
+            checkpoint: Checkpoint of a previous attempt. The refinement commits, the
+                push and the reaction are recorded in it, and a retry resumes after the
+                last recorded stage.
 
         Raises:
             ValueError: If required fields (pr_number, pr_branch, comment_id)
@@ -85,38 +94,94 @@ class RefineMode:
             branch=pr_branch,
         )
 
-        repo_name = None
-
-        try:
-            # Get repository object
-            repo_obj = self.git.client.get_repository(repo_url)
+        repo_path = await self.git_handler.allocate(f"repo-pr-{pr_number}")
+        sparse = settings.git_sparse_checkout_enabled
 
+        async def clone(r: Dict[str, Any]) -> Path:
             # Clone repository directly on the PR branch
-            repo_name = f"repo-pr-{pr_number}"
-            repo_path = self.git_handler.shallow_clone(
-                repo_url=repo_url, target_dir=repo_name, branch=pr_branch, token=settings.github_token
+            return await self.git_handler.shallow_clone(
+                repo_url=repo_url,
+                target_dir=repo_path,
+                branch=pr_branch,
+                token=settings.github_token,
+                sparse=sparse,
             )
 
-            # Apply refinements using LLM
+        async def fetch_repository(r: Dict[str, Any]) -> Dict[str, Any]:
+            return await self.git.client.get_repository(repo_url)
+
+        async def fetch_pull_request(r: Dict[str, Any]) -> Dict[str, Any]:
+            return await self.git.client.get_issue(r["repository"], pr_number)
+
+        async def narrow_checkout(r: Dict[str, Any]) -> None:
+            # Check out only the directories the request and the PR labels point at
+            if sparse:
+                pr_data = self.git.client.get_issue_data(r["pull_request"])
+                await self.git_handler.narrow_checkout(
+                    r["clone"], texts=[refine_request], labels=pr_data["labels"]
+                )
+
+        async def refine(r: Dict[str, Any]) -> Dict[str, str]:
             self.log.info("applying_refinements", msg="Applying code refinements")
-            await self.llm_client.refine_code(refine_request, str(repo_path))
+            base = await self.git_handler.head_commit(r["clone"])
+            await self.llm_client.refine_code(refine_request, str(r["clone"]))
+            patches = await self.git_handler.export_commits(r["clone"], base)
+            return {"base": base, "patches": patches}
+
+        async def restore_refined(r: Dict[str, Any], saved: Dict[str, str]) -> None:
+            await self.git_handler.import_commits(r["clone"], saved["patches"])
 
-            # Push changes
+        async def push(r: Dict[str, Any]) -> str:
             self.log.info("pushing_changes", msg="Pushing refined code")
-            self.git_handler.push_branch(repo_path, pr_branch)
+            await self.git_handler.push_branch(r["clone"], pr_branch)
+            return pr_branch
 
-            # Add rocket reaction to the refine comment
+        async def react(r: Dict[str, Any]) -> None:
+            # Add rocket reaction to the refine comment, and to the ones merged into it
             self.log.info("adding_reaction", msg="Adding rocket reaction to refine comment")
-            issue = repo_obj.get_issue(pr_number)
-            self.git.client.add_comment_reaction(issue, comment_id, reaction="rocket")
+            await asyncio.gather(
+                *(
+                    self.git.client.add_comment_reaction(r["pull_request"], cid, reaction="rocket")
+                    for cid in [comment_id, *task.extra_comment_ids]
+                )
+            )
+
+        pipeline = Pipeline(
+            "refine",
+            [
+                Step("clone", clone),
+                Step("repository", fetch_repository),
+                Step("pull_request", fetch_pull_request, depends_on=["repository"]),
+                # Only a sparse checkout needs the pull request before refining
+                Step(
+                    "checkout",
+                    narrow_checkout,
+                    depends_on=["clone", "pull_request"] if sparse else ["clone"],
+                ),
+                Step(
+                    "refine",
+                    refine,
+                    depends_on=["checkout"],
+                    checkpoint=True,
+                    restore=restore_refined,
+                ),
+                Step("push", push, depends_on=["refine"], checkpoint=True),
+                Step("reaction", react, depends_on=["push", "pull_request"], checkpoint=True),
+            ],
+            log=self.log,
+            checkpoint=checkpoint,
+        )
 
-            self.log.info("refine_complete", msg="Refine mode completed successfully", pr_number=pr_number)
+        try:
+            await pipeline.run()
+
+            self.log.info(
+                "refine_complete", msg="Refine mode completed successfully", pr_number=pr_number
+            )
 
         except Exception as e:
             self.log.error("refine_failed", msg="Refine mode failed", error=str(e), exc_info=True)
             raise
 
         finally:
-            if repo_name:
-                self.git_handler.cleanup(repo_name)
-            await self.llm_client.close()
+            await self.git_handler.cleanup(repo_path)
@@ -0,0 +1,226 @@
+"""Dependency-graph runner for the steps of a task.
+
+Mode workflows are declared as named steps with dependencies. Steps whose
+dependencies have finished run concurrently, so independent work such as
+cloning the repository and fetching the issue from GitHub overlaps.
+
+Steps marked ``checkpoint`` save their result to the task's checkpoint when
+they complete. When a retried task runs the pipeline again, those steps are
+skipped and their saved result is used instead, and steps only needed to
+feed them (the clone, the LLM run) are not run at all. A checkpointed step
+whose effect lives in the discarded workspace, such as the commits produced
+by the LLM, provides a ``restore`` function that recreates that effect from
+the saved result when a later step still needs it.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+
+from worker.checkpoints import Checkpoint
+from worker.metrics import STAGE_DURATION
+from worker.tracing import tracer
+
+logger = structlog.get_logger()
+
+# A step receives the results of the steps that already finished, keyed by step name
+StepFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+# A restore function also receives the result saved by the original run
+RestoreFunc = Callable[[Dict[str, Any], Any], Awaitable[Any]]
+
+
+@dataclass
+class Step:
+    """A named unit of work and the steps it depends on."""
+
+    name: str
+    func: StepFunc
+    depends_on: Sequence[str] = field(default_factory=tuple)
+    checkpoint: bool = False
+    restore: Optional[RestoreFunc] = None
+
+
+class Pipeline:
+    """Run steps as soon as their dependencies complete, recording per-step timings.
+
+    Step durations are also observed in the ``ai_agent_stage_duration_seconds``
+    histogram, labelled with the pipeline name as the mode.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        steps: List[Step],
+        log: Optional[Any] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            name: Pipeline name used in log events and as the metrics mode label
+            steps: Steps in declaration order. A step may only depend on steps declared
+                before it, which keeps the graph acyclic.
+            log: Bound logger. Uses the module logger if not provided.
+            checkpoint: Checkpoint to resume from and record completed steps in. Every
+                step runs if not provided.
+
+        Raises:
+            ValueError: If a step name is duplicated or a dependency is not declared before
+                the step using it
+        """
+        seen: set = set()
+        for step in steps:
+            if step.name in seen:
+                raise ValueError(f"Duplicate pipeline step: {step.name}")
+            missing = [dep for dep in step.depends_on if dep not in seen]
+            if missing:
+                raise ValueError(f"Step {step.name} depends on undeclared steps: {missing}")
+            seen.add(step.name)
+
+        self.name = name
+        self.steps = steps
+        self.log = (log or logger).bind(pipeline=name)
+        self.checkpoint = checkpoint
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self._errors: List[BaseException] = []
+
+    def _plan(self, saved: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Decide how each step is handled given the saved results.
+
+        Returns:
+            Action per step: ``run``, ``restore`` (recreate from the saved result) or
+            ``saved`` (use the saved result as is). Steps missing from the plan are not
+            needed by any unfinished step and are skipped.
+        """
+        by_name = {step.name: step for step in self.steps}
+        has_dependents = {dep for step in self.steps for dep in step.depends_on}
+        plan: Dict[str, str] = {}
+
+        def need(name: str) -> None:
+            if name in plan:
+                return
+            step = by_name[name]
+            if step.checkpoint and name in saved:
+                plan[name] = "saved" if step.restore is None else "restore"
+                if step.restore is None:
+                    return
+            else:
+                plan[name] = "run"
+            for dep in step.depends_on:
+                need(dep)
+
+        # Unfinished checkpointed steps and final steps must run; the rest runs on demand
+        for step in self.steps:
+            if step.checkpoint and step.name not in saved:
+                need(step.name)
+            elif not step.checkpoint and step.name not in has_dependents:
+                need(step.name)
+        return plan
+
+    async def _run_step(
+        self, step: Step, tasks: Dict[str, "asyncio.Task[Any]"], restoring: bool = False
+    ) -> Any:
+        """Wait for the step's dependencies, then run (or restore) it."""
+        for dep in step.depends_on:
+            if dep in tasks:
+                await tasks[dep]
+
+        started = time.monotonic()
+        try:
+            with tracer.start_as_current_span(f"step.{step.name}"):
+                if restoring:
+                    await step.restore(self.results, self.checkpoint.stages[step.name])
+                    result = self.checkpoint.stages[step.name]
+                else:
+                    result = await step.func(self.results)
+                    if step.checkpoint and self.checkpoint is not None:
+                        await self.checkpoint.record(step.name, result)
+        except Exception as e:
+            self.timings[step.name] = round(time.monotonic() - started, 3)
+            STAGE_DURATION.labels(self.name, step.name, "failure").observe(self.timings[step.name])
+            self._errors.append(e)
+            self.log.error(
+                "step_failed",
+                msg="Pipeline step failed",
+                step=step.name,
+                duration_seconds=self.timings[step.name],
+                error=str(e),
+            )
+            raise
+
+        self.timings[step.name] = round(time.monotonic() - started, 3)
+        STAGE_DURATION.labels(self.name, step.name, "success").observe(self.timings[step.name])
+        self.results[step.name] = result
+        self.log.info(
+            "step_completed",
+            msg="Pipeline step completed",
+            step=step.name,
+            duration_seconds=self.timings[step.name],
+            restored=restoring,
+        )
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every needed step, stopping at the first failure.
+
+        Returns:
+            Step results keyed by step name
+
+        Raises:
+            Exception: The first exception raised by a step. Steps still running are
+                cancelled before it is re-raised.
+        """
+        started = time.monotonic()
+        saved = self.checkpoint.stages if self.checkpoint is not None else {}
+        plan = self._plan(saved)
+        if saved:
+            self.log.info(
+                "pipeline_resumed",
+                msg="Resuming pipeline from checkpoint",
+                completed=list(saved),
+                skipped=[step.name for step in self.steps if step.name not in plan],
+            )
+
+        tasks: Dict[str, asyncio.Task[Any]] = {}
+        for step in self.steps:
+            action = plan.get(step.name)
+            if action == "saved":
+                self.results[step.name] = saved[step.name]
+            elif action is not None:
+                tasks[step.name] = asyncio.create_task(
+                    self._run_step(step, tasks, restoring=action == "restore")
+                )
+
+        try:
+            if tasks:
+                await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        total = round(time.monotonic() - started, 3)
+        if self._errors:
+            self.log.error(
+                "pipeline_failed",
+                msg="Pipeline failed",
+                duration_seconds=total,
+                timings=self.timings,
+            )
+            raise self._errors[0]
+
+        self.log.info(
+            "pipeline_completed",
+            msg="Pipeline completed",
+            duration_seconds=total,
+            timings=self.timings,
+        )
+        return self.results
@@ -0,0 +1,377 @@
+"""Forkserver process mode: run each task in a process forked from an import-warm server.
+
+With ``worker_process_mode=forkserver`` the worker starts a fork server at
+startup that imports the worker and its task modes once. Every task then runs in
+a child forked from that server: the child starts in milliseconds with all
+modules already imported, and everything it allocated (memory, threads, leaked
+file handles) is released when the task ends, so a long-lived worker does not
+grow with the tasks it ran.
+
+The parent keeps consuming, coalescing and acknowledging messages, and exports
+the task and capacity metrics. The resource limits become semaphores shared with
+the children, so ``max_concurrent_llm_calls`` and the git and GitHub limits still
+hold across tasks; LLM slots are then granted in arrival order rather than by
+priority. Every process counts the slots it holds, so when a task process dies
+holding one (killed, out of memory) the worker releases it once the process has
+exited. Each child builds its own clients: the warm Aider pool, the GitHub
+response cache and the router's backend health are not shared, and the stage
+metrics recorded inside the children are not exported.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from multiprocessing import forkserver
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+from opentelemetry import propagate
+
+from worker.concurrency import current_priority, limits
+from worker.config import settings
+from worker.models import TaskMessage
+
+logger = structlog.get_logger()
+
+# Modules imported once by the fork server, so the task processes start warm
+PRELOAD = [
+    "worker.main",
+    "worker.prefork",
+    "worker.modes.quickfix_mode",
+    "worker.modes.refine_mode",
+    "worker.modes.batch_quickfix_mode",
+]
+
+# Seconds a thread blocks on a shared semaphore at a time, so the thread of a
+# cancelled wait is freed soon after
+ACQUIRE_TIMEOUT = 1.0
+
+# Seconds a cancelled task process has to clean up before it is killed
+TERMINATE_TIMEOUT = 30.0
+
+_context = multiprocessing.get_context("forkserver")
+
+# Index of this process in the per-process counters of the shared semaphores: 0 in
+# the worker, assigned by the worker in each task process
+_process_index = 0
+
+# Indexes free for the next task process
+_free_indexes: "asyncio.Queue[int]"
+
+
+class SharedSemaphore:
+    """
+    Semaphore shared by the worker and its task processes, used with ``async with``.
+
+    Each process counts the slots it holds and the tasks it has waiting, so the
+    worker can release what a task process left behind with ``reclaim``.
+    """
+
+    def __init__(self, value: int, processes: int):
+        """
+        Initialize semaphore.
+
+        Args:
+            value: Number of slots
+            processes: Number of task processes that may run at once
+        """
+        self._size = value
+        self._semaphore = _context.BoundedSemaphore(value)
+        self._held = _context.Array("i", processes + 1)
+        self._waiting = _context.Array("i", processes + 1)
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots currently held, across processes."""
+        return self._size - self._semaphore.get_value()
+
+    @property
+    def waiting(self) -> int:
+        """Number of tasks waiting for a slot, across processes."""
+        return sum(self._waiting[:])
+
+    async def acquire(self) -> bool:
+        """Acquire a slot without blocking the event loop."""
+        if not self._semaphore.acquire(block=False):
+            _count(self._waiting, 1)
+            try:
+                await self._wait_for_slot()
+            finally:
+                _count(self._waiting, -1)
+        _count(self._held, 1)
+        return True
+
+    async def _wait_for_slot(self) -> None:
+        """Block on the semaphore in a thread until a slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            attempt = loop.run_in_executor(None, self._semaphore.acquire, True, ACQUIRE_TIMEOUT)
+            try:
+                if await asyncio.shield(attempt):
+                    return
+            except asyncio.CancelledError:
+                # The thread may still take a slot after the wait was cancelled
+                attempt.add_done_callback(self._release_unused)
+                raise
+
+    def _release_unused(self, attempt: "asyncio.Future[bool]") -> None:
+        if not attempt.cancelled() and attempt.exception() is None and attempt.result():
+            self._semaphore.release()
+
+    def release(self) -> None:
+        """Release a slot."""
+        _count(self._held, -1)
+        self._semaphore.release()
+
+    def reclaim(self, index: int) -> int:
+        """
+        Release the slots an exited task process still held and forget its waiting tasks.
+
+        Args:
+            index: Index of the task process
+
+        Returns:
+            Number of slots released
+        """
+        with self._held.get_lock():
+            held = self._held[index]
+            self._held[index] = 0
+        with self._waiting.get_lock():
+            self._waiting[index] = 0
+        for _ in range(held):
+            self._semaphore.release()
+        return held
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+def _count(counters: Any, delta: int) -> None:
+    """Add to this process's entry of per-process counters."""
+    with counters.get_lock():
+        counters[_process_index] += delta
+
+
+def _shared_limits() -> Dict[str, SharedSemaphore]:
+    return {
+        "llm": limits.llm,
+        "git_network": limits.git_network,
+        "github_api": limits.github_api,
+    }
+
+
+async def start() -> None:
+    """
+    Start the fork server and share the resource limits with the task processes.
+
+    Returns once the fork server has imported the worker modules, so the first task
+    does not pay for the imports.
+    """
+    global _free_indexes
+
+    started = time.monotonic()
+    # The lanes' prefetch counts bound the tasks, and so the task processes, at once
+    processes = settings.max_concurrent_tasks + settings.max_concurrent_refine_tasks
+    limits.llm = SharedSemaphore(settings.max_concurrent_llm_calls, processes)
+    limits.git_network = SharedSemaphore(settings.max_concurrent_git_network_ops, processes)
+    limits.github_api = SharedSemaphore(settings.max_concurrent_github_calls, processes)
+    _free_indexes = asyncio.Queue()
+    for index in range(1, processes + 1):
+        _free_indexes.put_nowait(index)
+
+    _context.set_forkserver_preload(PRELOAD)
+    forkserver.ensure_running()
+    # The server accepts its first fork once the preloaded modules are imported
+    process = _context.Process(target=os.getpid, daemon=True)
+    process.start()
+    await _wait(process)
+
+    logger.info(
+        "forkserver_started",
+        msg="Fork server ready, tasks run in forked processes",
+        preload=PRELOAD,
+        duration_seconds=round(time.monotonic() - started, 3),
+    )
+
+
+async def _wait(process: multiprocessing.process.BaseProcess) -> None:
+    """Wait for a process to exit without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    loop.add_reader(process.sentinel, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(process.sentinel)
+    process.join()
+
+
+async def run_task(
+    task: TaskMessage,
+    log: structlog.typing.FilteringBoundLogger,
+    task_id: Optional[str],
+    log_context: Dict[str, Any],
+) -> None:
+    """
+    Run a task in a process forked from the fork server.
+
+    Cancelling the call (e.g. at the end of the graceful shutdown) cancels the task
+    in the child, which cleans up its workspace and subprocesses before exiting.
+    Shared slots the child still held when it exited are released.
+
+    Args:
+        task: Task to run
+        log: Logger bound to the task context
+        task_id: Key of the task's checkpoint, stable across redeliveries, if any
+        log_context: Fields the child binds to its logger
+
+    Raises:
+        RuntimeError: If the task failed in the child process
+    """
+    # The child continues the current trace
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+
+    index = await _free_indexes.get()
+    reader, writer = _context.Pipe(duplex=False)
+    process = _context.Process(
+        target=_task_process,
+        args=(task, task_id, log_context, carrier, _shared_limits(), index, writer),
+        name=f"task-{task_id or 'unkeyed'}",
+        daemon=True,
+    )
+    try:
+        started = time.monotonic()
+        process.start()
+        writer.close()
+        log.info(
+            "task_process_started",
+            msg="Running task in a forked process",
+            pid=process.pid,
+            start_seconds=round(time.monotonic() - started, 4),
+        )
+
+        try:
+            await _wait(process)
+        except asyncio.CancelledError:
+            process.terminate()
+            try:
+                await asyncio.wait_for(_wait(process), TERMINATE_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await _wait(process)
+            raise
+        finally:
+            try:
+                error = reader.recv() if reader.poll() else None
+            except EOFError:
+                error = None
+            reader.close()
+    finally:
+        # An index is reused only once its process is gone
+        if not process.is_alive():
+            _reclaim_slots(index, log)
+            _free_indexes.put_nowait(index)
+
+    if process.exitcode != 0:
+        raise RuntimeError(error or f"Task process exited with code {process.exitcode}")
+
+
+def _reclaim_slots(index: int, log: structlog.typing.FilteringBoundLogger) -> None:
+    """Release the shared slots an exited task process did not release itself."""
+    for name, semaphore in _shared_limits().items():
+        released = semaphore.reclaim(index)
+        if released:
+            log.warning(
+                "task_process_slots_reclaimed",
+                msg="Released shared slots held by an exited task process",
+                limit=name,
+                slots=released,
+            )
+
+
+def _task_process(
+    task: TaskMessage,
+    task_id: Optional[str],
+    log_context: Dict[str, Any],
+    carrier: Dict[str, str],
+    shared: Dict[str, SharedSemaphore],
+    index: int,
+    conn: Connection,
+) -> None:
+    """Entry point of a task process: run the task and report its error to the parent."""
+    global _process_index
+
+    _process_index = index
+    limits.llm = shared["llm"]
+    limits.git_network = shared["git_network"]
+    limits.github_api = shared["github_api"]
+
+    error: Optional[str] = None
+    try:
+        asyncio.run(_run_in_child(task, task_id, log_context, carrier))
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+    conn.send(error)
+    conn.close()
+    if error is not None:
+        sys.exit(1)
+
+
+async def _run_in_child(
+    task: TaskMessage,
+    task_id: Optional[str],
+    log_context: Dict[str, Any],
+    carrier: Dict[str, str],
+) -> None:
+    """Create the task's clients in the child and run the task."""
+    # Imported by the fork server already; never imported in the worker process itself,
+    # which runs worker.main as __main__
+    from worker import main
+    from worker.checkpoints import CheckpointStore
+    from worker.git.git_client import GitClient
+    from worker.git.git_handler import GitHandler
+    from worker.llm_client import LLMClient
+    from worker.tracing import (
+        bind_trace_to_logs,
+        extract_context,
+        setup_tracing,
+        shutdown_tracing,
+        tracer,
+    )
+
+    # The parent terminates the child when the task is cancelled
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    current_priority.set(log_context["priority"])
+    log = logger.bind(**log_context, task_process=os.getpid())
+
+    setup_tracing()
+    main.git_handler = GitHandler()
+    main.git_client = GitClient()
+    main.llm_client = LLMClient(provider=settings.llm_provider, model=settings.llm_model)
+    main.llm_client.start()
+    if settings.checkpoints_enabled:
+        main.checkpoints = CheckpointStore(Path(settings.workspace_dir) / "checkpoints")
+
+    try:
+        with (
+            tracer.start_as_current_span("task_process", context=extract_context(carrier)) as span,
+            bind_trace_to_logs(span),
+        ):
+            await main.run_task(task, log, task_id)
+    except Exception:
+        log.error("task_process_failed", msg="Task failed in its process", exc_info=True)
+        raise
+    finally:
+        await main.llm_client.close()
+        await main.git_client.close()
+        await main.git_handler.close()
+        shutdown_tracing()
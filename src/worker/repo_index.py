@@ -0,0 +1,290 @@
+"""Persistent per-repository index of files, sizes and symbols.
+
+Every task works on a fresh checkout, so walking and parsing the whole tree on
+each run is wasted work on large repositories. The index is stored next to the
+workspace, keyed by the commit it describes, and when the repository moves
+forward it is updated from ``git diff --name-only`` instead of being rebuilt.
+
+Sparse checkouts only have part of the tree on disk. Their index lists every
+tracked file, but files outside the cone have no size or symbols; such a
+partial index is never stored, while a stored full index is still used.
+"""
+
+import asyncio
+import json
+import os
+import re
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import structlog
+
+from worker.config import settings
+from worker.git.command import run_git
+from worker.git.repo_cache import RepoCache
+from worker.git.sparse import is_sparse
+
+logger = structlog.get_logger()
+
+INDEX_VERSION = 1
+
+# Files larger than this are listed but not parsed for symbols
+MAX_PARSED_FILE_BYTES = 256 * 1024
+
+_PY = [r"^\s*(?:async\s+)?def\s+(\w+)", r"^\s*class\s+(\w+)"]
+_JS = [
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\*?\s+(\w+)",
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)",
+    r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>",
+    r"^\s*(?:export\s+)?(?:interface|type|enum)\s+(\w+)",
+]
+_JVM = [
+    r"^\s*(?:public|private|protected|internal|abstract|final|static|sealed|data|\s)*"
+    r"(?:class|interface|enum|record|object)\s+(\w+)",
+    r"^\s*(?:public|private|protected|static|final|synchronized|\s)+[\w<>\[\], ]+\s+(\w+)\s*\(",
+    r"^\s*(?:private\s+|public\s+|internal\s+)?fun\s+(?:<[^>]+>\s*)?(?:\w+\.)?(\w+)",
+]
+
+_LANGUAGES = [
+    ((".py", ".pyi"), _PY),
+    ((".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"), _JS),
+    ((".java", ".kt", ".kts", ".scala", ".cs"), _JVM),
+    ((".go",), [r"^func\s+(?:\([^)]*\)\s*)?(\w+)", r"^type\s+(\w+)"]),
+    (
+        (".rs",),
+        [
+            r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+(\w+)",
+            r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait)\s+(\w+)",
+        ],
+    ),
+    ((".rb",), [r"^\s*def\s+(?:self\.)?(\w+[?!]?)", r"^\s*(?:class|module)\s+(\w+)"]),
+    ((".php",), [r"^\s*(?:\w+\s+)*function\s+(\w+)", r"^\s*(?:\w+\s+)*class\s+(\w+)"]),
+    (
+        (".c", ".h", ".cc", ".cpp", ".hpp"),
+        [r"^[A-Za-z_][\w\*\s]*?\b(\w+)\s*\([^;]*$", r"^\s*(?:struct|class)\s+(\w+)"],
+    ),
+]
+
+SYMBOL_PATTERNS: Dict[str, List[re.Pattern]] = {
+    ext: [re.compile(pattern) for pattern in patterns]
+    for exts, patterns in _LANGUAGES
+    for ext in exts
+}
+
+
+@dataclass
+class FileEntry:
+    """Indexed information about one tracked file."""
+
+    size: int
+    symbols: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RepoIndex:
+    """Index of a repository at one commit."""
+
+    commit: str
+    files: Dict[str, FileEntry]
+
+    def render_map(self, paths: Optional[Iterable[str]] = None, max_chars: int = 8000) -> str:
+        """
+        Render a compact repository map (one line per file with its symbols).
+
+        Args:
+            paths: Files to include, in order. All files if not provided.
+            max_chars: Maximum size of the rendered map
+
+        Returns:
+            Map such as ``src/app.py: create_app, App``
+        """
+        lines: List[str] = []
+        used = 0
+        for path in paths if paths is not None else sorted(self.files):
+            entry = self.files.get(path)
+            if entry is None:
+                continue
+            line = f"{path}: {', '.join(entry.symbols[:20])}" if entry.symbols else path
+            if used + len(line) + 1 > max_chars:
+                lines.append(f"... ({len(self.files) - len(lines)} more files)")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
+
+
+def extract_symbols(path: Path) -> List[str]:
+    """
+    Extract top-level symbol names (functions, classes, types) from a source file.
+
+    Args:
+        path: File to parse
+
+    Returns:
+        Symbol names in file order, without duplicates
+    """
+    patterns = SYMBOL_PATTERNS.get(path.suffix.lower())
+    if not patterns:
+        return []
+
+    try:
+        text = path.read_text(errors="ignore")
+    except OSError:
+        return []
+
+    symbols: List[str] = []
+    seen = set()
+    for line in text.splitlines():
+        for pattern in patterns:
+            match = pattern.match(line)
+            if match and match.group(1) not in seen:
+                seen.add(match.group(1))
+                symbols.append(match.group(1))
+                break
+    return symbols
+
+
+def _scan(
+    repo_path: Path, paths: Iterable[str], keep_missing: bool = False
+) -> Dict[str, FileEntry]:
+    """
+    Stat and parse the given files (runs in a worker thread).
+
+    Files missing from disk are skipped, or listed without size and symbols when
+    ``keep_missing`` is set (files outside a sparse checkout).
+    """
+    entries: Dict[str, FileEntry] = {}
+    for rel in paths:
+        full = repo_path / rel
+        try:
+            size = full.stat().st_size
+        except OSError:
+            if keep_missing:
+                entries[rel] = FileEntry(size=0, symbols=[])
+            continue
+        symbols = extract_symbols(full) if size <= MAX_PARSED_FILE_BYTES else []
+        entries[rel] = FileEntry(size=size, symbols=symbols)
+    return entries
+
+
+class RepoIndexStore:
+    """Load, update and persist repository indexes."""
+
+    def __init__(self, index_dir: Path):
+        """
+        Initialize index store.
+
+        Args:
+            index_dir: Directory holding one index file per repository
+        """
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.log = logger.bind(index_dir=str(self.index_dir))
+        self._memory: Dict[str, RepoIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _git(self, repo_path: Path, *args: str) -> str:
+        return await run_git(
+            list(args), cwd=repo_path, timeout=settings.git_command_timeout, log=self.log
+        )
+
+    def _load(self, key: str) -> Optional[RepoIndex]:
+        """Load an index from memory or disk."""
+        if key in self._memory:
+            return self._memory[key]
+
+        index_file = self.index_dir / f"{key}.json"
+        try:
+            data = json.loads(index_file.read_text())
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+
+        files = {path: FileEntry(**entry) for path, entry in data["files"].items()}
+        return RepoIndex(commit=data["commit"], files=files)
+
+    def _save(self, key: str, index: RepoIndex) -> None:
+        """Persist an index atomically."""
+        index_file = self.index_dir / f"{key}.json"
+        tmp_file = index_file.with_suffix(f".{os.getpid()}.tmp")
+        data = {
+            "version": INDEX_VERSION,
+            "commit": index.commit,
+            "files": {path: asdict(entry) for path, entry in index.files.items()},
+        }
+        tmp_file.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_file, index_file)
+
+    async def load_or_build(self, repo_path: Path) -> RepoIndex:
+        """
+        Return the index of a checkout, updating the stored index if needed.
+
+        Args:
+            repo_path: Path to the checkout
+
+        Returns:
+            Index describing the checkout's HEAD commit
+        """
+        repo_path = Path(repo_path)
+        origin = (await self._git(repo_path, "remote", "get-url", "origin")).strip()
+        key = RepoCache.repo_key(origin)
+        head = (await self._git(repo_path, "rev-parse", "HEAD")).strip()
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            cached = self._load(key)
+            if cached is not None and cached.commit == head:
+                self._memory[key] = cached
+                self.log.info("repo_index_hit", msg="Repository index up to date", commit=head)
+                return cached
+
+            sparse = await is_sparse(repo_path)
+            index = None
+            if cached is not None:
+                index = await self._update(repo_path, cached, head, sparse)
+            if index is None:
+                index = await self._build(repo_path, head, sparse)
+
+            if sparse:
+                # Files outside the cone were not parsed; keep the stored index complete
+                self.log.info("repo_index_partial", msg="Sparse checkout, index not stored")
+                return index
+
+            await asyncio.to_thread(self._save, key, index)
+            self._memory[key] = index
+            return index
+
+    async def _build(self, repo_path: Path, head: str, sparse: bool = False) -> RepoIndex:
+        """Index every tracked file."""
+        paths = (await self._git(repo_path, "ls-files", "-z")).split("\0")
+        files = await asyncio.to_thread(_scan, repo_path, [p for p in paths if p], sparse)
+        self.log.info("repo_index_built", msg="Repository index built", files=len(files))
+        return RepoIndex(commit=head, files=files)
+
+    async def _update(
+        self, repo_path: Path, cached: RepoIndex, head: str, sparse: bool = False
+    ) -> Optional[RepoIndex]:
+        """Re-index only the files changed since the cached commit, if it is reachable."""
+        try:
+            output = await self._git(
+                repo_path, "diff", "--name-only", "--no-renames", "-z", cached.commit, head
+            )
+        except subprocess.CalledProcessError:
+            self.log.info("repo_index_rebuild", msg="Indexed commit not in checkout, rebuilding")
+            return None
+
+        changed = [p for p in output.split("\0") if p]
+        files = dict(cached.files)
+        for path in changed:
+            files.pop(path, None)
+        files.update(await asyncio.to_thread(_scan, repo_path, changed, sparse))
+
+        self.log.info(
+            "repo_index_updated",
+            msg="Repository index updated incrementally",
+            changed=len(changed),
+            files=len(files),
+        )
+        return RepoIndex(commit=head, files=files)
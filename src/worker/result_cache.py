@@ -0,0 +1,133 @@
+"""On-disk cache of the patches produced by LLM generations.
+
+A generation is fully determined by the commit it starts from, the model and
+the prompt (which already embeds the retrieved context), so when a task is
+retried after a push or PR failure the same request is sent again. The cache
+stores the resulting patch under a hash of those three values; on a hit the
+patch is applied with ``git apply`` and the model is not called at all.
+
+Entries are plain files, written atomically, so several workers can share the
+workspace volume. The least recently used entries are evicted once the cache
+exceeds its size budget.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import structlog
+
+from worker.config import settings
+
+logger = structlog.get_logger()
+
+
+class ResultCache:
+    """Content-addressed store of LLM patches with size-based LRU eviction."""
+
+    def __init__(self, cache_dir: Path, max_size_mb: Optional[int] = None):
+        """
+        Initialize result cache.
+
+        Args:
+            cache_dir: Directory holding the cached patches
+            max_size_mb: Total size budget for all patches. Uses settings default if not
+                provided.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = (max_size_mb or settings.llm_result_cache_max_size_mb) * 1024 * 1024
+        self.log = logger.bind(cache_dir=str(self.cache_dir))
+
+    @staticmethod
+    def key(base_sha: str, model: str, prompt: str) -> str:
+        """
+        Build the cache key of a generation.
+
+        Args:
+            base_sha: Commit the generation starts from
+            model: Engine and model producing the patch
+            prompt: Full prompt sent to the model
+
+        Returns:
+            Hex digest identifying the generation
+        """
+        digest = hashlib.sha256()
+        for part in (base_sha, model, prompt):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.patch"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Return the cached patch of a generation and mark it as recently used.
+
+        Args:
+            key: Cache key from ``key``
+
+        Returns:
+            The patch, or None on a miss
+        """
+        path = self._path(key)
+
+        def _read() -> Optional[bytes]:
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                return None
+            now = time.time()
+            os.utime(path, (now, now))
+            return data
+
+        return await asyncio.to_thread(_read)
+
+    async def put(self, key: str, patch: bytes) -> None:
+        """
+        Store the patch of a generation, evicting old entries if over budget.
+
+        Args:
+            key: Cache key from ``key``
+            patch: Binary diff produced by the generation
+        """
+        path = self._path(key)
+        tmp = path.with_suffix(f".tmp-{os.getpid()}")
+
+        def _write() -> None:
+            tmp.write_bytes(patch)
+            os.replace(tmp, path)
+
+        await asyncio.to_thread(_write)
+        self.log.info("result_cache_store", msg="Cached LLM patch", key=key, size_bytes=len(patch))
+        await self.evict()
+
+    async def discard(self, key: str) -> None:
+        """Remove an entry, e.g. when its patch no longer applies."""
+        await asyncio.to_thread(self._path(key).unlink, True)
+
+    async def evict(self) -> None:
+        """Remove least recently used patches until the cache fits its size budget."""
+
+        def _evict() -> None:
+            entries = []
+            for path in self.cache_dir.glob("*.patch"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_size_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.log.info("result_cache_evict", msg="Evicting cached patch", path=str(path))
+
+        await asyncio.to_thread(_evict)
@@ -0,0 +1,94 @@
+"""Startup timing of the worker process.
+
+A scale-from-zero event only ends when the first message is consumed, so the
+worker measures its startup from the moment the process was created (read from
+``/proc``, which includes the interpreter start-up), not from when its own code
+first ran:
+
+- ``imports``: the worker modules are imported,
+- ``ready``: the startup hooks ran and the consumers are subscribed,
+- first message: the first task was received.
+
+The phases are exported as ``ai_agent_startup_seconds`` and
+``ai_agent_time_to_first_message_seconds``, and a ready time above
+``startup_budget`` is logged as a warning. ``scripts/profile_startup.py`` breaks
+the import phase down per package.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+import structlog
+
+from worker.config import settings
+from worker.metrics import STARTUP_DURATION, TIME_TO_FIRST_MESSAGE
+
+logger = structlog.get_logger()
+
+
+def _process_age() -> Optional[float]:
+    """Return the seconds since this process was created, or None off Linux."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name, which may contain spaces; starttime is field 22
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+
+# Monotonic time at which the process started, falling back to the import of this module
+_age = _process_age()
+started_at = time.monotonic() - max(_age or 0.0, 0.0)
+
+phases: Dict[str, float] = {}
+_first_message: Optional[float] = None
+
+
+def elapsed() -> float:
+    """Return the seconds since the process started."""
+    return time.monotonic() - started_at
+
+
+def mark(phase: str) -> float:
+    """
+    Record that a startup phase was reached.
+
+    Args:
+        phase: Name of the phase (imports, ready)
+
+    Returns:
+        Seconds since the process started
+    """
+    seconds = elapsed()
+    phases[phase] = round(seconds, 3)
+    STARTUP_DURATION.labels(phase).set(seconds)
+    return seconds
+
+
+def ready() -> None:
+    """Record that the worker consumes messages and check the startup budget."""
+    seconds = mark("ready")
+    log = logger.bind(phases=phases, budget_seconds=settings.startup_budget)
+    if settings.startup_budget and seconds > settings.startup_budget:
+        log.warning("startup_budget_exceeded", msg="Worker took longer than its startup budget")
+    else:
+        log.info("worker_ready", msg="Worker consuming messages")
+
+
+def first_message() -> None:
+    """Record the time to the first message consumed, once per process."""
+    global _first_message
+
+    if _first_message is not None:
+        return
+    _first_message = elapsed()
+    TIME_TO_FIRST_MESSAGE.set(_first_message)
+    logger.info(
+        "first_message",
+        msg="First message consumed",
+        seconds_since_start=round(_first_message, 3),
+    )
@@ -0,0 +1,129 @@
+"""OpenTelemetry tracing for the worker.
+
+``process_task`` opens the root span of every task, continuing the trace found in
+the RabbitMQ message headers (W3C ``traceparent``) when the producer sent one.
+Pipeline steps, git operations, GitHub API calls and Aider runs are child spans.
+The trace and span IDs are bound into the structlog context so every log line
+of a task can be matched with its trace.
+
+Spans are exported according to ``tracing_exporter``:
+
+- ``none``: tracing disabled (spans are no-ops)
+- ``file``: one JSON object per span appended to ``tracing_file_path``
+- ``console``: spans printed to stdout
+- ``otlp``: OTLP over HTTP (requires ``opentelemetry-exporter-otlp-proto-http``)
+
+Only the OpenTelemetry API is imported at startup; the SDK and exporters (see
+``worker.tracing_exporters``) are loaded when an exporter is configured.
+"""
+
+import functools
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Iterator,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+import structlog
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+
+from worker.config import settings
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+
+logger = structlog.get_logger()
+
+tracer = trace.get_tracer("worker")
+
+T = TypeVar("T")
+
+_provider: Optional["TracerProvider"] = None
+
+
+def setup_tracing() -> None:
+    """Install the tracer provider and exporter configured in the settings."""
+    global _provider
+
+    if settings.tracing_exporter == "none":
+        return
+
+    # The SDK is only imported when spans are exported
+    from worker.tracing_exporters import build_provider
+
+    _provider = build_provider(settings.tracing_exporter)
+    trace.set_tracer_provider(_provider)
+    logger.info("tracing_enabled", msg="Exporting traces", exporter=settings.tracing_exporter)
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def extract_context(headers: Optional[Mapping[str, Any]]) -> Context:
+    """
+    Extract the parent trace context from message headers.
+
+    Args:
+        headers: RabbitMQ message headers
+
+    Returns:
+        Context holding the remote parent span, or an empty context
+    """
+    carrier = {key: str(value) for key, value in (headers or {}).items()}
+    return propagate.extract(carrier)
+
+
+@contextmanager
+def bind_trace_to_logs(span: trace.Span) -> Iterator[None]:
+    """Bind the span's trace and span IDs into the structlog context."""
+    span_context = span.get_span_context()
+    if not span_context.is_valid:
+        yield
+        return
+
+    with structlog.contextvars.bound_contextvars(
+        trace_id=trace.format_trace_id(span_context.trace_id),
+        span_id=trace.format_span_id(span_context.span_id),
+    ):
+        yield
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Run a coroutine function inside a child span.
+
+    Exceptions are recorded on the span, which is marked as failed.
+
+    Args:
+        name: Span name, such as ``git.push_branch``
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Set attributes on the current span, skipping None values."""
+    span = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, value)
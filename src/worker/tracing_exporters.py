@@ -0,0 +1,61 @@
+"""Span exporters and tracer provider, imported only when tracing is enabled."""
+
+import json
+import threading
+from typing import Sequence
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+
+from worker.config import settings
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        """
+        Initialize exporter.
+
+        Args:
+            path: File the spans are appended to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(json.loads(span.to_json())) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(lines)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def build_exporter(name: str) -> SpanExporter:
+    """Create a span exporter by name (file, console or otlp)."""
+    if name == "file":
+        return JsonLinesSpanExporter(settings.tracing_file_path)
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+def build_provider(exporter: str) -> TracerProvider:
+    """Create a tracer provider exporting spans with the named exporter."""
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(build_exporter(exporter)))
+    return provider
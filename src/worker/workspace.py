@@ -0,0 +1,266 @@
+"""Per-task working directories with a disk budget and background cleanup.
+
+Every task gets its own directory under ``WORKSPACE_DIR/tasks`` with a unique
+suffix, so two tasks for the same issue number on different repositories, or
+a retry racing a slow cleanup, never share a checkout. Finished directories
+are renamed into a trash directory, which is instant, and deleted by a
+background thread so large checkouts do not hold up the task.
+
+Before a directory is handed out, the trash and directories abandoned by
+crashed runs are evicted until the task directories fit
+``workspace_max_size_mb``. Sizes are cached, so handing out a directory does
+not walk the running checkouts: a task's checkout is measured once it is
+complete (``measure``), other directories once, as they no longer grow.
+Checkouts can be placed on a memory-backed filesystem (``workspace_tmpfs_dir``)
+while it has enough free space, falling back to disk otherwise.
+"""
+
+import asyncio
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import structlog
+
+from worker.config import settings
+from worker.git.repo_cache import dir_size
+
+logger = structlog.get_logger()
+
+TRASH_DIR = ".trash"
+
+
+class WorkspaceFullError(OSError):
+    """Raised when the task directories exceed the disk budget even after eviction."""
+
+
+class WorkspaceManager:
+    """Hand out unique task directories and clean them up in the background."""
+
+    def __init__(
+        self,
+        workspace_dir: Optional[Path] = None,
+        max_size_mb: Optional[int] = None,
+        tmpfs_dir: Optional[Path] = None,
+    ):
+        """
+        Initialize workspace manager.
+
+        Args:
+            workspace_dir: Root of the worker workspace. Uses settings default if not
+                provided.
+            max_size_mb: Disk budget for task directories (0 disables the limit). Uses
+                settings default if not provided.
+            tmpfs_dir: Memory-backed directory for checkouts. Uses settings default if not
+                provided; disk is used when unset or unavailable.
+        """
+        self.root = Path(workspace_dir or settings.workspace_dir) / "tasks"
+        self.root.mkdir(parents=True, exist_ok=True)
+        if max_size_mb is None:
+            max_size_mb = settings.workspace_max_size_mb
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.log = logger.bind(workspace=str(self.root))
+
+        self.tmpfs_root: Optional[Path] = None
+        tmpfs_dir = tmpfs_dir or settings.workspace_tmpfs_dir
+        if tmpfs_dir:
+            try:
+                self.tmpfs_root = Path(tmpfs_dir) / "tasks"
+                self.tmpfs_root.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                self.log.warning(
+                    "tmpfs_unavailable",
+                    msg="Cannot use tmpfs workspace, falling back to disk",
+                    path=str(tmpfs_dir),
+                    error=str(e),
+                )
+                self.tmpfs_root = None
+
+        # Directories handed out and not yet released
+        self._leases: Set[Path] = set()
+        # Known sizes of directories under the task roots, in bytes
+        self._sizes: Dict[Path, int] = {}
+        self._deletions: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    def _roots(self) -> List[Path]:
+        return [root for root in (self.root, self.tmpfs_root) if root is not None]
+
+    def _pick_root(self) -> Path:
+        """Use tmpfs while it has room for another checkout, disk otherwise."""
+        if self.tmpfs_root is not None:
+            free = shutil.disk_usage(self.tmpfs_root).free
+            if free >= settings.workspace_tmpfs_min_free_mb * 1024 * 1024:
+                return self.tmpfs_root
+            self.log.info(
+                "tmpfs_full", msg="tmpfs workspace is low on space, using disk", free_bytes=free
+            )
+        return self.root
+
+    async def allocate(self, prefix: str) -> Path:
+        """
+        Create a new, empty directory for a task.
+
+        Args:
+            prefix: Readable part of the directory name, e.g. ``repo-42``
+
+        Returns:
+            Path of the directory
+
+        Raises:
+            WorkspaceFullError: If the budget is still exceeded after eviction
+        """
+        async with self._lock:
+            await self.evict()
+            path = self._pick_root() / f"{prefix}-{uuid.uuid4().hex[:8]}"
+            path.mkdir(parents=True)
+            self._leases.add(path)
+
+        self.log.info("workspace_allocated", msg="Allocated task directory", path=str(path))
+        return path
+
+    async def measure(self, path: Path) -> None:
+        """
+        Record the size of a leased task directory, e.g. once its checkout is complete.
+
+        Args:
+            path: Directory returned by ``allocate``
+        """
+        if self.max_size_bytes and path in self._leases:
+            self._sizes[path] = await asyncio.to_thread(dir_size, path)
+
+    async def release(self, path: Path) -> None:
+        """
+        Discard a task directory without waiting for its deletion.
+
+        The directory is renamed into the trash of its filesystem and removed by a
+        background thread.
+
+        Args:
+            path: Directory returned by ``allocate``
+        """
+        self._leases.discard(path)
+        size = self._sizes.pop(path, None)
+        if not path.exists():
+            return
+
+        trash = path.parent / TRASH_DIR
+        trash.mkdir(exist_ok=True)
+        target = trash / f"{path.name}-{uuid.uuid4().hex[:8]}"
+        try:
+            path.rename(target)
+        except OSError:
+            # Not renameable (e.g. busy mount); delete it in place instead
+            target = path
+        if size is not None:
+            self._sizes[target] = size
+
+        task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, target, True))
+        self._deletions.add(task)
+        task.add_done_callback(self._deletions.discard)
+        self.log.info("workspace_released", msg="Task directory moved to trash", path=str(path))
+
+    def _usage(self) -> Dict[Path, int]:
+        """
+        Return the size of every directory under the task roots, trash included.
+
+        Only directories of unknown size are walked. Leased directories not measured
+        yet are still being checked out and count as empty.
+        """
+        known = dict(self._sizes)
+        leases = set(self._leases)
+        sizes: Dict[Path, int] = {}
+        for root in self._roots():
+            for entry in root.iterdir():
+                paths = list(entry.iterdir()) if entry.name == TRASH_DIR else [entry]
+                for path in paths:
+                    if path in known:
+                        sizes[path] = known[path]
+                    elif path in leases:
+                        sizes[path] = 0
+                    elif path.is_dir():
+                        sizes[path] = dir_size(path)
+        return sizes
+
+    async def _measure_all(self) -> Dict[Path, int]:
+        """Return the current sizes and remember those of directories not in use."""
+        sizes = await asyncio.to_thread(self._usage)
+        self._sizes = {
+            path: size
+            for path, size in sizes.items()
+            if path not in self._leases or path in self._sizes
+        }
+        return sizes
+
+    async def evict(self) -> None:
+        """
+        Remove trash and abandoned task directories until the budget is met.
+
+        Directories in use are never evicted. Directories not leased by this process
+        are only removed once older than ``workspace_stale_after`` seconds, as another
+        worker sharing the volume may still be using them.
+
+        Raises:
+            WorkspaceFullError: If the budget is still exceeded after eviction
+        """
+        if not self.max_size_bytes:
+            return
+
+        sizes = await self._measure_all()
+        total = sum(sizes.values())
+        if total <= self.max_size_bytes:
+            return
+
+        # Wait for pending background deletions first; they may free enough space
+        if self._deletions:
+            await asyncio.gather(*self._deletions, return_exceptions=True)
+            sizes = await self._measure_all()
+            total = sum(sizes.values())
+
+        cutoff = time.time() - settings.workspace_stale_after
+
+        def _mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                return 0.0
+
+        candidates = [
+            path
+            for path in sizes
+            if path.parent.name == TRASH_DIR or (path not in self._leases and _mtime(path) < cutoff)
+        ]
+        for path in sorted(candidates, key=_mtime):
+            if total <= self.max_size_bytes:
+                break
+            self.log.info(
+                "workspace_evict",
+                msg="Evicting task directory",
+                path=str(path),
+                size_bytes=sizes[path],
+            )
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            self._sizes.pop(path, None)
+            total -= sizes[path]
+
+        if total > self.max_size_bytes:
+            raise WorkspaceFullError(
+                f"Task directories use {total / 2**20:.1f} MB, "
+                f"over the {self.max_size_bytes / 2**20:.0f} MB workspace budget"
+            )
+
+    async def purge_trash(self) -> None:
+        """Delete in the background whatever an earlier run left in the trash."""
+        for root in self._roots():
+            trash = root / TRASH_DIR
+            if trash.exists():
+                task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, trash, True))
+                self._deletions.add(task)
+                task.add_done_callback(self._deletions.discard)
+
+    async def close(self) -> None:
+        """Wait for background deletions to finish."""
+        if self._deletions:
+            await asyncio.gather(*self._deletions, return_exceptions=True)
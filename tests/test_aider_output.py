@@ -0,0 +1,35 @@
+"""Tests for the Aider stall detector."""
+
+import asyncio
+import time
+
+import pytest
+
+from worker.aider_output import AiderOutputParser, AiderStalled, watch_for_stall
+
+
+async def _stream(parser: AiderOutputParser, lines: int, interval: float) -> str:
+    for i in range(lines):
+        await asyncio.sleep(interval)
+        parser.feed(f"line {i}")
+    return "done"
+
+
+def test_wait_before_run_is_not_a_stall():
+    parser = AiderOutputParser()
+    # The parser is created before the task waits for its LLM slot
+    parser.last_output = time.monotonic() - 1.2
+
+    result = asyncio.run(
+        watch_for_stall(_stream(parser, 3, 0.1), parser, stall_timeout=1.0, timeout=10)
+    )
+
+    assert result == "done"
+    assert parser.lines == 3
+
+
+def test_silent_run_stalls():
+    parser = AiderOutputParser()
+
+    with pytest.raises(AiderStalled):
+        asyncio.run(watch_for_stall(asyncio.sleep(5), parser, stall_timeout=0.3, timeout=10))
@@ -0,0 +1,108 @@
+"""Tests for the batch quickfix workflow."""
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List
+
+from worker.models import TaskMessage, TaskMode
+from worker.modes.batch_quickfix_mode import BatchQuickFixMode
+
+
+class FakeGitHandler:
+    """Records branch work instead of running git."""
+
+    def __init__(self) -> None:
+        self.branch = ""
+        self.commits: Dict[str, str] = {}
+        self.pushed: List[str] = []
+        self.cleaned = False
+
+    async def allocate(self, name: str) -> Path:
+        return Path("/checkouts") / name
+
+    async def shallow_clone(self, repo_url: str, target_dir: Path, **kwargs: Any) -> Path:
+        return target_dir
+
+    async def head_commit(self, repo_path: Path) -> str:
+        return "base"
+
+    async def reset_branch(self, repo_path: Path, branch_name: str, start_point: str) -> None:
+        self.branch = branch_name
+
+    async def export_commits(self, repo_path: Path, base: str) -> str:
+        return self.commits.get(self.branch, "")
+
+    async def push_branches(self, repo_path: Path, branches: List[str]) -> Dict[str, Any]:
+        self.pushed += branches
+        return {branch: None for branch in branches}
+
+    async def cleanup(self, target_dir: Path) -> None:
+        self.cleaned = True
+
+
+class FakeGitHub:
+    """Serves issues and records what is posted on them."""
+
+    def __init__(self, missing: List[int]) -> None:
+        self.missing = missing
+        self.comments: Dict[int, str] = {}
+
+    async def get_repository(self, repo_url: str) -> Dict[str, Any]:
+        return {"full_name": "owner/repo"}
+
+    async def get_issue(self, repo: Dict[str, Any], issue_id: int) -> Dict[str, Any]:
+        if issue_id in self.missing:
+            raise RuntimeError("404 Not Found")
+        return {"number": issue_id, "title": f"Issue {issue_id}"}
+
+    def get_issue_data(self, issue: Dict[str, Any]) -> Dict[str, Any]:
+        return {"number": issue["number"], "title": issue["title"], "body": "", "labels": []}
+
+    async def create_pull_request(self, head: str, **kwargs: Any) -> Dict[str, Any]:
+        number = 100 + int(head.rsplit("-", 1)[1])
+        return {"number": number, "html_url": f"https://github.com/owner/repo/pull/{number}"}
+
+    async def add_issue_comment(self, issue: Dict[str, Any], body: str) -> None:
+        self.comments[issue["number"]] = body
+
+    async def add_labels(self, issue: Dict[str, Any], labels: List[str]) -> None:
+        pass
+
+
+class FakeLLM:
+    """Commits a fix on the current branch, or fails for some issues."""
+
+    def __init__(self, git_handler: FakeGitHandler, failing: List[int]) -> None:
+        self.git_handler = git_handler
+        self.failing = failing
+
+    async def generate_code(self, issue_data: Dict[str, Any], repo_path: str) -> None:
+        if issue_data["number"] in self.failing:
+            raise RuntimeError("Aider finished with error code: 1")
+        self.git_handler.commits[self.git_handler.branch] = f"fix {issue_data['number']}"
+
+
+def test_failing_issues_do_not_fail_the_batch():
+    git_handler = FakeGitHandler()
+    github = FakeGitHub(missing=[3])
+    mode = BatchQuickFixMode(
+        git_handler=git_handler,
+        git_client=type("GitClient", (), {"client": github})(),
+        llm_client=FakeLLM(git_handler, failing=[2]),
+    )
+    task = TaskMessage(
+        repo_url="https://github.com/owner/repo",
+        mode=TaskMode.BATCH_QUICKFIX,
+        trigger_user="dev",
+        issue_ids=[1, 2, 3],
+    )
+
+    outcomes = asyncio.run(mode.execute(task))
+
+    assert outcomes[1]["number"] == 101
+    assert "Aider finished with error code" in outcomes[2]["error"]
+    assert "404" in outcomes[3]["error"]
+    assert git_handler.pushed == ["ai-agent/batch-quickfix-issue-1"]
+    assert github.comments[1] == "🤖 QuickFix applied. PR: #101"
+    assert github.comments[2].startswith("🤖 QuickFix could not be applied")
+    assert git_handler.cleaned
@@ -0,0 +1,107 @@
+"""Tests for task checkpoints and resuming pipelines from them."""
+
+import asyncio
+import os
+from typing import Any, Dict, List
+
+from worker.checkpoints import CheckpointStore, checkpoint_key
+from worker.pipeline import Pipeline, Step
+
+
+def test_checkpoint_keys():
+    assert checkpoint_key(["msg-1"]) == "msg-1"
+    merged = checkpoint_key(["msg-2", "msg-1"])
+    assert merged == checkpoint_key(["msg-1", "msg-2"])
+    assert merged != checkpoint_key(["msg-1", "msg-3"])
+    # Without a producer-set ID there is nothing stable to key on
+    assert checkpoint_key([None]) is None
+    assert checkpoint_key(["msg-1", None]) is None
+
+
+def test_recorded_stages_survive_a_reload_until_cleared(tmp_path):
+    async def run() -> None:
+        store = CheckpointStore(tmp_path)
+        checkpoint = await store.load("amq.ctag/1")
+        assert checkpoint.stages == {}
+        await checkpoint.record("push", "ai-agent/quickfix-issue-1")
+
+        reloaded = await store.load("amq.ctag/1")
+        assert reloaded.stages == {"push": "ai-agent/quickfix-issue-1"}
+        assert reloaded.path.parent == tmp_path
+
+        await store.clear(reloaded)
+        assert (await store.load("amq.ctag/1")).stages == {}
+
+    asyncio.run(run())
+
+
+def test_unreadable_and_expired_checkpoints(tmp_path):
+    async def run() -> None:
+        store = CheckpointStore(tmp_path, ttl=60)
+        broken = await store.load("broken")
+        broken.path.write_text("{")
+        assert (await store.load("broken")).stages == {}
+
+        old = await store.load("old")
+        await old.record("push", "branch")
+        os.utime(old.path, (0, 0))
+        await store.prune()
+        assert not old.path.exists()
+        assert broken.path.exists()
+
+    asyncio.run(run())
+
+
+def test_resume_skips_finished_steps_and_restores_their_effect(tmp_path):
+    ran: List[str] = []
+    restored: List[Any] = []
+
+    def step(name: str):
+        async def run(r: Dict[str, Any]) -> str:
+            ran.append(name)
+            return f"{name} result"
+
+        return run
+
+    async def restore(r: Dict[str, Any], saved: Any) -> None:
+        restored.append((r["clone"], saved))
+
+    def steps() -> List[Step]:
+        return [
+            Step("clone", step("clone")),
+            Step("issue", step("issue")),
+            Step(
+                "generate", step("generate"), depends_on=["clone"], checkpoint=True, restore=restore
+            ),
+            Step("push", step("push"), depends_on=["generate"], checkpoint=True),
+            Step(
+                "pull_request", step("pull_request"), depends_on=["push", "issue"], checkpoint=True
+            ),
+        ]
+
+    async def run() -> Dict[str, Any]:
+        store = CheckpointStore(tmp_path)
+        checkpoint = await store.load("task")
+        await checkpoint.record("generate", "patches")
+        await checkpoint.record("push", "branch")
+        return await Pipeline("test", steps(), checkpoint=await store.load("task")).run()
+
+    results = asyncio.run(run())
+
+    # The pushed branch is reused; the saved commits are not needed to open the PR
+    assert sorted(ran) == ["issue", "pull_request"]
+    assert restored == []
+    assert results["push"] == "branch"
+
+    ran.clear()
+
+    async def retry_push() -> None:
+        store = CheckpointStore(tmp_path)
+        checkpoint = await store.load("retry")
+        await checkpoint.record("generate", "patches")
+        await Pipeline("test", steps(), checkpoint=checkpoint).run()
+
+    asyncio.run(retry_push())
+    # The push needs the generated commits back in a fresh clone, without the LLM
+    assert sorted(ran) == ["clone", "issue", "pull_request", "push"]
+    assert restored == [("clone result", "patches")]
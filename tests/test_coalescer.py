@@ -0,0 +1,138 @@
+"""Tests for task deduplication and coalescing."""
+
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from worker.coalescer import Claim, TaskCoalescer, merge_messages, task_key
+from worker.models import TaskMessage, TaskMode
+
+REPO = "https://github.com/owner/repo"
+
+
+def quickfix(issue_id: int = 1, user: str = "dev") -> TaskMessage:
+    return TaskMessage(repo_url=REPO, mode=TaskMode.QUICKFIX, trigger_user=user, issue_id=issue_id)
+
+
+def refine(comment_id: int, request: str) -> TaskMessage:
+    return TaskMessage(
+        repo_url=REPO,
+        mode=TaskMode.REFINE,
+        trigger_user="dev",
+        pr_number=7,
+        pr_branch="feature",
+        refine_request=request,
+        comment_id=comment_id,
+    )
+
+
+def test_keys_ignore_url_spelling():
+    other = TaskMessage(
+        repo_url="https://github.com/Owner/Repo.git",
+        mode=TaskMode.QUICKFIX,
+        trigger_user="dev",
+        issue_id=1,
+    )
+    assert task_key(other) == task_key(quickfix())
+    assert task_key(quickfix(2)) != task_key(quickfix())
+
+
+def test_merge_refine_requests_keeps_every_comment():
+    merged = merge_messages(
+        [refine(1, "Rename foo"), refine(2, "Add tests"), refine(3, "Add tests")]
+    )
+    assert merged.refine_request == "1. Rename foo\n\n2. Add tests"
+    assert merged.comment_id == 1
+    assert merged.extra_comment_ids == [2, 3]
+
+
+def test_merge_batches_unions_issues():
+    batches = [
+        TaskMessage(repo_url=REPO, mode=TaskMode.BATCH_QUICKFIX, trigger_user="dev", issue_ids=ids)
+        for ids in ([1, 2], [2, 3])
+    ]
+    assert merge_messages(batches).issue_ids == [1, 2, 3]
+
+
+async def claim(
+    coalescer: TaskCoalescer,
+    message: TaskMessage,
+    runs: List[TaskMessage],
+    release: Optional[asyncio.Event] = None,
+    error: Optional[Exception] = None,
+    message_id: Optional[str] = None,
+) -> Optional[Claim]:
+    async with coalescer.claim(message, message_id) as claimed:
+        if claimed is not None:
+            runs.append(claimed.task)
+            if release is not None:
+                await release.wait()
+            if error is not None:
+                raise error
+        return claimed
+
+
+def test_duplicate_of_a_running_task_is_dropped_but_a_later_retrigger_runs():
+    runs: List[TaskMessage] = []
+
+    async def run() -> None:
+        coalescer = TaskCoalescer()
+        release = asyncio.Event()
+        first = asyncio.create_task(claim(coalescer, quickfix(), runs, release))
+        await asyncio.sleep(0)
+        assert await claim(coalescer, quickfix(), runs) is None
+        release.set()
+        await first
+        # The run has finished: the same request is a new request
+        assert await claim(coalescer, quickfix(), runs) is not None
+
+    asyncio.run(run())
+    assert len(runs) == 2
+
+
+def test_messages_queued_behind_a_run_are_merged_into_the_next_one():
+    runs: List[TaskMessage] = []
+
+    async def run() -> None:
+        coalescer = TaskCoalescer()
+        release = asyncio.Event()
+        first = asyncio.create_task(claim(coalescer, refine(1, "A"), runs, release))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(
+                claim(coalescer, refine(cid, request), runs, message_id=f"msg-{cid}")
+            )
+            for cid, request in ((2, "B"), (3, "C"))
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await first
+        results = [claimed for claimed in await asyncio.gather(*queued) if claimed]
+        assert [claimed.message_ids for claimed in results] == [["msg-2", "msg-3"]]
+
+    asyncio.run(run())
+    assert [task.refine_request for task in runs] == ["A", "1. B\n\n2. C"]
+
+
+def test_merged_messages_share_the_failure_of_their_run():
+    runs: List[TaskMessage] = []
+
+    async def run() -> None:
+        coalescer = TaskCoalescer()
+        release = asyncio.Event()
+        blocker = asyncio.create_task(claim(coalescer, refine(1, "A"), runs, release))
+        await asyncio.sleep(0)
+        failing = asyncio.create_task(
+            claim(coalescer, refine(2, "B"), runs, error=RuntimeError("push rejected"))
+        )
+        merged = asyncio.create_task(claim(coalescer, refine(3, "C"), runs))
+        await asyncio.sleep(0)
+        release.set()
+        await blocker
+        for task in (failing, merged):
+            with pytest.raises(RuntimeError, match="push rejected"):
+                await task
+
+    asyncio.run(run())
+    assert len(runs) == 2
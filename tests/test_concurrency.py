@@ -0,0 +1,88 @@
+"""Tests for the per-resource concurrency limits."""
+
+import asyncio
+from typing import List
+
+from worker.concurrency import PrioritySemaphore, ResourceLimits, current_priority
+
+
+async def wait_in_order(semaphore: PrioritySemaphore, priority: int, order: List[int]) -> None:
+    current_priority.set(priority)
+    async with semaphore:
+        order.append(priority)
+
+
+def test_limits_bound_concurrent_tasks():
+    running = 0
+    peak = 0
+
+    async def task(limits: ResourceLimits) -> None:
+        nonlocal running, peak
+        async with limits.git_network:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def run() -> None:
+        limits = ResourceLimits(llm_calls=1, git_network_ops=2, github_calls=1)
+        await asyncio.gather(*(task(limits) for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_free_slot_goes_to_highest_priority_waiter():
+    order: List[int] = []
+
+    async def run() -> None:
+        semaphore = PrioritySemaphore(1, aging=3600)
+        await semaphore.acquire()
+        waiters = []
+        for priority in (1, 5, 3, 5):
+            waiters.append(asyncio.create_task(wait_in_order(semaphore, priority, order)))
+            await asyncio.sleep(0)
+        assert semaphore.waiting == 4
+        semaphore.release()
+        await asyncio.gather(*waiters)
+        assert semaphore.in_use == 0
+
+    asyncio.run(run())
+    assert order == [5, 5, 3, 1]
+
+
+def test_waiting_tasks_age_past_newer_high_priority_ones():
+    order: List[int] = []
+
+    async def run() -> None:
+        semaphore = PrioritySemaphore(1, aging=0.01)
+        await semaphore.acquire()
+        low = asyncio.create_task(wait_in_order(semaphore, 0, order))
+        # Ten aging periods: the low priority task now outranks priority 5
+        await asyncio.sleep(0.1)
+        high = asyncio.create_task(wait_in_order(semaphore, 5, order))
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.gather(low, high)
+
+    asyncio.run(run())
+    assert order == [0, 5]
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    order: List[int] = []
+
+    async def run() -> None:
+        semaphore = PrioritySemaphore(1, aging=3600)
+        await semaphore.acquire()
+        first = asyncio.create_task(wait_in_order(semaphore, 5, order))
+        second = asyncio.create_task(wait_in_order(semaphore, 1, order))
+        await asyncio.sleep(0)
+        # The slot is handed to the first waiter, which is cancelled before it runs
+        semaphore.release()
+        first.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        assert semaphore.in_use == 0
+
+    asyncio.run(run())
+    assert order == [1]
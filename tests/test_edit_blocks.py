@@ -0,0 +1,106 @@
+"""Tests for parsing and applying SEARCH/REPLACE edit blocks."""
+
+import pytest
+
+from worker.edit_blocks import EditBlock, EditBlockError, apply_edit_blocks, parse_edit_blocks
+
+RESPONSE = """Here is the fix.
+
+src/app.py
+```python
+<<<<<<< SEARCH
+def add(a, b):
+    return a - b
+=======
+def add(a, b):
+    return a + b
+>>>>>>> REPLACE
+```
+
+Now the tests need updating as well:
+
+```python
+<<<<<<< SEARCH
+=======
+import app
+>>>>>>> REPLACE
+```
+"""
+
+
+def test_parse_blocks_with_paths_before_the_fence():
+    blocks = parse_edit_blocks(RESPONSE)
+    assert [b.path for b in blocks] == ["src/app.py", "src/app.py"]
+    assert blocks[0].search == "def add(a, b):\n    return a - b\n"
+    assert blocks[0].replace == "def add(a, b):\n    return a + b\n"
+    assert blocks[1].search == ""
+
+
+def test_prose_between_blocks_is_not_a_path():
+    text = """tests/test_app.py
+Let me also add a test for it, which was missing:
+```python
+<<<<<<< SEARCH
+=======
+def test_add(): ...
+>>>>>>> REPLACE
+```"""
+    assert [b.path for b in parse_edit_blocks(text)] == ["tests/test_app.py"]
+
+
+def test_decorated_and_bare_paths():
+    text = """**File: `Makefile`**
+<<<<<<< SEARCH
+=======
+all:
+>>>>>>> REPLACE
+"""
+    assert parse_edit_blocks(text)[0].path == "Makefile"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n",
+        "src/app.py\n<<<<<<< SEARCH\na\n=======\nb\n",
+    ],
+)
+def test_malformed_blocks_are_rejected(text):
+    with pytest.raises(EditBlockError):
+        parse_edit_blocks(text)
+
+
+def test_apply_edits_and_creates_files(tmp_path):
+    (tmp_path / "app.py").write_text("a = 1  \nb = 2\n")
+    edited = apply_edit_blocks(
+        tmp_path,
+        [
+            EditBlock("app.py", "a = 1\n", "a = 3\n"),
+            EditBlock("pkg/new.py", "", "x = 1\n"),
+        ],
+    )
+    assert edited == ["app.py", "pkg/new.py"]
+    assert (tmp_path / "app.py").read_text() == "a = 3\nb = 2\n"
+    assert (tmp_path / "pkg" / "new.py").read_text() == "x = 1\n"
+
+
+@pytest.mark.parametrize("path", ["../outside.py", "/etc/passwd", ".git/config"])
+def test_paths_outside_the_repository_are_refused(tmp_path, path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    with pytest.raises(EditBlockError):
+        apply_edit_blocks(repo, [EditBlock(path, "", "x\n")])
+    assert not (tmp_path / "outside.py").exists()
+
+
+def test_failing_block_leaves_the_tree_untouched(tmp_path):
+    (tmp_path / "app.py").write_text("a = 1\n")
+    with pytest.raises(EditBlockError):
+        apply_edit_blocks(
+            tmp_path,
+            [
+                EditBlock("app.py", "a = 1\n", "a = 2\n"),
+                EditBlock("app.py", "missing\n", "b = 2\n"),
+            ],
+        )
+    assert (tmp_path / "app.py").read_text() == "a = 1\n"
@@ -0,0 +1,111 @@
+"""Tests for the LLM client: HTTP client lifecycle and native engine."""
+
+import asyncio
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+import httpx
+import pytest
+
+from worker.config import settings
+from worker.edit_blocks import EditBlockError
+from worker.llm_client import LLMClient
+
+
+def test_replaced_client_drains_before_closing():
+    async def run():
+        llm = LLMClient()
+        async with llm._borrow_client() as old:
+            await llm._replace_client()
+            # A request still streaming through the old client keeps it open
+            assert not old.is_closed
+            assert llm.client is not old
+        assert old.is_closed
+        assert not llm.client.is_closed
+        await llm.close()
+
+    asyncio.run(run())
+
+
+def test_idle_client_is_closed_when_replaced():
+    async def run():
+        llm = LLMClient()
+        old = llm.client
+        await llm._replace_client()
+        assert old.is_closed
+        await llm.close()
+
+    asyncio.run(run())
+
+
+def test_transport_error_replaces_client():
+    async def run():
+        llm = LLMClient()
+        old = llm.client
+        with pytest.raises(httpx.ConnectError):
+            async with llm._borrow_client():
+                raise httpx.ConnectError("connection refused")
+        assert old.is_closed
+        assert llm.client is not old
+        await llm.close()
+
+    asyncio.run(run())
+
+
+def test_closed_client_is_recreated():
+    async def run():
+        llm = LLMClient()
+        await llm.client.aclose()
+        async with llm._borrow_client() as client:
+            assert not client.is_closed
+        await llm.close()
+
+    asyncio.run(run())
+
+
+def git_repo(path: Path, files: Dict[str, str]) -> Path:
+    path.mkdir()
+    for name, content in files.items():
+        (path / name).write_text(content)
+    for args in (["init", "--quiet"], ["add", "."], ["commit", "--quiet", "-m", "initial"]):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=path,
+            check=True,
+            capture_output=True,
+        )
+    return path
+
+
+def test_native_edits_that_change_nothing_fall_under_edit_block_errors(tmp_path):
+    repo = git_repo(tmp_path / "repo", {"app.py": "a = 1\n"})
+
+    async def complete(*args) -> str:
+        return "app.py\n<<<<<<< SEARCH\na = 1\n=======\na = 1\n>>>>>>> REPLACE\n"
+
+    async def run():
+        llm = LLMClient(provider="native")
+        llm.index_store = None
+        llm._stream_completion = complete
+        with pytest.raises(EditBlockError):
+            await llm._call_native("Fix app.py", str(repo), "change", "model")
+        await llm.close()
+
+    asyncio.run(run())
+
+
+def test_native_context_skips_files_over_the_budget(tmp_path, monkeypatch):
+    repo = git_repo(tmp_path / "repo", {"big.py": "x = 1\n" * 50, "small.py": "y = 2\n"})
+    monkeypatch.setattr(settings, "llm_native_context_chars", 100)
+
+    async def run() -> str:
+        llm = LLMClient(provider="native")
+        llm.index_store = None
+        context = await llm._build_native_context("Fix big.py and small.py", repo)
+        await llm.close()
+        return context
+
+    context = asyncio.run(run())
+    assert "## small.py" in context
+    assert "## big.py" not in context
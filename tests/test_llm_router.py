@@ -0,0 +1,75 @@
+"""Tests for routing LLM requests across backends."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from worker.config import settings
+from worker.llm_router import Backend, LLMRouter, NoBackendError
+
+
+def test_least_loaded_backend_with_the_model_loaded_is_picked():
+    router = LLMRouter(["http://a", "http://b", "http://c"], backend_models={})
+    a, b, c = router.backends
+    a.in_flight = 2
+    b.in_flight = 1
+    c.in_flight = 1
+    c.loaded_models = {"other"}
+    assert router.pick("model") is b
+
+
+def test_models_are_restricted_to_their_backends():
+    router = LLMRouter(["http://cpu", "http://gpu/"], backend_models={"big": ["http://gpu"]})
+    assert router.pick("big").url == "http://gpu"
+    with pytest.raises(NoBackendError):
+        router.pick("big", exclude={"http://gpu"})
+
+
+def test_failed_request_fails_over_and_cools_the_backend_down(monkeypatch):
+    monkeypatch.setattr(settings, "llm_backend_cooldown", 60)
+    router = LLMRouter(["http://a", "http://b"], backend_models={})
+    tried = []
+
+    async def request(backend: Backend) -> str:
+        tried.append(backend.url)
+        if backend.url == "http://a":
+            raise httpx.ConnectError("connection refused")
+        return "completion"
+
+    assert asyncio.run(router.run("model", request)) == "completion"
+    assert tried == ["http://a", "http://b"]
+    a = router.backends[0]
+    assert not a.available
+    assert a.down_until > time.monotonic() + 50
+    assert all(backend.in_flight == 0 for backend in router.backends)
+    # Later requests skip the failed backend while it cools down
+    assert router.pick("model").url == "http://b"
+
+
+def test_request_errors_are_not_retried():
+    router = LLMRouter(["http://a", "http://b"], backend_models={})
+    tried = []
+
+    async def request(backend: Backend) -> str:
+        tried.append(backend.url)
+        response = httpx.Response(400, request=httpx.Request("POST", backend.url))
+        raise httpx.HTTPStatusError("bad request", request=response.request, response=response)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(router.run("model", request))
+    assert len(tried) == 1
+    assert all(backend.available for backend in router.backends)
+
+
+def test_the_last_error_is_raised_when_every_backend_fails():
+    router = LLMRouter(["http://a", "http://b"], backend_models={})
+
+    async def request(backend: Backend) -> str:
+        raise httpx.ReadTimeout(f"{backend.url} timed out")
+
+    with pytest.raises(httpx.ReadTimeout, match="http://b"):
+        asyncio.run(router.run("model", request))
+    # Every backend is down, yet one is still offered rather than none
+    assert router.pick("model") in router.backends
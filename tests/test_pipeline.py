@@ -0,0 +1,76 @@
+"""Tests for the pipeline step runner."""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from worker.pipeline import Pipeline, Step
+
+
+def test_steps_run_after_their_dependencies_and_overlap_otherwise():
+    events: List[str] = []
+
+    def step(name: str, delay: float = 0.0):
+        async def run(r: Dict[str, Any]) -> str:
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+            return name.upper()
+
+        return run
+
+    pipeline = Pipeline(
+        "test",
+        [
+            Step("clone", step("clone", 0.02)),
+            Step("issue", step("issue", 0.01)),
+            Step("generate", step("generate"), depends_on=["clone", "issue"]),
+        ],
+    )
+    results = asyncio.run(pipeline.run())
+
+    assert results == {"clone": "CLONE", "issue": "ISSUE", "generate": "GENERATE"}
+    assert events[:2] == ["start clone", "start issue"]
+    assert events.index("start generate") > events.index("end clone")
+    assert set(pipeline.timings) == {"clone", "issue", "generate"}
+
+
+def test_failure_cancels_running_steps_and_skips_dependents():
+    cancelled = False
+    ran: List[str] = []
+
+    async def slow(r: Dict[str, Any]) -> None:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def fail(r: Dict[str, Any]) -> None:
+        raise RuntimeError("GitHub is down")
+
+    async def push(r: Dict[str, Any]) -> None:
+        ran.append("push")
+
+    pipeline = Pipeline(
+        "test",
+        [Step("clone", slow), Step("issue", fail), Step("push", push, depends_on=["issue"])],
+    )
+    with pytest.raises(RuntimeError, match="GitHub is down"):
+        asyncio.run(pipeline.run())
+    assert cancelled
+    assert ran == []
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [Step("a", None), Step("a", None)],
+        [Step("b", None, depends_on=["a"]), Step("a", None)],
+    ],
+)
+def test_invalid_graphs_are_rejected(steps):
+    with pytest.raises(ValueError):
+        Pipeline("test", steps)
@@ -0,0 +1,110 @@
+"""Tests for the semaphores shared with the task processes."""
+
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from worker import prefork
+from worker.prefork import SharedSemaphore
+
+# The fork server passes sys.path, and so this module, to its children only when
+# it preloads modules
+prefork._context.set_forkserver_preload(["worker.prefork"])
+
+
+def _take_slots(semaphore: SharedSemaphore, index: int, slots: int) -> None:
+    """Task process that takes slots and never releases them."""
+    prefork._process_index = index
+
+    async def take() -> None:
+        for _ in range(slots):
+            await semaphore.acquire()
+        await asyncio.sleep(60)
+
+    asyncio.run(take())
+
+
+def _until(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("Timed out")
+        time.sleep(0.01)
+
+
+def test_slots_of_a_killed_process_are_reclaimed():
+    semaphore = SharedSemaphore(3, processes=2)
+    process = prefork._context.Process(target=_take_slots, args=(semaphore, 2, 2))
+    process.start()
+    _until(lambda: semaphore.in_use == 2)
+
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    assert semaphore.in_use == 2
+
+    assert semaphore.reclaim(2) == 2
+    assert semaphore.in_use == 0
+    assert semaphore.reclaim(2) == 0
+
+
+def test_waiting_count_of_a_killed_process_is_reclaimed():
+    semaphore = SharedSemaphore(1, processes=1)
+    asyncio.run(semaphore.acquire())
+    process = prefork._context.Process(target=_take_slots, args=(semaphore, 1, 1))
+    process.start()
+    _until(lambda: semaphore.waiting == 1)
+
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    assert semaphore.reclaim(1) == 0
+    assert semaphore.waiting == 0
+    # The slot held by this process is untouched
+    assert semaphore.in_use == 1
+    semaphore.release()
+    assert semaphore.in_use == 0
+
+
+def test_waiter_takes_the_slot_released_by_another_process():
+    semaphore = SharedSemaphore(1, processes=1)
+    process = prefork._context.Process(target=_take_slots, args=(semaphore, 1, 1))
+    process.start()
+    _until(lambda: semaphore.in_use == 1)
+
+    async def wait_for_slot() -> float:
+        waiter = asyncio.create_task(semaphore.acquire())
+        while semaphore.waiting == 0:
+            await asyncio.sleep(0.01)
+        os.kill(process.pid, signal.SIGKILL)
+        await asyncio.to_thread(process.join)
+        released = time.monotonic()
+        semaphore.reclaim(1)
+        await waiter
+        return time.monotonic() - released
+
+    # The blocked thread wakes on the release rather than on its next attempt
+    assert asyncio.run(wait_for_slot()) < prefork.ACQUIRE_TIMEOUT / 2
+    assert semaphore.waiting == 0
+    semaphore.release()
+
+
+def test_cancelled_wait_does_not_keep_a_slot():
+    semaphore = SharedSemaphore(1, processes=1)
+
+    async def cancel_wait() -> None:
+        await semaphore.acquire()
+        waiter = asyncio.create_task(semaphore.acquire())
+        while semaphore.waiting == 0:
+            await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert semaphore.waiting == 0
+        # The thread still blocked on the semaphore takes this slot and gives it back
+        semaphore.release()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(cancel_wait())
+    assert semaphore.in_use == 0
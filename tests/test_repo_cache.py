@@ -0,0 +1,70 @@
+"""Tests for the repository mirror cache."""
+
+import asyncio
+import subprocess
+import sys
+
+from worker.git.repo_cache import RepoCache
+
+HOLD_LEASE = """
+import fcntl, sys, time
+lease = open(sys.argv[1], "a")
+fcntl.flock(lease.fileno(), fcntl.LOCK_SH)
+print("leased", flush=True)
+time.sleep(60)
+"""
+
+
+def test_mirror_leased_by_another_process_is_not_evicted(tmp_path):
+    cache = RepoCache(tmp_path, max_size_mb=1)
+    cache.max_size_bytes = 0
+    mirror = tmp_path / "github.com__owner__repo.git"
+    mirror.mkdir()
+    (mirror / "objects").write_bytes(b"x" * 1024)
+
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLD_LEASE, str(tmp_path / "github.com__owner__repo.lease")],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "leased"
+        asyncio.run(cache.evict())
+        assert mirror.exists()
+    finally:
+        holder.kill()
+        holder.wait()
+
+    asyncio.run(cache.evict())
+    assert not mirror.exists()
+
+
+def git(*args: str, cwd=None) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def test_mirror_fetches_only_the_branch_tip(tmp_path):
+    remote = tmp_path / "remote"
+    git("init", "--quiet", "--initial-branch=main", str(remote))
+    for n in range(3):
+        (remote / "file.txt").write_text(str(n))
+        git("add", "file.txt", cwd=remote)
+        git("commit", "--quiet", "-m", f"commit {n}", cwd=remote)
+    git("branch", "other", "HEAD~1", cwd=remote)
+
+    cache = RepoCache(tmp_path / "mirrors")
+    checkout = tmp_path / "checkout"
+    url = remote.as_uri()
+    asyncio.run(cache.checkout(url, url, checkout, branch="main"))
+
+    mirror = cache.mirror_path(url)
+    assert git("rev-list", "--count", "--all", cwd=mirror) == "1"
+    assert git("for-each-ref", "--format=%(refname)", cwd=mirror) == "refs/heads/main"
+    assert (checkout / "file.txt").read_text() == "2"
+    cache.release(checkout)
@@ -0,0 +1,46 @@
+"""Tests for the LLM result cache."""
+
+import asyncio
+import os
+
+from worker.result_cache import ResultCache
+
+
+def test_key_depends_on_every_part_without_ambiguity():
+    key = ResultCache.key("abc123", "native:model", "Fix the bug")
+    assert key == ResultCache.key("abc123", "native:model", "Fix the bug")
+    assert key != ResultCache.key("def456", "native:model", "Fix the bug")
+    assert key != ResultCache.key("abc123", "ollama:model", "Fix the bug")
+    assert key != ResultCache.key("abc123", "native:model", "Fix the other bug")
+    assert ResultCache.key("ab", "c", "p") != ResultCache.key("a", "bc", "p")
+
+
+def test_put_get_and_discard(tmp_path):
+    async def run() -> None:
+        cache = ResultCache(tmp_path)
+        key = cache.key("abc123", "native:model", "Fix the bug")
+        assert await cache.get(key) is None
+        await cache.put(key, b"diff --git a/x b/x\n")
+        assert await cache.get(key) == b"diff --git a/x b/x\n"
+        await cache.discard(key)
+        assert await cache.get(key) is None
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_patches_are_evicted(tmp_path):
+    async def run() -> None:
+        cache = ResultCache(tmp_path)
+        for n, key in enumerate(("old", "used", "new")):
+            await cache.put(key, b"x" * 100)
+            os.utime(cache._path(key), (1000 + n, 1000 + n))
+        cache.max_size_bytes = 250
+        # Reading an entry makes it the most recently used one
+        await cache.get("old")
+        await cache.evict()
+
+        assert await cache.get("old") is not None
+        assert await cache.get("used") is None
+        assert await cache.get("new") is not None
+
+    asyncio.run(run())
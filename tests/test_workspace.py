@@ -0,0 +1,31 @@
+"""Tests for the workspace size accounting."""
+
+import asyncio
+from pathlib import Path
+
+from worker import workspace
+from worker.workspace import WorkspaceManager
+
+
+def test_allocate_does_not_walk_running_checkouts(tmp_path, monkeypatch):
+    walked = []
+
+    def dir_size(path: Path) -> int:
+        walked.append(path)
+        return 1024
+
+    monkeypatch.setattr(workspace, "dir_size", dir_size)
+    manager = WorkspaceManager(tmp_path, max_size_mb=1, tmpfs_dir=None)
+
+    async def run() -> None:
+        first = await manager.allocate("repo")
+        await manager.measure(first)
+        assert walked == [first]
+
+        # Left behind by a crashed run: measured once, then reused
+        (manager.root / "repo-abandoned").mkdir()
+        await manager.allocate("repo")
+        await manager.allocate("repo")
+        assert walked == [first, manager.root / "repo-abandoned"]
+
+    asyncio.run(run())